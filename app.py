@@ -3,29 +3,197 @@ Flask web application for Event ICP Matcher.
 """
 import os
 import json
+import functools
+import threading
 from datetime import datetime
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from typing import Optional
+from flask import Flask, g, render_template, request, jsonify, send_from_directory
 from flask_cors import CORS
-from dotenv import load_dotenv
 
-from linkup_client import LinkupClient
-from icp_matcher_openai import ICPMatcher
+from env_config import load_env
+from linkup_client import LinkupClient, PROMPT_VERSION as LINKUP_PROMPT_VERSION
+from icp_matcher_openai import ICPMatcher, PROMPT_VERSION as MATCHER_PROMPT_VERSION
+from result_cache import ResultCache, make_cache_key
+from person_scores import PersonScoreCache
+from icp_profiles import ICPProfileStore
+from deadline import Deadline, is_timeout
+from source_store import SourceStore
+from attendee_index import DEFAULT_PAGE_SIZE, AttendeeIndex, AttendeeIndexCache, top_attendees
+from lead_ranking import parse_top_k
+from tracing import current_span, span, traced
+from profiling import Profiler, ProfilingDenied, authorized, profile_dir, requested_engine
+from depth_policy import DepthPolicy
+from shared_cache import open_shared_cache
+from compression import init_app as init_compression
+from attendee_import import chunked, iter_attendees
+from entity_resolution import EntityResolver, resolve_people, unique_people
+from event_sources import (
+    EventSourceRegistry,
+    LinkupEventSource,
+    SnapshotEventSource,
+    StaticEventSource,
+)
 
-load_dotenv()
+load_env()
 
 app = Flask(__name__, static_folder='static', template_folder='templates')
 CORS(app)
+init_compression(app)
 
-# Initialize clients
+# Full-response cache for /api/analyze (fresh for RESULT_CACHE_TTL, then served stale
+# while a background refresh runs until RESULT_CACHE_STALE_TTL). With SHARED_CACHE_PATH
+# set, results are also shared between worker processes through SQLite.
+RESULT_CACHE_TTL = float(os.getenv('RESULT_CACHE_TTL', 3600))
+RESULT_CACHE_STALE_TTL = max(float(os.getenv('RESULT_CACHE_STALE_TTL', 86400)), RESULT_CACHE_TTL)
+# Background refreshes only finish in a process that outlives the response, so they
+# are off by default (serverless) and turned on by the long-running servers
+# (python app.py, serve.py, asgi.py); otherwise stale results are refreshed inline
+RESULT_CACHE_BACKGROUND_REFRESH = os.getenv('RESULT_CACHE_BACKGROUND_REFRESH', '').lower() in ('1', 'true', 'yes')
+result_cache = ResultCache(
+    ttl=RESULT_CACHE_TTL,
+    stale_ttl=RESULT_CACHE_STALE_TTL,
+    max_entries=int(os.getenv('RESULT_CACHE_MAX_ENTRIES', 256)),
+    backend=open_shared_cache("results", max_age=RESULT_CACHE_STALE_TTL),
+    # Partial results are served but not cached, so the next request tries for a
+    # full one and a stale refresh that degrades keeps the previous full result
+    should_store=lambda results: not is_degraded(results),
+    background_refresh=RESULT_CACHE_BACKGROUND_REFRESH
+)
+# Per-person ICP scores reused across events while the ICP text is unchanged
+# (PERSON_SCORE_TTL seconds); shared between workers when SHARED_CACHE_PATH is set
+PERSON_SCORE_TTL = float(os.getenv('PERSON_SCORE_TTL', 30 * 86400))
+person_score_cache = PersonScoreCache(
+    ttl=PERSON_SCORE_TTL,
+    max_entries=int(os.getenv('PERSON_SCORE_MAX_ENTRIES', 10000)),
+    version=MATCHER_PROMPT_VERSION,
+    backend=open_shared_cache("person_scores", max_age=PERSON_SCORE_TTL)
+)
+# Linkup responses shared between workers are reused for LINKUP_CACHE_TTL seconds
+LINKUP_CACHE_TTL = float(os.getenv('LINKUP_CACHE_TTL', 86400))
+# Search sources are stored once by content id; results (and the result cache)
+# hold the ids and are expanded per response unless the client asks for ids.
+# Shared records expire after twice the result cache's stale TTL and are rewritten
+# when reused, so they outlive every cached result that references them.
+source_store = SourceStore(
+    max_entries=int(os.getenv('SOURCE_STORE_MAX_ENTRIES', 50000)),
+    backend=open_shared_cache("sources", max_age=2 * RESULT_CACHE_STALE_TTL)
+)
+# Scored attendees of recent results, indexed for /api/results/<id>/attendees
+attendee_indexes = AttendeeIndexCache(max_entries=int(os.getenv('ATTENDEE_INDEX_MAX_ENTRIES', 64)))
+# Degraded results are not kept in the result cache, but their attendees stay
+# pageable from every worker for DEGRADED_RESULT_TTL seconds (with SHARED_CACHE_PATH)
+DEGRADED_RESULT_TTL = float(os.getenv('DEGRADED_RESULT_TTL', 600))
+degraded_results = open_shared_cache("degraded_results", max_age=DEGRADED_RESULT_TTL)
+# Linkup searches try standard depth first and escalate to deep per domain
+# (LINKUP_DEPTH_MODE=adaptive); "deep" or "standard" pins the depth
+linkup_depth_policy = DepthPolicy(
+    mode=os.getenv('LINKUP_DEPTH_MODE', 'adaptive'),
+    backend=open_shared_cache("linkup_depth")
+)
+# Every analysis gets one deadline (ANALYSIS_BUDGET seconds, under the 300s Vercel cap)
+# that bounds each step's API calls; steps degrade instead of running past it.
+# Extraction keeps EXTRACTION_RESERVE seconds for Steps 3-4, ICP research keeps
+# MATCH_RESERVE seconds for Step 4.
+ANALYSIS_BUDGET = float(os.getenv('ANALYSIS_BUDGET', 270))
+EXTRACTION_RESERVE = 60
+MATCH_RESERVE = 20
+
+# Stored, versioned ICP profiles that let an analysis skip Step 3
+icp_profiles = ICPProfileStore(os.getenv('ICP_PROFILES_PATH', 'icp_profiles.json'))
+# Attendees matched per model call when importing CSV/JSONL attendee exports
+IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', 20))
+# Speakers ranked for a top_k analysis (scored best-first, so most are never sent to the model)
+TOP_K_MAX_CANDIDATES = int(os.getenv('TOP_K_MAX_CANDIDATES', 200))
+
+PROMPT_VERSIONS = {
+    "linkup": LINKUP_PROMPT_VERSION,
+    "matcher": MATCHER_PROMPT_VERSION,
+}
+
+# API clients are built on first use (see init_clients) so cold starts - and requests
+# like /api/health that never need them - don't pay for the SDK imports. Under the
+# production server each worker process builds its own clients after fork.
 linkup_client = None
 icp_matcher = None
+_clients_lock = threading.Lock()
+
+
+class InflightTracker:
+    """Counts running analyses so a worker can drain them before shutting down."""
+
+    def __init__(self):
+        self._count = 0
+        self._condition = threading.Condition()
+
+    def __enter__(self):
+        with self._condition:
+            self._count += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        with self._condition:
+            self._count -= 1
+            self._condition.notify_all()
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def drain(self, timeout: float) -> bool:
+        """
+        Wait until no analyses are running.
+
+        Returns:
+            True if drained, False if analyses were still running after timeout seconds.
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self._count == 0, timeout=timeout)
+
+
+inflight_analyses = InflightTracker()
+
+
+def reset_clients():
+    """Drop the API clients so they are rebuilt in this process (called after fork)."""
+    global linkup_client, icp_matcher
+    with _clients_lock:
+        linkup_client = None
+        icp_matcher = None
+
+
+def init_clients() -> bool:
+    """
+    Construct the API clients on first use.
+
+    Returns:
+        True if both clients are available, False if they could not be initialized
+        (e.g. missing API keys; construction is retried on the next call).
+    """
+    global linkup_client, icp_matcher
+    if linkup_client is not None and icp_matcher is not None:
+        return True
 
-try:
-    linkup_client = LinkupClient()
-    icp_matcher = ICPMatcher()
-except Exception as e:
-    print(f"Warning: Could not initialize clients: {e}")
-    print("Make sure API keys are set in .env file")
+    with _clients_lock:
+        try:
+            if linkup_client is None:
+                linkup_client = LinkupClient(
+                    response_cache=open_shared_cache("linkup", max_age=LINKUP_CACHE_TTL),
+                    response_cache_ttl=LINKUP_CACHE_TTL,
+                    depth_policy=linkup_depth_policy
+                )
+            if icp_matcher is None:
+                icp_matcher = ICPMatcher(score_cache=person_score_cache)
+        except Exception as e:
+            print(f"Warning: Could not initialize clients: {e}")
+            print("Make sure API keys are set in .env file")
+            return False
+    return True
+
+
+def get_linkup_client():
+    """Return the Linkup client, constructing it on first use (None if unavailable)."""
+    init_clients()
+    return linkup_client
 
 # Hardcoded speakers for AI Summit NY to skip Linkup scraping
 AI_SUMMIT_NY_SPEAKERS = [
@@ -81,12 +249,29 @@ AI_SUMMIT_NY_SPEAKERS = [
     {"name": "Bhumika Shah", "title": "Data Solution Engineer, PhD Scholar", "company": "University of the Cumberlands"},
 ]
 
-# URL patterns that use hardcoded data
+# URL patterns that use hardcoded data ("host" matches the whole site, "host/path"
+# matches that page and anything below it)
 HARDCODED_EVENT_URLS = {
     "newyork.theaisummit.com": AI_SUMMIT_NY_SPEAKERS,
     "theaisummit.com/conference-speakers": AI_SUMMIT_NY_SPEAKERS,
 }
 
+# Route event URLs to their speaker source: hardcoded lists and preloaded event files
+# first, then saved snapshots (for EVENT_SNAPSHOT_MAX_AGE seconds), then live Linkup extraction
+event_registry = EventSourceRegistry(
+    fallback=LinkupEventSource(get_linkup_client, reserve=EXTRACTION_RESERVE),
+    snapshots=SnapshotEventSource(
+        os.getenv('EVENT_SNAPSHOT_DIR'),
+        max_age=float(os.getenv('EVENT_SNAPSHOT_MAX_AGE', 7 * 86400))
+    ) if os.getenv('EVENT_SNAPSHOT_DIR') else None
+)
+_hardcoded_sources = {}
+for _url_pattern, _speakers in HARDCODED_EVENT_URLS.items():
+    _source = _hardcoded_sources.setdefault(id(_speakers), StaticEventSource(_speakers))
+    event_registry.register(_url_pattern, _source)
+if os.getenv('EVENT_SOURCES_DIR'):
+    print(f"Loaded {event_registry.load_directory(os.getenv('EVENT_SOURCES_DIR'))} event files")
+
 
 def convert_speakers_to_table(speakers: list) -> str:
     """Convert enriched speakers list to markdown table for ICP matching."""
@@ -126,6 +311,729 @@ def convert_speakers_to_table(speakers: list) -> str:
     return "\n".join(lines)
 
 
+class AnalysisError(Exception):
+    """Error raised by the analysis pipeline, carrying the HTTP status to return."""
+
+    def __init__(self, message: str, status_code: int = 500):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def run_analysis(
+    event_url: str,
+    company_url: str,
+    company_name: str,
+    icp_profile: Optional[dict] = None,
+    deadline: Optional[Deadline] = None,
+    top_k: Optional[int] = None,
+    refresh: bool = False
+) -> dict:
+    """
+    Run the 4-step workflow for one event and company.
+
+    Runs are counted in inflight_analyses so graceful shutdown can drain them.
+
+    Args:
+        event_url: URL of the event page.
+        company_url: URL of the user's company website.
+        company_name: Name of the user's company.
+        icp_profile: Stored ICP profile to use instead of researching the company (Step 3).
+        deadline: Time budget shared by every step (default: ANALYSIS_BUDGET from now).
+        top_k: Only return the K best attendees, scoring speakers best-first and
+            stopping once the rest cannot make the top K.
+        refresh: Extract the speakers live even if a snapshot of the event exists.
+
+    Returns:
+        The full analysis results. If steps had to degrade to meet the deadline,
+        metadata.deadline.degraded lists what was skipped.
+
+    Raises:
+        AnalysisError: If a step fails; carries the HTTP status code to return.
+    """
+    with inflight_analyses:
+        return _run_analysis(
+            event_url, company_url, company_name, icp_profile,
+            deadline or Deadline(ANALYSIS_BUDGET), top_k, refresh
+        )
+
+
+def _run_analysis(
+    event_url: str,
+    company_url: str,
+    company_name: str,
+    icp_profile: Optional[dict],
+    deadline: Deadline,
+    top_k: Optional[int] = None,
+    refresh: bool = False
+) -> dict:
+    # Step 1: Extract speakers from event URL
+    with span("step1.extract", **{"event.url": event_url}) as current:
+        source = resolve_event_source(event_url, refresh)
+        current.set_attributes({"event.source": type(source).__name__, "event.live": source.live})
+        try:
+            extraction = source.fetch(event_url, deadline=deadline)
+        except Exception as e:
+            raise extraction_error(e, deadline)
+        speakers, attendee_sources = accept_extraction(event_url, source, extraction, deadline)
+        current.set_attribute("speakers.found", len(speakers))
+
+    # Step 2: Build the attendee table for the matcher
+    with span("step2.prepare", **{"speakers.found": len(speakers), "top_k": top_k}):
+        attendee_data, enriched_attendees = prepare_attendees(event_url, speakers, live=source.live, top_k=top_k)
+
+    # Step 3: Get user company ICP from a stored profile or their website
+    with span("step3.icp", **{"company.url": company_url, "icp.profile": icp_profile and icp_profile["id"]}):
+        user_icp, icp_sources = company_icp(company_url, company_name, icp_profile, deadline)
+
+    # Step 4: Match attendee companies to user's ICP using OpenAI
+    print("Step 4: Matching attendee companies to ICP...")
+    with span("step4.match", **{"icp.available": bool(user_icp), "top_k": top_k}) as current:
+        match_result = match_attendees(user_icp, enriched_attendees, company_name, deadline, top_k)
+        current.set_attribute("attendees.scored", len(match_result.get("attendees") or []))
+
+    return compile_results(
+        event_url, company_url, company_name,
+        attendee_data, attendee_sources, enriched_attendees,
+        user_icp, icp_sources, match_result,
+        icp_profile=icp_profile,
+        deadline=deadline
+    )
+
+
+def extraction_error(error: Exception, deadline: Optional[Deadline] = None) -> AnalysisError:
+    """Step 1: turn an extraction failure into an AnalysisError (504 if it ran out of time)."""
+    print(f"Error extracting speakers: {error}")
+    if deadline is not None and is_timeout(error):
+        return AnalysisError(
+            f"Speaker extraction did not finish within the {deadline.budget:.0f}s analysis deadline. "
+            "Try again - the event may be cached by then.", 504
+        )
+    return AnalysisError(f"Failed to extract speakers from event URL: {str(error)}", 500)
+
+
+def parse_analyze_request(data: dict, require_event_url: bool = True) -> dict:
+    """
+    Validate an /api/analyze body and resolve its ICP profile.
+
+    company_url and company_name default to the profile's when icp_profile_id is
+    given. Without one, a built-in profile matching the company name (e.g. Linkup)
+    is used.
+
+    Returns:
+        Dictionary with event_url, company_url, company_name, icp_profile (or None),
+        top_k (or None) and refresh.
+
+    Raises:
+        AnalysisError: If a required field is missing or the profile does not exist.
+    """
+    if require_event_url and not data.get('event_url'):
+        raise AnalysisError("event_url is required", 400)
+
+    icp_profile = None
+    if data.get('icp_profile_id'):
+        icp_profile = find_icp_profile(data['icp_profile_id'], data.get('icp_profile_version'))
+
+    company_url = data.get('company_url') or (icp_profile or {}).get('company_url')
+    if not company_url:
+        raise AnalysisError("company_url is required", 400)
+
+    try:
+        top_k = parse_top_k(data.get('top_k'))
+    except ValueError as e:
+        raise AnalysisError(str(e), 400)
+
+    company_name = data.get('company_name', icp_profile['company_name'] if icp_profile else 'your company')
+    if icp_profile is None:
+        icp_profile = icp_profiles.find_by_company(company_name)
+
+    return {
+        "event_url": data.get('event_url'),
+        "company_url": company_url,
+        "company_name": company_name,
+        "icp_profile": icp_profile,
+        "top_k": top_k,
+        "refresh": bool(data.get('refresh')),
+    }
+
+
+def find_icp_profile(profile_id: str, version=None) -> dict:
+    """
+    Look up a stored ICP profile.
+
+    Raises:
+        AnalysisError: If the version is invalid or the profile does not exist.
+    """
+    try:
+        version = int(version) if version not in (None, "") else None
+    except (TypeError, ValueError):
+        raise AnalysisError("icp_profile_version must be an integer", 400)
+    icp_profile = icp_profiles.get(profile_id, version)
+    if icp_profile is None:
+        raise AnalysisError(f"ICP profile not found: {profile_id}" + (f" v{version}" if version else ""), 404)
+    return icp_profile
+
+
+def is_degraded(results: dict) -> bool:
+    """Return True if any step degraded to meet the deadline."""
+    return bool(((results.get("metadata") or {}).get("deadline") or {}).get("degraded"))
+
+
+def icp_profile_ref(icp_profile: Optional[dict]) -> Optional[dict]:
+    """Return the id, version and fingerprint identifying a profile (for metadata)."""
+    if icp_profile is None:
+        return None
+    return {key: icp_profile[key] for key in ("id", "version", "fingerprint")}
+
+
+def resolve_event_source(event_url: str, refresh: bool = False):
+    """
+    Step 1: pick the speaker source for an event URL.
+
+    Known events are served from pre-scraped sources to skip the Linkup API call.
+    A refresh skips saved snapshots.
+
+    Raises:
+        AnalysisError: If no source is available.
+    """
+    source = event_registry.resolve(event_url, refresh)
+    if source is None:
+        raise AnalysisError("No event source available. Please check your API keys in .env file.", 500)
+
+    if not source.live:
+        print(f"Step 1: Using {source.name} speakers for {event_url} (skipping Linkup)")
+    else:
+        print(f"Step 1: Extracting speakers from {event_url}...")
+    return source
+
+
+def accept_extraction(event_url: str, source, extraction: dict, deadline: Optional[Deadline] = None) -> tuple:
+    """
+    Step 1: validate an extraction, merge duplicate people and snapshot live results for reuse.
+
+    Only complete extractions are snapshotted: not truncated ones, and none from a
+    request that already degraded to meet its deadline.
+
+    Returns:
+        Tuple of (speakers, sources).
+
+    Raises:
+        AnalysisError: If no speakers were found.
+    """
+    speakers = resolve_people(extraction.get("speakers", []))
+    if len(speakers) < len(extraction.get("speakers", [])):
+        print(f"Merged {len(extraction['speakers']) - len(speakers)} duplicate speaker records")
+    attendee_sources = extraction.get("sources", [])
+    complete = not extraction.get("truncated") and not (deadline is not None and deadline.degradations)
+    if source.live and speakers and event_registry.snapshots is not None:
+        if complete:
+            event_registry.snapshots.save(event_url, speakers, attendee_sources)
+        else:
+            print(f"Not snapshotting the partial extraction of {event_url}")
+
+    if not speakers:
+        raise AnalysisError(
+            "No speakers found on the event page. The page may be private, dynamically loaded, "
+            "or not contain speaker information.", 400
+        )
+    return speakers, attendee_sources
+
+
+def prepare_attendees(event_url: str, speakers: list, live: bool, top_k: Optional[int] = None) -> tuple:
+    """
+    Step 2: cap the speaker count and build the attendee table for the matcher.
+
+    A top_k analysis keeps up to TOP_K_MAX_CANDIDATES speakers, since only the
+    most promising of them are scored.
+
+    Returns:
+        Tuple of (step 1 summary text, markdown attendee table).
+    """
+    # Limit speakers to prevent timeout
+    # Vercel free tier has 10-second timeout, so we need to keep speaker count low
+    # Even Pro tier (300s) can struggle with too many speakers due to OpenAI API latency
+    MAX_SPEAKERS_DYNAMIC = 8  # For dynamically scraped events
+    MAX_SPEAKERS_HARDCODED = 10  # For hardcoded events (reduced for Vercel compatibility)
+    MAX_SPEAKERS = MAX_SPEAKERS_DYNAMIC if live else MAX_SPEAKERS_HARDCODED
+    if top_k:
+        MAX_SPEAKERS = max(TOP_K_MAX_CANDIDATES, top_k)
+
+    total_found = len(speakers)
+    if len(speakers) > MAX_SPEAKERS:
+        print(f"Limiting from {len(speakers)} to {MAX_SPEAKERS} speakers to prevent timeout")
+        speakers = speakers[:MAX_SPEAKERS]
+
+    attendee_data = f"Extracted {total_found} speakers from {event_url}" + (f" (processing top {MAX_SPEAKERS})" if total_found > MAX_SPEAKERS else "")
+    print(f"Found {total_found} speakers, processing {len(speakers)}")
+
+    # Step 2: Enrich each speaker with LinkedIn + company info
+    # Skip enrichment for speed - use bio from structured extraction instead
+    print(f"Step 2: Processing {len(speakers)} speakers...")
+    enriched_speakers = []
+    for i, speaker in enumerate(speakers):
+        speaker_name = speaker.get("name", "Unknown")
+        speaker_company = speaker.get("company", "N/A")
+
+        print(f"  Processing {i+1}/{len(speakers)}: {speaker_name} at {speaker_company}")
+
+        # Use bio from structured extraction instead of making additional API calls
+        # This dramatically speeds up the workflow
+        enriched_speakers.append({
+            **speaker,
+            "enrichment": []  # Skip enrichment API calls for speed
+        })
+
+    # Convert enriched speakers to markdown table for ICP matcher
+    return attendee_data, convert_speakers_to_table(enriched_speakers)
+
+
+def compile_results(
+    event_url: str,
+    company_url: str,
+    company_name: str,
+    attendee_data: str,
+    attendee_sources: list,
+    enriched_attendees: str,
+    user_icp: str,
+    icp_sources: list,
+    match_result: dict,
+    icp_profile: Optional[dict] = None,
+    deadline: Optional[Deadline] = None
+) -> dict:
+    """
+    Assemble the /api/analyze response from the outputs of the four steps.
+
+    Source arrays hold source ids (see render_sources).
+    """
+    return source_store.compact({
+        "metadata": {
+            "event_url": event_url,
+            "company_url": company_url,
+            "company_name": company_name,
+            "icp_profile": icp_profile_ref(icp_profile),
+            "analysis_date": datetime.now().isoformat(),
+            "workflow_version": "v2_4step",
+            "deadline": deadline.report() if deadline is not None else None
+        },
+        "step1_attendees": {
+            "data": attendee_data,
+            "sources": attendee_sources
+        },
+        "step2_enriched": {
+            "data": enriched_attendees,
+            "sources": []
+        },
+        "step3_icp": {
+            "data": user_icp,
+            "sources": icp_sources
+        },
+        "step4_matches": match_result
+    })
+
+
+def render_sources(results: dict, data: Optional[dict]) -> dict:
+    """
+    Prepare results for a response: inline the source records, or keep the ids.
+
+    Clients that send "source_refs": true get source ids and can resolve them
+    with /api/sources.
+    """
+    if str((data or {}).get("source_refs", "")).lower() in ("1", "true", "yes"):
+        return results
+    return source_store.expand(results)
+
+
+# Response views of /api/analyze: which top-level sections each one keeps.
+# "slim" is what the web UI renders; "summary" also drops the per-attendee list.
+RESPONSE_VIEWS = {
+    "full": None,
+    "slim": ("metadata", "step4_matches"),
+    "summary": ("metadata", "step4_matches"),
+}
+
+
+def response_metadata(results: dict, cache_status: str, profiler: Optional[Profiler] = None) -> dict:
+    """Return a result's metadata with the cache status and, for profiled requests, the profile link."""
+    metadata = {**results["metadata"], "cache_status": cache_status}
+    if profiler is not None:
+        metadata["profile"] = profiler.reference(url_prefix="/api/profiles")
+    return metadata
+
+
+def select_fields(results: dict, fields: list) -> dict:
+    """
+    Keep only the given dot paths of results (e.g. "step4_matches.summary").
+
+    Unknown paths are ignored.
+    """
+    selected = {}
+    for path in fields:
+        keys = [key for key in path.strip().split(".") if key]
+        source, target = results, selected
+        for key in keys[:-1]:
+            source = source.get(key) if isinstance(source, dict) else None
+            if not isinstance(source, dict):
+                break
+            target = target.setdefault(key, {})
+        else:
+            if keys and isinstance(source, dict) and keys[-1] in source:
+                target[keys[-1]] = source[keys[-1]]
+    return selected
+
+
+def shape_results(results: dict, data: Optional[dict]) -> dict:
+    """
+    Cut results down to the requested view/fields, then render their sources.
+
+    Request options:
+        view: "full" (default), "slim" (metadata and step4_matches) or "summary"
+            (slim without the per-attendee matches).
+        fields: Comma-separated dot paths to keep, applied after the view.
+
+    Raises:
+        AnalysisError: If the view is unknown.
+    """
+    data = data or {}
+    view = str(data.get("view") or "full").lower()
+    if view not in RESPONSE_VIEWS:
+        raise AnalysisError(f"Unknown view '{view}' (expected one of {', '.join(RESPONSE_VIEWS)})", 400)
+    if RESPONSE_VIEWS[view] is not None:
+        results = {key: results[key] for key in RESPONSE_VIEWS[view] if key in results}
+    if view == "summary" and isinstance(results.get("step4_matches"), dict):
+        matches = results["step4_matches"]
+        results["step4_matches"] = {key: value for key, value in matches.items() if key != "attendees"}
+        # The first page rides along, so attendees are shown even when the client's
+        # page requests reach an instance that does not hold this result
+        results["step4_matches"]["attendees_page"] = first_attendee_page(results.get("metadata") or {}, matches)
+
+    fields = data.get("fields")
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    if fields:
+        results = select_fields(results, fields)
+    return render_sources(results, data)
+
+
+def first_attendee_page(metadata: dict, matches: dict) -> dict:
+    """Return the default first page of /api/results/<id>/attendees for a result."""
+    attendees = matches.get("attendees") or []
+    if metadata.get("result_id"):
+        index = attendee_indexes.put(metadata["result_id"], attendees, metadata.get("analysis_date"))
+    else:
+        index = AttendeeIndex(attendees)
+    return index.query()
+
+
+def index_results(result_id: str, results: dict) -> dict:
+    """
+    Index a result's scored attendees for paging and tag it with its result id.
+
+    Degraded results are not kept in the result cache, so their attendees are
+    stored in the shared cache for DEGRADED_RESULT_TTL seconds instead, letting
+    the client page through what it was shown from any worker.
+    """
+    metadata = results.get("metadata") or {}
+    attendees = (results.get("step4_matches") or {}).get("attendees") or []
+    attendee_indexes.put(result_id, attendees, metadata.get("analysis_date"))
+    if degraded_results is not None and is_degraded(results):
+        try:
+            degraded_results.set(result_id, {
+                "metadata": {"analysis_date": metadata.get("analysis_date")},
+                "step4_matches": {"attendees": attendees}
+            })
+        except Exception as e:
+            print(f"Shared degraded result write failed: {e}")
+    return {**results, "metadata": {**metadata, "result_id": result_id}}
+
+
+def load_pageable_result(result_id: str) -> Optional[dict]:
+    """Return a result whose attendees can be paged: cached, or recently degraded."""
+    results = result_cache.peek(result_id)
+    if results is not None or degraded_results is None:
+        return results
+    try:
+        entry = degraded_results.get(result_id, max_age=DEGRADED_RESULT_TTL)
+    except Exception as e:
+        print(f"Shared degraded result read failed: {e}")
+        return None
+    return entry[1] if entry is not None else None
+
+
+def prepare_profiler(flag: Optional[str], token: Optional[str], label: str = "analyze") -> Optional[Profiler]:
+    """
+    Build (without starting) a profiler if a request asked for one (see profiling.py).
+
+    Args:
+        flag: X-Profile header or profile query parameter.
+        token: X-Admin-Token header.
+        label: Prefix of the profile file name.
+
+    Raises:
+        AnalysisError: 403 without a valid admin token, 400 for an unknown or
+            unavailable profiler.
+    """
+    try:
+        engine = requested_engine(flag, token)
+        return Profiler(engine, label) if engine else None
+    except ProfilingDenied as e:
+        raise AnalysisError(str(e), 403)
+    except (ValueError, ImportError) as e:
+        raise AnalysisError(str(e), 400)
+
+
+def start_profiler(flag: Optional[str], token: Optional[str], label: str = "analyze") -> Optional[Profiler]:
+    """Start a profiler if a request asked for one (see prepare_profiler)."""
+    profiler = prepare_profiler(flag, token, label)
+    return profiler.start() if profiler is not None else None
+
+
+def profiled(label: str):
+    """Profile a route when the request asks for it; the running Profiler is g.profiler."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                profiler = start_profiler(
+                    request.headers.get('X-Profile') or request.args.get('profile'),
+                    request.headers.get('X-Admin-Token'),
+                    label
+                )
+            except AnalysisError as e:
+                return jsonify({"error": e.message}), e.status_code
+            g.profiler = profiler
+            try:
+                # The profile covers the view and the serialization of its response
+                return view(*args, **kwargs)
+            finally:
+                if profiler is not None:
+                    profiler.stop()
+        return wrapper
+    return decorator
+
+
+def company_icp(
+    company_url: str,
+    company_name: str,
+    icp_profile: Optional[dict] = None,
+    deadline: Optional[Deadline] = None
+) -> tuple:
+    """
+    Step 3: return the ICP from a stored profile, or research it from the website.
+
+    Returns:
+        Tuple of (ICP text, sources).
+    """
+    if icp_profile is not None:
+        print(f"Step 3: Using ICP profile '{icp_profile['id']}' v{icp_profile['version']} (skipping Linkup)")
+        return icp_profile["icp"], icp_profile.get("sources", [])
+    return analyze_company_icp(company_url, company_name, deadline)
+
+
+def analyze_company_icp(company_url: str, company_name: str, deadline: Optional[Deadline] = None) -> tuple:
+    """
+    Step 3: get the user company's ICP from its website.
+
+    With a deadline, the search keeps MATCH_RESERVE seconds for Step 4. If it runs
+    out of time the ICP is left empty and Step 4 falls back to heuristic scores.
+
+    Returns:
+        Tuple of (ICP text, sources).
+
+    Raises:
+        AnalysisError: If the ICP could not be analyzed.
+    """
+    print(f"Step 3: Analyzing ICP for {company_name} from {company_url}...")
+    try:
+        icp_response = linkup_client.get_company_icp_from_url(
+            company_url=company_url,
+            company_name=company_name,
+            timeout=deadline.timeout(reserve=MATCH_RESERVE) if deadline is not None else None
+        )
+    except Exception as e:
+        return icp_failure(e, deadline)
+    return check_icp_response(icp_response)
+
+
+def icp_failure(error: Exception, deadline: Optional[Deadline] = None) -> tuple:
+    """
+    Step 3: degrade to an empty ICP on a deadline timeout.
+
+    Raises:
+        AnalysisError: For any other failure.
+    """
+    if deadline is not None and is_timeout(error):
+        deadline.degrade("company ICP research did not finish in time")
+        return "", []
+    raise AnalysisError(f"Failed to analyze company ICP: {str(error)}", 500)
+
+
+def check_icp_response(icp_response: dict) -> tuple:
+    """
+    Step 3: read the ICP text and sources from a Linkup answer.
+
+    Raises:
+        AnalysisError: If the answer is empty.
+    """
+    user_icp = icp_response.get("answer", "")
+    if not user_icp:
+        raise AnalysisError(
+            "Could not analyze ICP from company URL. Please verify the URL is correct.", 400
+        )
+    return user_icp, icp_response.get("sources", [])
+
+
+def match_attendees(
+    user_icp: str,
+    enriched_attendees: str,
+    company_name: str,
+    deadline: Optional[Deadline] = None,
+    top_k: Optional[int] = None
+) -> dict:
+    """
+    Step 4: match an attendee table against the user's ICP.
+
+    Without an ICP (Step 3 ran out of time) attendees get heuristic scores. With
+    top_k only the K best attendees are scored and returned.
+
+    Raises:
+        AnalysisError: If matching failed.
+    """
+    if not user_icp and deadline is not None:
+        return heuristic_top_k(ICPMatcher.heuristic_match(user_icp, enriched_attendees), top_k)
+    try:
+        if top_k:
+            match_result = icp_matcher.match_top_k(
+                user_icp=user_icp,
+                enriched_attendees=enriched_attendees,
+                company_name=company_name,
+                k=top_k,
+                deadline=deadline
+            )
+        else:
+            match_result = icp_matcher.match_companies_to_icp(
+                user_icp=user_icp,
+                enriched_attendees=enriched_attendees,
+                company_name=company_name,
+                deadline=deadline
+            )
+    except Exception as e:
+        raise AnalysisError(f"Failed to match companies to ICP: {str(e)}", 500)
+    return check_match_result(match_result)
+
+
+def heuristic_top_k(match_result: dict, top_k: Optional[int]) -> dict:
+    """Cut a heuristic match result down to its top_k attendees (all if top_k is None)."""
+    if not top_k:
+        return match_result
+    attendees = top_attendees(match_result["attendees"], top_k)
+    return {
+        **match_result,
+        "summary": ICPMatcher.summarize_matches(attendees),
+        "attendees": attendees,
+        "heuristic_attendees": [attendee["name"] for attendee in attendees]
+    }
+
+
+def check_match_result(match_result: dict) -> dict:
+    """
+    Step 4: reject a match result that carries an error.
+
+    Raises:
+        AnalysisError: If matching failed.
+    """
+    if "error" in match_result:
+        raise AnalysisError(f"ICP matching failed: {match_result['error']}", 500)
+    return match_result
+
+
+def run_import_analysis(
+    attendees,
+    company_url: str,
+    company_name: str,
+    source_name: str,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    icp_profile: Optional[dict] = None,
+    deadline: Optional[Deadline] = None
+) -> dict:
+    """
+    Run Steps 2-4 over a pre-scraped attendee stream, skipping Linkup extraction.
+
+    Attendees are consumed lazily in chunks of chunk_size, so only one chunk of
+    input is held in memory at a time.
+
+    Args:
+        attendees: Iterable of attendee dicts (e.g. from attendee_import.iter_attendees).
+        company_url: URL of the user's company website.
+        company_name: Name of the user's company.
+        source_name: Name of the imported file (for metadata).
+        chunk_size: Attendees matched per model call.
+        icp_profile: Stored ICP profile to use instead of researching the company.
+        deadline: Time budget (default: ANALYSIS_BUDGET from now). Chunks that cannot
+            be matched in time get heuristic scores.
+
+    Returns:
+        Results in the same shape as run_analysis.
+    """
+    deadline = deadline or Deadline(ANALYSIS_BUDGET)
+    user_icp, icp_sources = company_icp(company_url, company_name, icp_profile, deadline)
+
+    scored = []
+    assessment = None
+    imported = 0
+    chunks = 0
+    # Duplicate people in the export are dropped before they reach the matcher
+    resolver = EntityResolver()
+    for chunk in chunked(unique_people(attendees, resolver), chunk_size):
+        imported += len(chunk)
+        chunks += 1
+        print(f"Step 4: Matching import chunk {chunks} ({imported} attendees so far)...")
+        enriched_attendees = convert_speakers_to_table(
+            [{**attendee, "enrichment": []} for attendee in chunk]
+        )
+        chunk_result = match_attendees(user_icp, enriched_attendees, company_name, deadline)
+        scored.extend(chunk_result.get("attendees", []))
+        assessment = assessment or chunk_result.get("overall_event_assessment")
+
+    if resolver.duplicates:
+        print(f"Skipped {resolver.duplicates} duplicate attendees")
+    if not imported:
+        raise AnalysisError(
+            "No attendees found in the uploaded file. Check the name/title/company columns.", 400
+        )
+
+    return source_store.compact({
+        "metadata": {
+            "event_url": None,
+            "attendee_file": source_name,
+            "company_url": company_url,
+            "company_name": company_name,
+            "icp_profile": icp_profile_ref(icp_profile),
+            "analysis_date": datetime.now().isoformat(),
+            "workflow_version": "v2_4step_import",
+            "deadline": deadline.report()
+        },
+        "step1_attendees": {
+            "data": f"Imported {imported} attendees from {source_name}" + (
+                f" ({resolver.duplicates} duplicates skipped)" if resolver.duplicates else ""
+            ),
+            "sources": []
+        },
+        "step2_enriched": {
+            "data": f"Matched {imported} attendees in {chunks} chunks of up to {chunk_size}",
+            "sources": []
+        },
+        "step3_icp": {
+            "data": user_icp,
+            "sources": icp_sources
+        },
+        "step4_matches": {
+            "summary": ICPMatcher.summarize_matches(scored),
+            "attendees": scored,
+            "overall_event_assessment": assessment or ""
+        }
+    })
+
+
 @app.route('/')
 def index():
     """Render the main page."""
@@ -133,196 +1041,278 @@ def index():
 
 
 @app.route('/api/analyze', methods=['POST'])
+@profiled("analyze")
+@traced("POST /api/analyze")
 def analyze_event():
     """
     API endpoint to analyze an event using the new 4-step workflow.
 
+    Identical requests are served from the result cache; concurrent identical
+    requests share a single pipeline run.
+
     Expected JSON body:
     {
         "event_url": "https://...",  (required)
-        "company_url": "https://...",  (required)
-        "company_name": "Company"  (optional, defaults to "your company")
+        "company_url": "https://...",  (required unless icp_profile_id is given)
+        "company_name": "Company",  (optional, defaults to "your company")
+        "icp_profile_id": "acme",  (optional, use a stored ICP profile and skip Step 3)
+        "icp_profile_version": 2,  (optional, defaults to the latest version)
+        "refresh": false,  (optional, bypass the result cache)
+        "top_k": 20,  (optional, only score and return the 20 best attendees)
+        "source_refs": false,  (optional, return source ids instead of source records)
+        "view": "full",  (optional, "slim" or "summary" for smaller responses; page
+                          through attendees with /api/results/<metadata.result_id>/attendees)
+        "fields": "step4_matches.summary,metadata"  (optional, dot paths to keep)
     }
+
+    JSON responses are gzip/brotli compressed for clients that accept it.
+
+    With "X-Profile: 1" (or sample/cprofile/pyinstrument) and an X-Admin-Token
+    header matching PROFILING_TOKEN, the request skips the result cache and is
+    profiled; metadata.profile links to the profile.
     """
-    if not linkup_client or not icp_matcher:
+    if not init_clients():
         return jsonify({
             "error": "API clients not initialized. Please check your API keys in .env file."
         }), 500
 
     try:
         data = request.get_json()
+        params = parse_analyze_request(data)
+        icp_profile = params["icp_profile"]
 
-        # Validate required fields
-        if not data.get('event_url'):
-            return jsonify({"error": "event_url is required"}), 400
+        cache_key = make_cache_key(
+            params["event_url"], params["company_url"], params["company_name"], PROMPT_VERSIONS,
+            icp_fingerprint=icp_profile["fingerprint"] if icp_profile else None,
+            top_k=params["top_k"]
+        )
+        results, cache_status = result_cache.get_or_compute(
+            cache_key,
+            lambda: run_analysis(**params),
+            # A profile of a cache hit would show nothing, so profiled requests always run
+            force_refresh=bool(data.get('refresh')) or g.profiler is not None
+        )
+        print(f"Result cache: {cache_status}")
+        current_span().set_attributes({"cache.status": cache_status, "analysis.degraded": is_degraded(results)})
 
-        if not data.get('company_url'):
-            return jsonify({"error": "company_url is required"}), 400
+        results = index_results(cache_key, results)
+        results = {**results, "metadata": response_metadata(results, cache_status, g.profiler)}
+        return jsonify(shape_results(results, data)), 200
 
-        event_url = data['event_url']
-        company_url = data['company_url']
-        company_name = data.get('company_name', 'your company')
-
-        # Step 1: Extract speakers from event URL
-        # Check for hardcoded URLs first to skip Linkup API call
-        speakers = None
-        attendee_sources = []
-        use_hardcoded = False
+    except AnalysisError as e:
+        return jsonify({"error": e.message}), e.status_code
+    except Exception as e:
+        print(f"Error in analyze_event: {e}")
+        return jsonify({
+            "error": f"An error occurred: {str(e)}"
+        }), 500
 
-        for url_pattern, hardcoded_speakers in HARDCODED_EVENT_URLS.items():
-            if url_pattern in event_url:
-                print(f"Step 1: Using hardcoded speakers for {url_pattern} (skipping Linkup)")
-                speakers = hardcoded_speakers
-                use_hardcoded = True
-                break
 
-        if not use_hardcoded:
-            # Use Linkup API to extract speakers
-            print(f"Step 1: Extracting speakers from {event_url}...")
-            try:
-                speakers_response = linkup_client.extract_speakers_structured(event_url)
-
-                # Handle structured output response - Linkup returns speakers directly at root level
-                # Try multiple possible response formats
-                if "speakers" in speakers_response:
-                    speakers = speakers_response.get("speakers", [])
-                elif "structuredOutput" in speakers_response:
-                    structured_output = speakers_response.get("structuredOutput", {})
-                    if isinstance(structured_output, str):
-                        import json as json_module
-                        try:
-                            structured_output = json_module.loads(structured_output)
-                        except:
-                            structured_output = {}
-                    speakers = structured_output.get("speakers", [])
-                elif "structured_output" in speakers_response:
-                    structured_output = speakers_response.get("structured_output", {})
-                    if isinstance(structured_output, str):
-                        import json as json_module
-                        try:
-                            structured_output = json_module.loads(structured_output)
-                        except:
-                            structured_output = {}
-                    speakers = structured_output.get("speakers", [])
-                else:
-                    speakers = []
-                attendee_sources = speakers_response.get("sources", [])
-            except Exception as e:
-                print(f"Error extracting speakers: {e}")
-                return jsonify({
-                    "error": f"Failed to extract speakers from event URL: {str(e)}"
-                }), 500
+@app.route('/api/analyze/import', methods=['POST'])
+def analyze_import():
+    """
+    API endpoint to analyze a pre-scraped attendee export, skipping Step 1.
 
-        if not speakers:
-            return jsonify({
-                "error": "No speakers found on the event page. The page may be private, dynamically loaded, or not contain speaker information."
-            }), 400
-
-        # Limit speakers to prevent timeout
-        # Vercel free tier has 10-second timeout, so we need to keep speaker count low
-        # Even Pro tier (300s) can struggle with too many speakers due to OpenAI API latency
-        MAX_SPEAKERS_DYNAMIC = 8  # For dynamically scraped events
-        MAX_SPEAKERS_HARDCODED = 10  # For hardcoded events (reduced for Vercel compatibility)
-        MAX_SPEAKERS = MAX_SPEAKERS_HARDCODED if use_hardcoded else MAX_SPEAKERS_DYNAMIC
-
-        total_found = len(speakers)
-        if len(speakers) > MAX_SPEAKERS:
-            print(f"Limiting from {len(speakers)} to {MAX_SPEAKERS} speakers to prevent timeout")
-            speakers = speakers[:MAX_SPEAKERS]
-
-        attendee_data = f"Extracted {total_found} speakers from {event_url}" + (f" (processing top {MAX_SPEAKERS})" if total_found > MAX_SPEAKERS else "")
-        print(f"Found {total_found} speakers, processing {len(speakers)}")
-
-        # Step 2: Enrich each speaker with LinkedIn + company info
-        # Skip enrichment for speed - use bio from structured extraction instead
-        print(f"Step 2: Processing {len(speakers)} speakers...")
-        enriched_speakers = []
-        for i, speaker in enumerate(speakers):
-            speaker_name = speaker.get("name", "Unknown")
-            speaker_title = speaker.get("title", "N/A")
-            speaker_company = speaker.get("company", "N/A")
-
-            print(f"  Processing {i+1}/{len(speakers)}: {speaker_name} at {speaker_company}")
-
-            # Use bio from structured extraction instead of making additional API calls
-            # This dramatically speeds up the workflow
-            enriched_speakers.append({
-                **speaker,
-                "enrichment": []  # Skip enrichment API calls for speed
-            })
+    Expected multipart/form-data:
+        attendees_file: CSV or JSONL export (Luma, Eventbrite, ...)  (required)
+        company_url: "https://..."  (required unless icp_profile_id is given)
+        company_name: "Company"  (optional, defaults to "your company")
+        icp_profile_id: "acme"  (optional, use a stored ICP profile and skip Step 3)
+        source_refs: "true"  (optional, return source ids instead of source records)
+        view / fields  (optional, as for /api/analyze)
+    """
+    if not init_clients():
+        return jsonify({
+            "error": "API clients not initialized. Please check your API keys in .env file."
+        }), 500
 
-        # Convert enriched speakers to markdown table for ICP matcher
-        enriched_attendees = convert_speakers_to_table(enriched_speakers)
-        enrichment_sources = []
+    attendees_file = request.files.get('attendees_file')
+    if attendees_file is None or not attendees_file.filename:
+        return jsonify({"error": "attendees_file is required"}), 400
 
-        # Step 3: Get user company ICP from their website
-        print(f"Step 3: Analyzing ICP for {company_name} from {company_url}...")
-        try:
-            icp_response = linkup_client.get_company_icp_from_url(
-                company_url=company_url,
-                company_name=company_name
+    try:
+        form = {key: value for key, value in request.form.items() if value}
+        params = parse_analyze_request(form, require_event_url=False)
+        with inflight_analyses:
+            results = run_import_analysis(
+                iter_attendees(attendees_file),
+                company_url=params["company_url"],
+                company_name=params["company_name"],
+                source_name=attendees_file.filename,
+                icp_profile=params["icp_profile"]
             )
-            user_icp = icp_response.get("answer", "")
-            icp_sources = icp_response.get("sources", [])
+        return jsonify(shape_results(results, form)), 200
 
-            if not user_icp:
-                return jsonify({
-                    "error": "Could not analyze ICP from company URL. Please verify the URL is correct."
-                }), 400
-        except Exception as e:
-            return jsonify({
-                "error": f"Failed to analyze company ICP: {str(e)}"
-            }), 500
+    except AnalysisError as e:
+        return jsonify({"error": e.message}), e.status_code
+    except Exception as e:
+        print(f"Error in analyze_import: {e}")
+        return jsonify({
+            "error": f"An error occurred: {str(e)}"
+        }), 500
 
-        # Step 4: Match attendee companies to user's ICP using OpenAI
-        print("Step 4: Matching attendee companies to ICP...")
-        try:
-            match_result = icp_matcher.match_companies_to_icp(
-                user_icp=user_icp,
-                enriched_attendees=enriched_attendees,
-                company_name=company_name
-            )
 
-            if "error" in match_result:
+@app.route('/api/icp-profiles', methods=['GET'])
+def list_icp_profiles():
+    """List stored ICP profiles (latest version of each, without the ICP text)."""
+    return jsonify({"profiles": icp_profiles.list()}), 200
+
+
+@app.route('/api/icp-profiles/<profile_id>', methods=['GET'])
+def get_icp_profile(profile_id):
+    """Return an ICP profile (?version=N for an older version) and its version history."""
+    try:
+        icp_profile = find_icp_profile(profile_id, request.args.get('version'))
+    except AnalysisError as e:
+        return jsonify({"error": e.message}), e.status_code
+    return jsonify({**icp_profile, "history": icp_profiles.history(profile_id)}), 200
+
+
+@app.route('/api/icp-profiles', methods=['POST'])
+def create_icp_profile():
+    """
+    Create an ICP profile.
+
+    Expected JSON body:
+    {
+        "name": "Acme",  (required)
+        "company_url": "https://...",  (required unless icp is given)
+        "company_name": "Acme",  (optional, defaults to name)
+        "icp": "..."  (optional, researched from company_url with Linkup if omitted)
+    }
+    """
+    data = request.get_json() or {}
+    if not data.get('name'):
+        return jsonify({"error": "name is required"}), 400
+    return _save_icp_profile(data, status_code=201)
+
+
+@app.route('/api/icp-profiles/<profile_id>', methods=['PUT'])
+def update_icp_profile(profile_id):
+    """
+    Add a new version to an ICP profile.
+
+    Expected JSON body: {"icp": "..."} to edit the text, or {"regenerate": true}
+    to research it again from the profile's company_url.
+    """
+    data = request.get_json() or {}
+    try:
+        current = find_icp_profile(profile_id)
+    except AnalysisError as e:
+        return jsonify({"error": e.message}), e.status_code
+    if not data.get('icp') and not data.get('regenerate'):
+        return jsonify({"error": "icp or regenerate is required"}), 400
+    return _save_icp_profile({
+        "name": current["name"],
+        "company_url": current["company_url"],
+        "company_name": current["company_name"],
+        **data
+    }, profile_id=profile_id)
+
+
+@app.route('/api/icp-profiles/<profile_id>', methods=['DELETE'])
+def delete_icp_profile(profile_id):
+    """Delete a stored ICP profile (built-in profiles revert to their original text)."""
+    try:
+        if not icp_profiles.delete(profile_id):
+            return jsonify({"error": f"ICP profile not found or built-in: {profile_id}"}), 404
+    except OSError as e:
+        return jsonify({"error": f"Could not update the ICP profile store: {str(e)}"}), 500
+    return jsonify({"deleted": profile_id}), 200
+
+
+def _save_icp_profile(data: dict, profile_id: Optional[str] = None, status_code: int = 200):
+    """Save an ICP profile version from a request body, researching the ICP if needed."""
+    company_name = data.get('company_name') or data['name']
+    icp = data.get('icp')
+    sources = data.get('sources', [])
+    source = "manual"
+    try:
+        if not icp:
+            if not data.get('company_url'):
+                return jsonify({"error": "company_url is required to generate an ICP"}), 400
+            if not init_clients():
                 return jsonify({
-                    "error": f"ICP matching failed: {match_result['error']}"
+                    "error": "API clients not initialized. Please check your API keys in .env file."
                 }), 500
-        except Exception as e:
-            return jsonify({
-                "error": f"Failed to match companies to ICP: {str(e)}"
-            }), 500
-
-        # Compile results
-        results = {
-            "metadata": {
-                "event_url": event_url,
-                "company_url": company_url,
-                "company_name": company_name,
-                "analysis_date": datetime.now().isoformat(),
-                "workflow_version": "v2_4step"
-            },
-            "step1_attendees": {
-                "data": attendee_data,
-                "sources": attendee_sources
-            },
-            "step2_enriched": {
-                "data": enriched_attendees,
-                "sources": enrichment_sources
-            },
-            "step3_icp": {
-                "data": user_icp,
-                "sources": icp_sources
-            },
-            "step4_matches": match_result
-        }
+            icp, sources = analyze_company_icp(data['company_url'], company_name)
+            source = "linkup"
 
-        return jsonify(results), 200
+        icp_profile = icp_profiles.save(
+            name=data['name'],
+            icp=icp,
+            company_name=company_name,
+            company_url=data.get('company_url'),
+            sources=sources,
+            source=source,
+            profile_id=profile_id
+        )
+        return jsonify(icp_profile), status_code
 
-    except Exception as e:
-        print(f"Error in analyze_event: {e}")
-        return jsonify({
-            "error": f"An error occurred: {str(e)}"
-        }), 500
+    except AnalysisError as e:
+        return jsonify({"error": e.message}), e.status_code
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except OSError as e:
+        return jsonify({"error": f"Could not save the ICP profile: {str(e)}"}), 500
+
+
+@app.route('/api/results/<result_id>/attendees', methods=['GET'])
+def get_result_attendees(result_id):
+    """
+    Page, sort and filter the scored attendees of an /api/analyze result.
+
+    Query parameters:
+        offset, limit: Page position and size (default 0 and 25, at most 100).
+        top: Shortcut for offset=0&limit=top.
+        sort: score (average of both scores, default), icp_match_score,
+            business_value_score, name or company.
+        order: desc (default) or asc.
+        opportunity_type: Comma-separated opportunity types to include.
+        min_score: Minimum average score.
+        q: Text to find in name, role or company.
+    """
+    index = attendee_indexes.get(result_id, lambda: load_pageable_result(result_id))
+    if index is None:
+        return jsonify({"error": "Result not found or expired. Run the analysis again."}), 404
+
+    args = request.args
+    try:
+        top = args.get('top', type=int)
+        page = index.query(
+            offset=0 if top is not None else args.get('offset', 0, type=int),
+            limit=top if top is not None else args.get('limit', DEFAULT_PAGE_SIZE, type=int),
+            sort=args.get('sort', 'score'),
+            order=args.get('order', 'desc'),
+            opportunity_types=[value for value in args.get('opportunity_type', '').split(',') if value.strip()],
+            min_score=args.get('min_score', type=float),
+            search=args.get('q')
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"result_id": result_id, **page}), 200
+
+
+@app.route('/api/profiles/<name>', methods=['GET'])
+def get_profile(name):
+    """Download a profile written by a profiled request (requires X-Admin-Token)."""
+    if not authorized(request.headers.get('X-Admin-Token')):
+        return jsonify({"error": "Downloading profiles requires a valid X-Admin-Token"}), 403
+    return send_from_directory(os.path.abspath(profile_dir()), name, as_attachment=True)
+
+
+@app.route('/api/sources', methods=['GET'])
+def get_sources():
+    """
+    Resolve source ids (from responses requested with source_refs).
+
+    Query parameters:
+        ids: Comma-separated source ids.
+    """
+    ids = [sid.strip() for sid in request.args.get('ids', '').split(',') if sid.strip()]
+    if not ids:
+        return jsonify({"error": "ids is required"}), 400
+    return jsonify({"sources": source_store.get_many(ids)}), 200
 
 
 @app.route('/api/health', methods=['GET'])
@@ -330,8 +1320,16 @@ def health_check():
     """Health check endpoint."""
     return jsonify({
         "status": "healthy",
-        "linkup_configured": linkup_client is not None,
-        "openai_configured": icp_matcher is not None
+        # Reported from the environment so health checks never construct the clients
+        "linkup_configured": linkup_client is not None or bool(os.getenv("LINKUP_API_KEY", "").strip()),
+        "openai_configured": icp_matcher is not None or bool(os.getenv("OPENAI_API_KEY")),
+        "result_cache": result_cache.stats(),
+        "person_scores": person_score_cache.stats(),
+        "sources": source_store.stats(),
+        "linkup_requests": LinkupClient.coalescing_stats(),
+        "linkup_depth": linkup_depth_policy.stats(),
+        "in_flight_analyses": inflight_analyses.count,
+        "pid": os.getpid()
     }), 200
 
 
@@ -344,6 +1342,8 @@ def send_static(path):
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5001))
     debug = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
+    if 'RESULT_CACHE_BACKGROUND_REFRESH' not in os.environ:
+        result_cache.background_refresh = True
 
     print("\n" + "="*70)
     print("Event ICP Matcher - Web Interface")
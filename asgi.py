@@ -0,0 +1,361 @@
+"""
+Async-native entry point for the Event ICP Matcher web app.
+
+POST /api/analyze runs the same 4-step pipeline as app.py, but on asyncio with
+async Linkup (httpx) and OpenAI clients, so a single worker thread can drive
+hundreds of concurrent analyses while they wait on the APIs. Every other route
+(the page, static files, /api/health, /api/analyze/import) is served by the
+Flask app through asgiref's WSGI adapter.
+
+Usage:
+    uvicorn asgi:application --port 5001
+    python serve.py --asgi
+"""
+import asyncio
+import json
+import os
+from typing import Optional
+from urllib.parse import parse_qs
+
+import app as web_app
+from compression import compress_body
+from deadline import Deadline
+from event_sources import LinkupEventSource, parse_attendee_table, parse_structured_speakers
+from icp_matcher_openai import AsyncICPMatcher
+from linkup_client import AsyncLinkupClient
+from result_cache import make_cache_key
+from shared_cache import open_shared_cache
+from tracing import current_span, propagate, span
+
+# Async clients are bound to the server's event loop and built on first use
+linkup_client: Optional[AsyncLinkupClient] = None
+icp_matcher: Optional[AsyncICPMatcher] = None
+
+_flask_app = None
+
+# uvicorn keeps the process (and its event loop) running after each response, so
+# stale results can be refreshed in the background unless configured otherwise
+if 'RESULT_CACHE_BACKGROUND_REFRESH' not in os.environ:
+    web_app.result_cache.background_refresh = True
+
+
+def init_clients() -> bool:
+    """
+    Construct the async API clients on first use.
+
+    Returns:
+        True if both clients are available, False if they could not be initialized.
+    """
+    global linkup_client, icp_matcher
+    try:
+        if linkup_client is None:
+            linkup_client = AsyncLinkupClient(
+                response_cache=open_shared_cache("linkup", max_age=web_app.LINKUP_CACHE_TTL),
+                response_cache_ttl=web_app.LINKUP_CACHE_TTL,
+                depth_policy=web_app.linkup_depth_policy
+            )
+        if icp_matcher is None:
+            icp_matcher = AsyncICPMatcher(score_cache=web_app.person_score_cache)
+    except Exception as e:
+        print(f"Warning: Could not initialize async clients: {e}")
+        print("Make sure API keys are set in .env file")
+        return False
+    return True
+
+
+async def run_analysis(
+    event_url: str,
+    company_url: str,
+    company_name: str,
+    icp_profile: Optional[dict] = None,
+    deadline: Optional[Deadline] = None,
+    top_k: Optional[int] = None,
+    refresh: bool = False
+) -> dict:
+    """
+    Run the 4-step workflow for one event and company without blocking a thread.
+
+    The company ICP (Step 3) does not depend on the speakers, so it is requested
+    while Step 1 runs (or read from icp_profile). Both share one deadline
+    (default: app.ANALYSIS_BUDGET). The response has the same shape as
+    app.run_analysis.
+
+    Raises:
+        AnalysisError: If a step fails; carries the HTTP status code to return.
+    """
+    deadline = deadline or Deadline(web_app.ANALYSIS_BUDGET)
+    with web_app.inflight_analyses:
+        icp_task = asyncio.ensure_future(company_icp(company_url, company_name, icp_profile, deadline))
+        try:
+            with span("step1.extract", **{"event.url": event_url}) as current:
+                source = web_app.resolve_event_source(event_url, refresh)
+                current.set_attributes({"event.source": type(source).__name__, "event.live": source.live})
+                try:
+                    extraction = await fetch_speakers(source, event_url, deadline)
+                except Exception as e:
+                    raise web_app.extraction_error(e, deadline)
+                # Resolving people and writing the snapshot file both block
+                speakers, attendee_sources = await asyncio.to_thread(
+                    propagate(web_app.accept_extraction), event_url, source, extraction, deadline
+                )
+                current.set_attribute("speakers.found", len(speakers))
+            with span("step2.prepare", **{"speakers.found": len(speakers), "top_k": top_k}):
+                attendee_data, enriched_attendees = web_app.prepare_attendees(
+                    event_url, speakers, live=source.live, top_k=top_k
+                )
+            user_icp, icp_sources = await icp_task
+        finally:
+            icp_task.cancel()
+
+        print("Step 4: Matching attendee companies to ICP...")
+        with span("step4.match", **{"icp.available": bool(user_icp), "top_k": top_k}) as current:
+            match_result = await match_attendees(user_icp, enriched_attendees, company_name, deadline, top_k)
+            current.set_attribute("attendees.scored", len(match_result.get("attendees") or []))
+
+        # Compacting sources may write to the shared SQLite store, so keep it off the event loop
+        return await asyncio.to_thread(
+            propagate(web_app.compile_results),
+            event_url, company_url, company_name,
+            attendee_data, attendee_sources, enriched_attendees,
+            user_icp, icp_sources, match_result,
+            icp_profile=icp_profile,
+            deadline=deadline
+        )
+
+
+async def fetch_speakers(source, event_url: str, deadline: Optional[Deadline] = None) -> dict:
+    """Step 1: fetch speakers, using the async client for live Linkup extraction."""
+    if isinstance(source, LinkupEventSource):
+        response = await linkup_client.aextract_speakers_sharded(
+            event_url, **source.request_options(deadline)
+        )
+        speakers = parse_structured_speakers(response)
+        if speakers or (deadline is not None and deadline.remaining() <= source.reserve):
+            return {"speakers": speakers, "sources": response.get("sources", [])}
+        print("Structured extraction found no speakers, trying the markdown table extraction")
+        response = await linkup_client.aextract_attendees_from_url(
+            event_url, **source.request_options(deadline)
+        )
+        return {
+            "speakers": parse_attendee_table(response),
+            "sources": response.get("sources", [])
+        }
+    # Pre-scraped sources read local files; keep that off the event loop
+    return await asyncio.to_thread(propagate(source.fetch), event_url, deadline)
+
+
+async def company_icp(
+    company_url: str,
+    company_name: str,
+    icp_profile: Optional[dict] = None,
+    deadline: Optional[Deadline] = None
+) -> tuple:
+    """Step 3: async version of app.company_icp (runs as its own task, alongside Step 1)."""
+    with span("step3.icp", **{"company.url": company_url, "icp.profile": icp_profile and icp_profile["id"]}):
+        if icp_profile is not None:
+            return web_app.company_icp(company_url, company_name, icp_profile)
+        print(f"Step 3: Analyzing ICP for {company_name} from {company_url}...")
+        try:
+            icp_response = await linkup_client.aget_company_icp_from_url(
+                company_url=company_url,
+                company_name=company_name,
+                timeout=deadline.timeout(reserve=web_app.MATCH_RESERVE) if deadline is not None else None
+            )
+        except Exception as e:
+            return web_app.icp_failure(e, deadline)
+        return web_app.check_icp_response(icp_response)
+
+
+async def match_attendees(
+    user_icp: str,
+    enriched_attendees: str,
+    company_name: str,
+    deadline: Optional[Deadline] = None,
+    top_k: Optional[int] = None
+) -> dict:
+    """Step 4: async version of app.match_attendees."""
+    if not user_icp and deadline is not None:
+        return web_app.heuristic_top_k(AsyncICPMatcher.heuristic_match(user_icp, enriched_attendees), top_k)
+    try:
+        if top_k:
+            match_result = await icp_matcher.amatch_top_k(
+                user_icp=user_icp,
+                enriched_attendees=enriched_attendees,
+                company_name=company_name,
+                k=top_k,
+                deadline=deadline
+            )
+        else:
+            match_result = await icp_matcher.amatch_companies_to_icp(
+                user_icp=user_icp,
+                enriched_attendees=enriched_attendees,
+                company_name=company_name,
+                deadline=deadline
+            )
+    except Exception as e:
+        raise web_app.AnalysisError(f"Failed to match companies to ICP: {str(e)}", 500)
+    return web_app.check_match_result(match_result)
+
+
+async def analyze_event(data: dict, profiler=None) -> tuple:
+    """
+    Handle POST /api/analyze: same body, caching and responses as app.analyze_event.
+
+    A profiled request (profiler given) skips the result cache.
+
+    Returns:
+        Tuple of (response body, HTTP status).
+    """
+    if not init_clients():
+        return {"error": "API clients not initialized. Please check your API keys in .env file."}, 500
+
+    try:
+        params = web_app.parse_analyze_request(data)
+        icp_profile = params["icp_profile"]
+
+        cache_key = make_cache_key(
+            params["event_url"], params["company_url"], params["company_name"], web_app.PROMPT_VERSIONS,
+            icp_fingerprint=icp_profile["fingerprint"] if icp_profile else None,
+            top_k=params["top_k"]
+        )
+        results, cache_status = await web_app.result_cache.aget_or_compute(
+            cache_key,
+            lambda: run_analysis(**params),
+            force_refresh=bool(data.get('refresh')) or profiler is not None
+        )
+        print(f"Result cache: {cache_status}")
+        current_span().set_attributes({"cache.status": cache_status, "analysis.degraded": web_app.is_degraded(results)})
+
+        # A degraded result is written to the shared store, so keep it off the event loop
+        results = await asyncio.to_thread(propagate(web_app.index_results), cache_key, results)
+        results = {**results, "metadata": web_app.response_metadata(results, cache_status, profiler)}
+        # Expanding ids may read the shared SQLite store, so keep it off the event loop
+        return await asyncio.to_thread(propagate(web_app.shape_results), results, data), 200
+
+    except web_app.AnalysisError as e:
+        return {"error": e.message}, e.status_code
+    except Exception as e:
+        print(f"Error in analyze_event: {e}")
+        return {"error": f"An error occurred: {str(e)}"}, 500
+
+
+async def _read_body(receive) -> bytes:
+    body = b""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    return body
+
+
+def _header(scope, name: bytes) -> str:
+    """Return a request header from an ASGI scope ("" if absent)."""
+    for key, value in scope.get("headers", []):
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return ""
+
+
+def _query_param(scope, name: str) -> Optional[str]:
+    """Return a query string parameter from an ASGI scope (None if absent)."""
+    values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get(name)
+    return values[0] if values else None
+
+
+async def _send_json(send, payload: dict, status: int, scope=None):
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    body, encoding = compress_body(body, _header(scope or {}, b"accept-encoding"))
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode("ascii")),
+        (b"vary", b"Accept-Encoding"),
+        # Same CORS policy as flask_cors on the WSGI app
+        (b"access-control-allow-origin", b"*"),
+    ]
+    if encoding is not None:
+        headers.append((b"content-encoding", encoding.encode("ascii")))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            # Let running analyses (and background cache refreshes) finish first
+            timeout = float(os.getenv("GRACEFUL_TIMEOUT", 330))
+            await asyncio.to_thread(web_app.inflight_analyses.drain, timeout)
+            if linkup_client is not None:
+                await linkup_client.aclose()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+def _wsgi_fallback():
+    """Return the Flask app wrapped as ASGI (None if asgiref is not installed)."""
+    global _flask_app
+    if _flask_app is None:
+        try:
+            from asgiref.wsgi import WsgiToAsgi
+        except ImportError:
+            return None
+        _flask_app = WsgiToAsgi(web_app.app)
+    return _flask_app
+
+
+async def application(scope, receive, send):
+    """ASGI application: async /api/analyze, everything else delegated to Flask."""
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+
+    if scope["type"] == "http" and scope["path"] == "/api/analyze" and scope["method"] == "POST":
+        try:
+            data = json.loads(await _read_body(receive) or b"null")
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            await _send_json(send, {"error": "Request body must be a JSON object"}, 400, scope)
+            return
+        try:
+            # Checking the engine's import happens off the loop; the profile itself is
+            # started and stopped on the loop's thread, which cProfile and pyinstrument
+            # profile, and only writing the file runs on a worker thread
+            profiler = await asyncio.to_thread(
+                web_app.prepare_profiler,
+                _header(scope, b"x-profile") or _query_param(scope, "profile"),
+                _header(scope, b"x-admin-token")
+            )
+        except web_app.AnalysisError as e:
+            await _send_json(send, {"error": e.message}, e.status_code, scope)
+            return
+        if profiler is not None and web_app.inflight_analyses.count:
+            # Analyses share the event loop thread, so a profile would include theirs
+            await _send_json(send, {
+                "error": "Profiling under ASGI needs an idle worker; "
+                         f"{web_app.inflight_analyses.count} other analyses are running"
+            }, 409, scope)
+            return
+        if profiler is not None:
+            profiler.start()
+        try:
+            with span("POST /api/analyze") as current:
+                payload, status = await analyze_event(data, profiler)
+                current.set_attribute("http.status_code", status)
+            await _send_json(send, payload, status, scope)
+        finally:
+            if profiler is not None:
+                profiler.stop(write=False)
+                await asyncio.to_thread(profiler.write)
+        return
+
+    flask_app = _wsgi_fallback()
+    if flask_app is None:
+        await _send_json(send, {"error": "Serving this route under ASGI requires asgiref: pip install asgiref"}, 501)
+        return
+    await flask_app(scope, receive, send)
@@ -0,0 +1,266 @@
+"""
+Streaming import of pre-scraped attendee lists (CSV or JSONL exports from Luma,
+Eventbrite, etc., or markdown tables such as Linkup's sourcedAnswer output).
+
+Rows are read lazily and normalized one at a time, so arbitrarily large exports
+can be fed into the enrichment and matching stages in fixed-size chunks without
+loading the whole file.
+"""
+import csv
+import io
+import json
+import os
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+# Export column names (normalized to snake_case) mapped to attendee fields
+COLUMN_ALIASES = {
+    "name": ["name", "full_name", "attendee_name", "speaker_name", "attendee"],
+    "first_name": ["first_name", "firstname", "given_name"],
+    "last_name": ["last_name", "lastname", "surname", "family_name"],
+    "title": ["title", "job_title", "role", "role_title", "position", "jobtitle"],
+    "company": [
+        "company", "company_name", "organization", "organisation", "affiliation",
+        "affiliation_company", "employer"
+    ],
+    "bio": ["bio", "description", "about", "background"],
+    "company_description": ["company_description", "company_info", "about_company"],
+    "email": ["email", "email_address"],
+    "linkedin": ["linkedin", "linkedin_url", "linkedin_profile", "what_is_your_linkedin_profile"],
+}
+
+_ALIAS_LOOKUP = {alias: field for field, aliases in COLUMN_ALIASES.items() for alias in aliases}
+
+
+def _normalize_column(column: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", (column or "").strip().lower()).strip("_")
+
+
+def normalize_attendee(row: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    """
+    Map an exported row onto the attendee fields used by the pipeline.
+
+    Args:
+        row: One CSV row or JSON object.
+
+    Returns:
+        Dictionary with name/title/company (plus bio, email, linkedin when present),
+        or None if the row has no usable name.
+    """
+    attendee: Dict[str, str] = {}
+    for column, value in row.items():
+        field = _ALIAS_LOOKUP.get(_normalize_column(column))
+        if field and value not in (None, "") and field not in attendee:
+            attendee[field] = str(value).strip()
+
+    first_name = attendee.pop("first_name", "")
+    last_name = attendee.pop("last_name", "")
+    if not attendee.get("name"):
+        attendee["name"] = f"{first_name} {last_name}".strip()
+    if not attendee["name"]:
+        return None
+
+    attendee.setdefault("title", "N/A")
+    attendee.setdefault("company", "N/A")
+    return attendee
+
+
+def _detect_format(name: str, first_line: str) -> str:
+    extension = os.path.splitext(name or "")[1].lower()
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if extension == ".csv":
+        return "csv"
+    if extension in (".md", ".markdown"):
+        return "markdown"
+    if first_line.lstrip().startswith("|"):
+        return "markdown"
+    return "jsonl" if first_line.lstrip().startswith("{") else "csv"
+
+
+# Cell boundaries are pipes not escaped with a backslash
+_CELL_BOUNDARY = re.compile(r"(?<!\\)\|")
+_SEPARATOR_CELL = re.compile(r"^:?-+:?$")
+_CITATION = re.compile(r"\s*\[\d+\]")
+
+
+def _iter_lines(source: Any) -> Iterator[str]:
+    """Yield lines from a string, or from an iterable of lines or arbitrary text chunks."""
+    if isinstance(source, str):
+        yield from source.splitlines()
+        return
+    pending = ""
+    for chunk in source:
+        pending += chunk
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    if pending:
+        yield pending.rstrip("\r")
+
+
+def _table_cells(line: str) -> List[str]:
+    """Split a markdown table line into cells, unescaping "\\|"."""
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|") and not line.endswith("\\|"):
+        line = line[:-1]
+    return [cell.strip().replace("\\|", "|") for cell in _CELL_BOUNDARY.split(line)]
+
+
+def _is_separator(cells: List[str]) -> bool:
+    return all(_SEPARATOR_CELL.match(cell.replace(" ", "")) for cell in cells)
+
+
+def iter_markdown_rows(source: Any) -> Iterator[Dict[str, str]]:
+    """
+    Lazily yield the rows of every markdown table in a text, in one pass.
+
+    A table starts at a line with pipes followed by a separator line
+    ("|---|:--:|") and ends at the first line without a pipe, so free text
+    around and between tables is skipped. Ragged rows are padded with empty
+    cells, and extra cells are folded into the last column.
+
+    Args:
+        source: The text, or an iterable of lines or text chunks (e.g. a file or a
+            streamed response).
+
+    Yields:
+        One dict per data row, keyed by the table's header cells.
+    """
+    header: Optional[List[str]] = None
+    candidate: Optional[List[str]] = None
+    for line in _iter_lines(source):
+        if "|" not in line:
+            header = candidate = None
+            continue
+        cells = _table_cells(line)
+        if header is None:
+            if candidate is not None and _is_separator(cells):
+                header = [cell or f"column_{i + 1}" for i, cell in enumerate(candidate)]
+                candidate = None
+            else:
+                candidate = cells
+            continue
+        if _is_separator(cells):
+            continue
+        if len(cells) > len(header):
+            cells = cells[:len(header) - 1] + [" | ".join(cells[len(header) - 1:])]
+        yield dict(zip(header, cells + [""] * (len(header) - len(cells))))
+
+
+def iter_markdown_attendees(source: Any) -> Iterator[Dict[str, str]]:
+    """
+    Lazily yield normalized attendees from the markdown tables in a text.
+
+    Handles the "| Name | Role/Title | Affiliation/Company |" tables returned by
+    LinkupClient.extract_attendees_from_url and enrich_company_descriptions.
+
+    Args:
+        source: The text, or an iterable of lines or text chunks.
+
+    Yields:
+        Normalized attendee dictionaries (rows without a name are skipped).
+    """
+    for row in iter_markdown_rows(source):
+        # Drop inline citation markers ("Acme [2]") and bold/italic markup
+        row = {column: _CITATION.sub("", value).strip("*_ ") for column, value in row.items()}
+        attendee = normalize_attendee(row)
+        if attendee and attendee["name"].lower() not in ("n/a", "name"):
+            yield attendee
+
+
+def iter_attendees(source: Any, file_format: Optional[str] = None) -> Iterator[Dict[str, str]]:
+    """
+    Lazily yield normalized attendees from a CSV, JSONL or markdown-table file.
+
+    Args:
+        source: File path, text stream, binary stream, or uploaded file.
+        file_format: "csv", "jsonl" or "markdown"; detected from the extension or
+            first line if omitted.
+
+    Yields:
+        Normalized attendee dictionaries (rows without a name are skipped).
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, newline="", encoding="utf-8-sig") as f:
+            yield from iter_attendees(f, file_format or _detect_format(str(source), ""))
+        return
+
+    # Uploaded files (werkzeug FileStorage) carry the filename next to the raw stream
+    filename = getattr(source, "filename", "") or ""
+    stream: TextIO = getattr(source, "stream", source)
+    if not isinstance(stream, io.TextIOBase):
+        stream = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+    first_line = stream.readline()
+    file_format = file_format or _detect_format(filename, first_line)
+
+    if file_format == "markdown":
+        yield from iter_markdown_attendees(_prepend(first_line, stream))
+    elif file_format == "jsonl":
+        for line in _prepend(first_line, stream):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                print(f"Skipping malformed JSONL line: {line[:80]!r}")
+                continue
+            attendee = normalize_attendee(row) if isinstance(row, dict) else None
+            if attendee:
+                yield attendee
+    else:
+        for row in csv.DictReader(_prepend(first_line, stream)):
+            attendee = normalize_attendee(row)
+            if attendee:
+                yield attendee
+
+
+def _prepend(first_line: str, stream: TextIO) -> Iterator[str]:
+    """Re-attach a line consumed for format detection to the front of a stream."""
+    if first_line:
+        yield first_line
+    yield from stream
+
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """
+    Group an iterable into lists of at most size items, without materializing it.
+
+    Args:
+        items: Any iterable (typically a generator).
+        size: Maximum chunk length.
+
+    Yields:
+        Lists of consecutive items.
+    """
+    chunk: List[Any] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def attendees_to_table(attendees: Iterable[Dict[str, str]]) -> str:
+    """
+    Format attendees as the markdown table the ICP matchers expect.
+
+    Args:
+        attendees: Normalized attendee dictionaries.
+
+    Returns:
+        Markdown table with Name, Role/Title, Company and Background columns.
+    """
+    lines = ["| Name | Role/Title | Company | Background |", "|------|-----------|---------|------------|"]
+    for attendee in attendees:
+        cells = [
+            attendee.get(field) or "N/A" for field in ("name", "title", "company")
+        ] + [(attendee.get("bio") or attendee.get("company_description") or "")[:300]]
+        cells = [cell.replace("|", "-").replace("\n", " ") for cell in cells]
+        lines.append(f"| {' | '.join(cells)} |")
+    return "\n".join(lines)
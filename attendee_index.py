@@ -0,0 +1,201 @@
+"""
+Paging, sorting and filtering of scored attendees.
+
+Results for large events hold thousands of scored attendees, but a client only
+shows a page or the best few at a time. An AttendeeIndex buckets a result's
+attendees by opportunity type once; each query filters the matching buckets
+and picks its page with a bounded heap (heapq.nlargest/nsmallest on
+offset + limit items) instead of sorting the whole list.
+"""
+import heapq
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+SORT_FIELDS = ("score", "icp_match_score", "business_value_score", "name", "company")
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+
+def _number(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def combined_score(attendee: Dict[str, Any]) -> float:
+    """Average of the ICP match and business value scores (how the web UI ranks attendees)."""
+    return (_number(attendee.get("icp_match_score")) + _number(attendee.get("business_value_score"))) / 2
+
+
+def sort_value(attendee: Dict[str, Any], sort: str):
+    """Return the value an attendee is ordered by for a sort field."""
+    if sort == "score":
+        return combined_score(attendee)
+    if sort in ("name", "company"):
+        return str(attendee.get(sort) or "").lower()
+    return _number(attendee.get(sort))
+
+
+def _type_key(attendee: Dict[str, Any]) -> str:
+    return str(attendee.get("opportunity_type") or "Unknown").strip().lower()
+
+
+def top_attendees(attendees: Iterable[Dict[str, Any]], k: int, sort: str = "score") -> List[Dict[str, Any]]:
+    """
+    Return the k best attendees by a sort field, highest first, without a full sort.
+
+    Ties keep their original order.
+    """
+    ranked = heapq.nlargest(k, enumerate(attendees), key=lambda item: (sort_value(item[1], sort), -item[0]))
+    return [attendee for _, attendee in ranked]
+
+
+class AttendeeIndex:
+    """Scored attendees of one result, bucketed by opportunity type."""
+
+    def __init__(self, attendees: Iterable[Dict[str, Any]], version: Optional[str] = None):
+        """
+        Build the index.
+
+        Args:
+            attendees: Scored attendee records (step4_matches.attendees).
+            version: Identifies the result the index was built from (e.g. its
+                analysis_date), so a refreshed result can be detected.
+        """
+        self.attendees = [attendee for attendee in attendees if isinstance(attendee, dict)]
+        self.version = version
+        self._by_type: Dict[str, List[int]] = {}
+        self._labels: Dict[str, str] = {}
+        for position, attendee in enumerate(self.attendees):
+            key = _type_key(attendee)
+            self._by_type.setdefault(key, []).append(position)
+            self._labels.setdefault(key, str(attendee.get("opportunity_type") or "Unknown").strip())
+
+    def facets(self) -> Dict[str, int]:
+        """Return the number of attendees per opportunity type."""
+        return {self._labels[key]: len(positions) for key, positions in self._by_type.items()}
+
+    def _candidates(self, opportunity_types: Optional[List[str]]) -> Iterable[int]:
+        if not opportunity_types:
+            return range(len(self.attendees))
+        positions = []
+        for opportunity_type in opportunity_types:
+            positions.extend(self._by_type.get(opportunity_type.strip().lower(), []))
+        return sorted(set(positions))
+
+    def query(
+        self,
+        offset: int = 0,
+        limit: int = DEFAULT_PAGE_SIZE,
+        sort: str = "score",
+        order: str = "desc",
+        opportunity_types: Optional[List[str]] = None,
+        min_score: Optional[float] = None,
+        search: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Return one page of attendees.
+
+        Args:
+            offset: Number of matching attendees to skip.
+            limit: Page size (at most MAX_PAGE_SIZE).
+            sort: One of SORT_FIELDS ("score" is the average of both scores).
+            order: "desc" or "asc".
+            opportunity_types: Only include these opportunity types (case-insensitive).
+            min_score: Only include attendees with at least this combined score.
+            search: Only include attendees whose name, role or company contains this text.
+
+        Returns:
+            Dictionary with attendees, total (matching attendees), offset, limit,
+            sort, order and facets (attendees per opportunity type, unfiltered).
+
+        Raises:
+            ValueError: If sort or order is unknown.
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Unknown sort '{sort}' (expected one of {', '.join(SORT_FIELDS)})")
+        if order not in ("asc", "desc"):
+            raise ValueError(f"Unknown order '{order}' (expected asc or desc)")
+        offset = max(0, offset)
+        limit = max(0, min(limit, MAX_PAGE_SIZE))
+
+        needle = (search or "").strip().lower()
+        matching = [
+            position for position in self._candidates(opportunity_types)
+            if (min_score is None or combined_score(self.attendees[position]) >= min_score)
+            and (not needle or any(
+                needle in str(self.attendees[position].get(field) or "").lower()
+                for field in ("name", "role", "company")
+            ))
+        ]
+
+        # Only offset + limit items are ever ordered; ties keep the original order
+        if order == "desc":
+            page = heapq.nlargest(
+                offset + limit, matching,
+                key=lambda position: (sort_value(self.attendees[position], sort), -position)
+            )
+        else:
+            page = heapq.nsmallest(
+                offset + limit, matching,
+                key=lambda position: (sort_value(self.attendees[position], sort), position)
+            )
+
+        return {
+            "attendees": [self.attendees[position] for position in page[offset:]],
+            "total": len(matching),
+            "offset": offset,
+            "limit": limit,
+            "sort": sort,
+            "order": order,
+            "facets": self.facets(),
+        }
+
+
+class AttendeeIndexCache:
+    """LRU of attendee indexes by result id."""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._indexes: "OrderedDict[str, AttendeeIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, result_id: str, attendees: Iterable[Dict[str, Any]], version: Optional[str] = None) -> AttendeeIndex:
+        """Index a result's attendees, unless the same version is already indexed."""
+        with self._lock:
+            index = self._indexes.get(result_id)
+            if index is not None and index.version == version:
+                self._indexes.move_to_end(result_id)
+                return index
+        index = AttendeeIndex(attendees, version)
+        with self._lock:
+            self._indexes[result_id] = index
+            self._indexes.move_to_end(result_id)
+            while len(self._indexes) > self.max_entries:
+                self._indexes.popitem(last=False)
+        return index
+
+    def get(self, result_id: str, load: Optional[Callable[[], Optional[dict]]] = None) -> Optional[AttendeeIndex]:
+        """
+        Return the index for a result.
+
+        Args:
+            result_id: Result id.
+            load: Called when the result is not indexed in this process (e.g. to
+                read it from the shared result cache); returns the results or None.
+        """
+        with self._lock:
+            index = self._indexes.get(result_id)
+            if index is not None:
+                self._indexes.move_to_end(result_id)
+                return index
+        results = load() if load is not None else None
+        if not results:
+            return None
+        return self.put(
+            result_id,
+            (results.get("step4_matches") or {}).get("attendees") or [],
+            (results.get("metadata") or {}).get("analysis_date")
+        )
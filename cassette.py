@@ -0,0 +1,267 @@
+"""
+Record and replay of Linkup, OpenAI and Anthropic calls.
+
+Set CASSETTE_MODE to use a cassette (a JSON-lines file at CASSETTE_PATH,
+default cassettes/default.jsonl):
+
+    record   Calls go to the real APIs. Each request, its response (or error)
+             and how long it took are appended to the cassette.
+    replay   Calls are served from the cassette, without network access or API
+             keys. Each response is delayed by its recorded latency times
+             CASSETTE_LATENCY_SCALE (1 = as recorded, 0.5 = twice as fast,
+             0 = no delay), and a delay longer than the call's timeout replays
+             as a timeout.
+
+Requests are matched on their content (the timeout is ignored). A request
+recorded several times is answered with each recording in turn, cycling, so a
+benchmark can replay a short recording many times. A request that was never
+recorded raises CassetteMiss rather than reaching the network.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from deadline import is_timeout
+
+CASSETTE_MODES = ("record", "replay")
+DEFAULT_CASSETTE_PATH = os.path.join("cassettes", "default.jsonl")
+# Stands in for API keys when replaying, so clients can be built without them
+REPLAY_API_KEY = "cassette-replay"
+
+# Request fields that do not change the response
+_IGNORED_FIELDS = ("timeout",)
+
+_cassettes: Dict[tuple, "Cassette"] = {}
+_cassettes_lock = threading.Lock()
+
+
+class CassetteMiss(LookupError):
+    """Raised when replaying a request that is not in the cassette."""
+
+
+class ReplayedError(RuntimeError):
+    """A recorded API error, raised again on replay."""
+
+
+def request_key(service: str, request: Dict[str, Any]) -> str:
+    """Return the content hash a request is recorded and looked up under."""
+    fields = {key: value for key, value in request.items() if key not in _IGNORED_FIELDS}
+    canonical = json.dumps({"service": service, "request": fields}, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _to_json(response: Any) -> Any:
+    """Return a JSON-serializable form of a response (SDK responses are pydantic models)."""
+    if hasattr(response, "model_dump"):
+        return response.model_dump(mode="json")
+    return response
+
+
+class Cassette:
+    """Records API calls to a file, or serves them back from it."""
+
+    def __init__(self, path: str, mode: str, latency_scale: float = 1.0):
+        """
+        Open a cassette.
+
+        Args:
+            path: JSON-lines cassette file.
+            mode: "record" (append real calls) or "replay" (serve recorded calls).
+            latency_scale: Multiplier on recorded latencies when replaying.
+
+        Raises:
+            ValueError: If the mode is unknown or the latency scale is negative.
+            FileNotFoundError: If replaying a cassette that does not exist.
+        """
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}' (expected one of {', '.join(CASSETTE_MODES)})")
+        if latency_scale < 0:
+            raise ValueError("Cassette latency scale must not be negative")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._recordings: Dict[str, List[Dict[str, Any]]] = {}
+        self._served: Counter = Counter()
+        self._stats: Counter = Counter()
+        if mode == "replay":
+            self._load()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                self._recordings.setdefault(entry["key"], []).append(entry)
+        print(f"Replaying {sum(len(entries) for entries in self._recordings.values())} calls from {self.path}")
+
+    def _append(self, entry: Dict[str, Any]):
+        line = json.dumps(entry, default=str) + "\n"
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+            self._stats["recorded"] += 1
+
+    def _entry(self, service: str, request: Dict[str, Any], key: str, started: float) -> Dict[str, Any]:
+        return {
+            "key": key,
+            "service": service,
+            "recorded_at": datetime.now().isoformat(),
+            "elapsed": round(time.perf_counter() - started, 4),
+            "request": request,
+        }
+
+    def _next(self, service: str, key: str) -> Dict[str, Any]:
+        """Return the recording to serve for a request (each recording in turn)."""
+        with self._lock:
+            entries = self._recordings.get(key)
+            if not entries:
+                self._stats["missed"] += 1
+                raise CassetteMiss(f"No {service} call in {self.path} matches this request (key {key[:12]})")
+            entry = entries[self._served[key] % len(entries)]
+            self._served[key] += 1
+            self._stats["replayed"] += 1
+        return entry
+
+    def _delay(self, entry: Dict[str, Any], timeout: Optional[float]) -> tuple:
+        """Return (seconds to wait, whether the call times out) for a recording."""
+        delay = entry.get("elapsed", 0) * self.latency_scale
+        if timeout is not None and delay > timeout:
+            return timeout, True
+        return delay, False
+
+    def _result(self, entry: Dict[str, Any], timed_out: bool, timeout: Optional[float], decode: Optional[Callable]):
+        if timed_out:
+            raise TimeoutError(f"Replayed {entry['service']} call timed out after {timeout:.1f}s")
+        error = entry.get("error")
+        if error is not None:
+            if error.get("timeout"):
+                raise TimeoutError(error["message"])
+            raise ReplayedError(f"{error['type']}: {error['message']}")
+        return decode(entry["response"]) if decode is not None else entry["response"]
+
+    def call(
+        self,
+        service: str,
+        request: Dict[str, Any],
+        send: Callable[[], Any],
+        decode: Optional[Callable[[Any], Any]] = None,
+        timeout: Optional[float] = None
+    ) -> Any:
+        """
+        Make one API call through the cassette.
+
+        Args:
+            service: "linkup", "openai" or "anthropic".
+            request: The request payload or SDK keyword arguments.
+            send: Makes the real call (only used when recording).
+            decode: Rebuilds a response object from its recorded JSON (e.g. an
+                SDK model's model_validate); recorded JSON is returned as is without one.
+            timeout: The call's timeout; longer replayed delays time out.
+
+        Raises:
+            CassetteMiss: If replaying a request that was not recorded.
+        """
+        key = request_key(service, request)
+        if self.replaying:
+            entry = self._next(service, key)
+            delay, timed_out = self._delay(entry, timeout)
+            if delay:
+                time.sleep(delay)
+            return self._result(entry, timed_out, timeout, decode)
+
+        started = time.perf_counter()
+        try:
+            response = send()
+        except Exception as e:
+            self._append({**self._entry(service, request, key, started), "error": _error(e)})
+            raise
+        self._append({**self._entry(service, request, key, started), "response": _to_json(response)})
+        return response
+
+    async def acall(
+        self,
+        service: str,
+        request: Dict[str, Any],
+        send: Callable[[], Awaitable[Any]],
+        decode: Optional[Callable[[Any], Any]] = None,
+        timeout: Optional[float] = None
+    ) -> Any:
+        """Async version of call (send returns an awaitable)."""
+        key = request_key(service, request)
+        if self.replaying:
+            entry = self._next(service, key)
+            delay, timed_out = self._delay(entry, timeout)
+            if delay:
+                await asyncio.sleep(delay)
+            return self._result(entry, timed_out, timeout, decode)
+
+        started = time.perf_counter()
+        try:
+            response = await send()
+        except Exception as e:
+            await asyncio.to_thread(self._append, {**self._entry(service, request, key, started), "error": _error(e)})
+            raise
+        entry = {**self._entry(service, request, key, started), "response": _to_json(response)}
+        # File writes block, so they run on the default thread pool
+        await asyncio.to_thread(self._append, entry)
+        return response
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of calls recorded, replayed and missed."""
+        with self._lock:
+            return {name: self._stats[name] for name in ("recorded", "replayed", "missed")}
+
+
+def _error(error: Exception) -> Dict[str, Any]:
+    return {"type": type(error).__name__, "message": str(error), "timeout": is_timeout(error)}
+
+
+def open_cassette() -> Optional[Cassette]:
+    """
+    Return the process cassette configured by CASSETTE_MODE (None when unset).
+
+    Clients built with the same settings share one cassette, so repeated
+    requests are replayed in turn across all of them.
+    """
+    mode = os.getenv("CASSETTE_MODE", "").strip().lower()
+    if mode in ("", "off", "none"):
+        return None
+    path = os.getenv("CASSETTE_PATH") or DEFAULT_CASSETTE_PATH
+    scale = float(os.getenv("CASSETTE_LATENCY_SCALE", 1.0))
+    settings = (mode, os.path.abspath(path), scale)
+    with _cassettes_lock:
+        if settings not in _cassettes:
+            _cassettes[settings] = Cassette(path, mode, scale)
+        return _cassettes[settings]
+
+
+def replay_api_key(cassette: Optional[Cassette]) -> Optional[str]:
+    """Return a placeholder API key when replaying (clients need no real key then)."""
+    return REPLAY_API_KEY if cassette is not None and cassette.replaying else None
+
+
+def openai_completion(data: Dict[str, Any]):
+    """Rebuild a recorded OpenAI chat completion."""
+    from openai.types.chat import ChatCompletion
+    return ChatCompletion.model_validate(data)
+
+
+def anthropic_message(data: Dict[str, Any]):
+    """Rebuild a recorded Anthropic message."""
+    from anthropic.types import Message
+    return Message.model_validate(data)
@@ -0,0 +1,93 @@
+"""
+Per-request deadlines shared by every step of the analysis pipeline.
+
+A Deadline is created when a request arrives and passed down to each step. A
+step asks how much time is left, bounds its API calls to that, and degrades
+(standard instead of deep search, smaller chunks, cached or heuristic scores)
+instead of running past the platform's hard cap. Degradations are recorded on
+the deadline so the response can report what was skipped.
+"""
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# Below this many seconds left, live searches use standard depth (deep takes 30-60s+)
+DEEP_SEARCH_MIN_SECONDS = 150
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a step has no time left to run."""
+
+
+def is_timeout(error: BaseException) -> bool:
+    """Return True if an exception from requests, httpx, OpenAI or a Deadline is a timeout."""
+    return isinstance(error, TimeoutError) or "timeout" in type(error).__name__.lower()
+
+
+class Deadline:
+    """Time budget for one request."""
+
+    def __init__(self, budget: float):
+        """
+        Start the clock.
+
+        Args:
+            budget: Seconds the whole request may take.
+        """
+        self.budget = budget
+        self._start = time.monotonic()
+        self._expires_at = self._start + budget
+        self._lock = threading.Lock()
+        self.degradations: List[str] = []
+
+    def remaining(self) -> float:
+        """Seconds left (never negative)."""
+        return max(0.0, self._expires_at - time.monotonic())
+
+    def elapsed(self) -> float:
+        """Seconds since the request started."""
+        return time.monotonic() - self._start
+
+    def expired(self) -> bool:
+        """Return True once the budget is used up."""
+        return self.remaining() <= 0
+
+    def timeout(self, cap: Optional[float] = None, reserve: float = 0.0) -> float:
+        """
+        Timeout for the next call: the time left minus reserve, capped at cap.
+
+        Args:
+            cap: Upper bound, e.g. the call's usual timeout.
+            reserve: Seconds to keep for the steps that still follow.
+
+        Raises:
+            DeadlineExceeded: If nothing is left after the reserve.
+        """
+        available = self.remaining() - reserve
+        if available <= 0:
+            raise DeadlineExceeded(f"No time left ({self.remaining():.1f}s remaining, {reserve:.0f}s reserved)")
+        return min(available, cap) if cap is not None else available
+
+    def search_depth(self, preferred: str = "deep") -> str:
+        """Return preferred, or "standard" if there is no longer time for a deep search."""
+        if preferred == "deep" and self.remaining() < DEEP_SEARCH_MIN_SECONDS:
+            self.degrade("standard search depth instead of deep")
+            return "standard"
+        return preferred
+
+    def degrade(self, note: str):
+        """Record that a step did less work to stay within the deadline."""
+        with self._lock:
+            if note not in self.degradations:
+                self.degradations.append(note)
+        print(f"Deadline: {note} ({self.remaining():.0f}s left)")
+
+    def report(self) -> Dict[str, Any]:
+        """Return the budget, time used and degradations (for response metadata)."""
+        with self._lock:
+            degradations = list(self.degradations)
+        return {
+            "budget_seconds": self.budget,
+            "elapsed_seconds": round(self.elapsed(), 2),
+            "degraded": degradations,
+        }
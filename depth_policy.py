@@ -0,0 +1,174 @@
+"""
+Adaptive Linkup search depth, learned per domain.
+
+Deep searches take 30-60s+, standard ones a few seconds. In adaptive mode a
+search runs at standard depth first and is retried at deep depth only if the
+result fails a quality check (e.g. too few speakers, an empty answer). The
+outcome of every standard attempt is recorded per (operation, domain), so a
+domain where standard keeps failing goes straight to deep, and one where it
+works never pays for deep.
+"""
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+DEPTH_MODES = ("adaptive", "standard", "deep")
+
+
+class DepthPolicy:
+    """
+    Chooses the search depth per operation and domain from recent outcomes.
+
+    An optional shared backend (e.g. shared_cache.SQLiteCache) keeps the
+    per-domain outcomes across worker processes and restarts. Each worker
+    re-reads a domain's outcomes every sync_interval seconds, and appends its
+    own outcomes to the stored ones rather than overwriting them.
+    """
+
+    def __init__(
+        self,
+        mode: str = "adaptive",
+        window: int = 10,
+        min_samples: int = 3,
+        escalate_rate: float = 0.5,
+        probe_every: int = 10,
+        backend=None,
+        sync_interval: float = 30.0
+    ):
+        """
+        Initialize the policy.
+
+        Args:
+            mode: "adaptive", or "standard"/"deep" to always use that depth.
+            window: Number of recent standard-depth outcomes kept per domain.
+            min_samples: Outcomes needed before a domain is sent straight to deep.
+            escalate_rate: Fraction of failed standard attempts above which a
+                domain goes straight to deep.
+            probe_every: A domain routed to deep still tries standard every this
+                many calls, so it can recover if the site becomes easier to read.
+            backend: Optional cache shared between processes, with get(key) and
+                set(key, value) methods.
+            sync_interval: Seconds a domain's outcomes read from the backend are
+                used before they are read again.
+        """
+        if mode not in DEPTH_MODES:
+            raise ValueError(f"Unknown Linkup depth mode '{mode}' (expected one of {', '.join(DEPTH_MODES)})")
+        self.mode = mode
+        self.window = window
+        self.min_samples = min_samples
+        self.escalate_rate = escalate_rate
+        self.probe_every = probe_every
+        self.backend = backend
+        self.sync_interval = sync_interval
+        self._domains: Dict[str, Dict[str, Any]] = {}
+        # When each key was last read from the backend (time.monotonic())
+        self._synced: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._counters = {"standard": 0, "deep": 0, "escalated": 0}
+
+    @staticmethod
+    def key(operation: str, domain: Optional[str]) -> str:
+        """Return the stats key for an operation on a domain."""
+        domain = (domain or "").lower()
+        if domain.startswith("www."):
+            domain = domain[4:]
+        return f"{operation}:{domain or '*'}"
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the outcomes stored in the backend for a key (None if missing or unreadable)."""
+        try:
+            stored = self.backend.get(key)
+        except Exception as e:
+            print(f"Shared Linkup depth stats read failed: {e}")
+            return None
+        return stored[1] if stored is not None else None
+
+    def _entry(self, key: str) -> Dict[str, Any]:
+        """Return the outcomes for a key, re-reading them from the backend every sync_interval."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._domains.get(key)
+            if entry is not None and (self.backend is None or now - self._synced.get(key, 0) < self.sync_interval):
+                return entry
+
+        stored = self._load(key) if self.backend is not None else None
+        with self._lock:
+            entry = self._domains.setdefault(key, {"outcomes": [], "deep_runs": 0})
+            if stored is not None:
+                entry["outcomes"] = list(stored.get("outcomes", []))[-self.window:]
+            self._synced[key] = now
+            return entry
+
+    def choose(self, operation: str, domain: Optional[str] = None) -> str:
+        """
+        Return the depth to start a search with.
+
+        Args:
+            operation: Kind of search (e.g. "speakers").
+            domain: Domain the search is about.
+
+        Returns:
+            "standard" or "deep".
+        """
+        if self.mode != "adaptive":
+            return self.mode
+        entry = self._entry(self.key(operation, domain))
+        with self._lock:
+            outcomes: List[bool] = entry["outcomes"]
+            failures = outcomes.count(False)
+            if len(outcomes) >= self.min_samples and failures / len(outcomes) >= self.escalate_rate:
+                entry["deep_runs"] += 1
+                if entry["deep_runs"] % self.probe_every:
+                    return "deep"
+            return "standard"
+
+    def record(self, operation: str, domain: Optional[str], depth: str, passed: bool, escalated: bool = False):
+        """
+        Record the outcome of a search.
+
+        Only standard-depth outcomes drive the choice; deep searches are counted.
+
+        Args:
+            operation: Kind of search.
+            domain: Domain the search was about.
+            depth: Depth the search ran at.
+            passed: Whether the result passed the quality check.
+            escalated: True for a deep retry of a failed standard search.
+        """
+        with self._lock:
+            self._counters[depth] = self._counters.get(depth, 0) + 1
+            if escalated:
+                self._counters["escalated"] += 1
+        if depth != "standard" or self.mode != "adaptive":
+            return
+
+        key = self.key(operation, domain)
+        entry = self._entry(key)
+        if self.backend is None:
+            with self._lock:
+                entry["outcomes"] = (entry["outcomes"] + [passed])[-self.window:]
+            return
+
+        # Append to what other workers stored since this one last read the key,
+        # rather than writing this worker's window over their outcomes
+        stored = self._load(key)
+        with self._lock:
+            base = list(stored.get("outcomes", [])) if stored is not None else entry["outcomes"]
+            entry["outcomes"] = (base + [passed])[-self.window:]
+            self._synced[key] = time.monotonic()
+            outcomes = list(entry["outcomes"])
+        try:
+            self.backend.set(key, {"outcomes": outcomes})
+        except Exception as e:
+            print(f"Shared Linkup depth stats write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return searches per depth and the domains currently sent straight to deep."""
+        with self._lock:
+            counters = dict(self._counters)
+            deep_domains = sorted(
+                key for key, entry in self._domains.items()
+                if len(entry["outcomes"]) >= self.min_samples
+                and entry["outcomes"].count(False) / len(entry["outcomes"]) >= self.escalate_rate
+            )
+        return {"mode": self.mode, **counters, "deep_domains": deep_domains}
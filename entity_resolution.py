@@ -0,0 +1,319 @@
+"""
+Entity resolution for speaker and attendee lists.
+
+Lists merged from several extractions (structured output, sharded pages,
+markdown tables, imports) name the same person in different ways: "Dr. Jane
+Smith" at "Acme Inc." and "Jane Smith" at "ACME", "Smith, Jane", "J. Smith".
+Records are only compared with others sharing a blocking key (normalized
+surname, or company token plus first initial), so resolution stays close to
+linear in the number of records. Matches are scored with Jaro-Winkler and
+grouped with union-find, so A~B and B~C end up as one person.
+
+The near-miss cases (different people with similar names at one company) are
+checked by the docstring examples: python -m doctest entity_resolution.py
+"""
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# Jaro-Winkler similarity above which two full names are the same person
+NAME_THRESHOLD = 0.92
+# Stricter threshold when one of the records has no company to confirm the match
+NAME_ONLY_THRESHOLD = 0.96
+COMPANY_THRESHOLD = 0.9
+# Largest block compared in full; bigger blocks (e.g. a very common surname)
+# are compared against their most recent members only
+MAX_BLOCK_SIZE = 200
+
+_HONORIFICS = {"dr", "mr", "mrs", "ms", "miss", "mx", "prof", "professor", "sir", "dame"}
+_NAME_SUFFIXES = {"jr", "sr", "ii", "iii", "iv", "phd", "md", "mba", "esq", "cpa"}
+_COMPANY_SUFFIXES = {
+    "inc", "incorporated", "llc", "llp", "ltd", "limited", "corp", "corporation",
+    "co", "company", "gmbh", "sa", "sas", "ag", "plc", "bv", "nv", "the", "group"
+}
+_MISSING = {"", "n/a", "na", "none", "unknown", "-", "tbd", "null"}
+# Common short forms of given names. A name only matches a different given name
+# through this table (or as an initial), never through a shared prefix, so
+# "Daniel" and "Danielle" stay two people.
+_NICKNAMES = {
+    "abigail": {"abby"}, "alexander": {"alex", "sasha"}, "alexandra": {"alex", "sasha", "lexi"},
+    "andrew": {"andy", "drew"}, "anthony": {"tony"}, "benjamin": {"ben", "benji"},
+    "catherine": {"cathy", "kate", "katie"}, "charles": {"charlie", "chuck"},
+    "christina": {"chris", "tina"}, "christine": {"chris"}, "christopher": {"chris"},
+    "daniel": {"dan", "danny"}, "danielle": {"dani"}, "david": {"dave"}, "deborah": {"deb", "debbie"},
+    "donald": {"don"}, "edward": {"ed", "eddie", "ted"}, "elizabeth": {"liz", "beth", "eliza", "lizzie"},
+    "frederick": {"fred"}, "gregory": {"greg"}, "jacob": {"jake"}, "james": {"jim", "jimmy", "jamie"},
+    "jeffrey": {"jeff"}, "jennifer": {"jen", "jenny"}, "jessica": {"jess"}, "john": {"jack", "johnny"},
+    "jonathan": {"jon", "jonny"}, "joseph": {"joe", "joey"}, "joshua": {"josh"},
+    "katherine": {"kate", "kathy", "katie"}, "kenneth": {"ken"}, "lawrence": {"larry"},
+    "margaret": {"maggie", "meg", "peggy"}, "matthew": {"matt"}, "maximilian": {"max"},
+    "michael": {"mike", "mick"}, "nathaniel": {"nate", "nat"}, "nicholas": {"nick", "nicky"},
+    "patricia": {"pat", "patty", "tricia"}, "patrick": {"pat"}, "peter": {"pete"}, "philip": {"phil"},
+    "rebecca": {"becky", "becca"}, "richard": {"rick", "rich", "dick"}, "robert": {"rob", "bob", "bobby"},
+    "ronald": {"ron"}, "samantha": {"sam"}, "samuel": {"sam"}, "stephen": {"steve"}, "steven": {"steve"},
+    "susan": {"sue", "susie"}, "theodore": {"ted", "theo"}, "thomas": {"tom", "tommy"},
+    "timothy": {"tim"}, "victoria": {"vicky", "tori"}, "william": {"will", "bill", "billy", "liam"},
+    "zachary": {"zach"},
+}
+
+
+def _tokens(text: Any) -> List[str]:
+    """Lowercase ASCII word tokens, with accents removed."""
+    text = unicodedata.normalize("NFKD", str(text or ""))
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+def name_tokens(name: Any) -> List[str]:
+    """Normalize a person's name to tokens ("Smith, Dr. Jane" -> ["jane", "smith"])."""
+    name = str(name or "")
+    if name.count(",") == 1:
+        last, first = name.split(",")
+        # "Smith, Jane" but not "Jane Smith, PhD"
+        if _tokens(first) and not set(_tokens(first)) <= _NAME_SUFFIXES:
+            name = f"{first} {last}"
+    return [token for token in _tokens(name) if token not in _HONORIFICS and token not in _NAME_SUFFIXES]
+
+
+def company_tokens(company: Any) -> List[str]:
+    """Normalize a company name to tokens, without legal suffixes ("Acme, Inc." -> ["acme"])."""
+    if str(company or "").strip().lower() in _MISSING:
+        return []
+    return [token for token in _tokens(company) if token not in _COMPANY_SUFFIXES]
+
+
+def jaro_winkler(a: str, b: str) -> float:
+    """Return the Jaro-Winkler similarity of two strings (1.0 = identical)."""
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    window = max(0, max(len(a), len(b)) // 2 - 1)
+    a_matched = [False] * len(a)
+    b_matched = [False] * len(b)
+    matches = 0
+    for i, char in enumerate(a):
+        for j in range(max(0, i - window), min(len(b), i + window + 1)):
+            if not b_matched[j] and b[j] == char:
+                a_matched[i] = b_matched[j] = True
+                matches += 1
+                break
+    if not matches:
+        return 0.0
+
+    transpositions = 0
+    j = 0
+    for i, char in enumerate(a):
+        if a_matched[i]:
+            while not b_matched[j]:
+                j += 1
+            if char != b[j]:
+                transpositions += 1
+            j += 1
+    jaro = (matches / len(a) + matches / len(b) + (matches - transpositions / 2) / matches) / 3
+
+    prefix = 0
+    for char_a, char_b in zip(a[:4], b[:4]):
+        if char_a != char_b:
+            break
+        prefix += 1
+    return jaro + prefix * 0.1 * (1 - jaro)
+
+
+def _first_names_compatible(a: List[str], b: List[str]) -> bool:
+    """
+    True if the given names agree: equal, an initial ("J"), or a known short form ("Alex").
+
+    >>> _first_names_compatible(["alex", "chen"], ["alexander", "chen"])
+    True
+    >>> _first_names_compatible(["daniel", "chen"], ["danielle", "chen"])
+    False
+    >>> _first_names_compatible(["mark", "li"], ["mary", "li"])
+    False
+    """
+    first_a, first_b = a[0], b[0]
+    if first_a == first_b:
+        return True
+    if len(first_a) == 1 or len(first_b) == 1:
+        return first_a[0] == first_b[0]
+    return first_b in _NICKNAMES.get(first_a, ()) or first_a in _NICKNAMES.get(first_b, ())
+
+
+class _Person:
+    """One input record with its normalized keys."""
+
+    __slots__ = ("record", "name", "name_key", "company", "company_key")
+
+    def __init__(self, record: Dict[str, Any]):
+        self.record = record
+        self.name = name_tokens(record.get("name"))
+        self.name_key = " ".join(self.name)
+        self.company = company_tokens(record.get("company"))
+        self.company_key = " ".join(self.company)
+
+    def blocking_keys(self) -> List[tuple]:
+        keys = []
+        if self.name:
+            keys.append(("surname", self.name[-1]))
+        if self.company and self.name:
+            keys.append(("company", self.company[0], self.name[0][0]))
+        return keys
+
+
+def _same_company(a: _Person, b: _Person) -> Optional[bool]:
+    """True/False if both companies are known and (dis)agree, None if either is missing."""
+    if not a.company or not b.company:
+        return None
+    if set(a.company) & set(b.company):
+        return True
+    return jaro_winkler(a.company_key, b.company_key) >= COMPANY_THRESHOLD
+
+
+def same_person(a: _Person, b: _Person) -> bool:
+    """
+    Decide whether two records describe the same person.
+
+    >>> def pair(name_a, name_b, company="Google"):
+    ...     return same_person(_Person({"name": name_a, "company": company}), _Person({"name": name_b, "company": company}))
+    >>> pair("Daniel Chen", "Danielle Chen"), pair("Mark Li", "Mary Li"), pair("Jon Smith", "John Smith")
+    (False, False, False)
+    >>> pair("Alex Chen", "Alexander Chen"), pair("J. Smith", "Jane Smith"), pair("Jane Kowalski", "Jane Kowalsky")
+    (True, True, True)
+    """
+    if not a.name or not b.name:
+        return False
+    company = _same_company(a, b)
+    if company is False:
+        return False
+    if not _first_names_compatible(a.name, b.name):
+        return False
+
+    if len(a.name) > 1 and len(b.name) > 1 and a.name[-1] == b.name[-1]:
+        # Same surname and compatible given names; an initial alone needs the company to agree
+        return company is True or (len(a.name[0]) > 1 and len(b.name[0]) > 1)
+
+    # Otherwise both the surnames and the full names must be near-identical (typos, transliterations)
+    threshold = NAME_THRESHOLD if company else NAME_ONLY_THRESHOLD
+    return (
+        jaro_winkler(a.name[-1], b.name[-1]) >= threshold
+        and jaro_winkler(a.name_key, b.name_key) >= threshold
+    )
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or str(value).strip().lower() in _MISSING
+
+
+def _merge_into(target: _Person, other: _Person):
+    """Fill target's missing fields from other, keeping the most complete name."""
+    for field, value in other.record.items():
+        if not _is_missing(value) and _is_missing(target.record.get(field)):
+            target.record[field] = value
+    if len(other.name) > len(target.name) or (
+        len(other.name) == len(target.name) and len(other.name_key) > len(target.name_key)
+    ):
+        target.record["name"] = other.record.get("name")
+        target.name, target.name_key = other.name, other.name_key
+    if not target.company and other.company:
+        target.company, target.company_key = other.company, other.company_key
+
+
+class EntityResolver:
+    """
+    Incremental entity resolution with blocking and union-find.
+
+    Records are added one at a time (so a streamed import can be de-duplicated
+    as it is read). Each record is compared only with the people sharing one of
+    its blocking keys; every match unions the clusters.
+    """
+
+    def __init__(self):
+        self._people: List[_Person] = []
+        self._parent: List[int] = []
+        self._blocks: Dict[tuple, List[int]] = {}
+        self.duplicates = 0
+
+    def _find(self, index: int) -> int:
+        while self._parent[index] != index:
+            # Path halving keeps the trees flat
+            self._parent[index] = self._parent[self._parent[index]]
+            index = self._parent[index]
+        return index
+
+    def _union(self, root: int, other: int):
+        """Merge cluster other into cluster root (the earlier one stays canonical)."""
+        if root > other:
+            root, other = other, root
+        self._parent[other] = root
+        _merge_into(self._people[root], self._people[other])
+
+    def add(self, record: Dict[str, Any]) -> bool:
+        """
+        Add a record.
+
+        Returns:
+            True if the record is a new person, False if it matched (and was merged
+            into) a person added before.
+        """
+        person = _Person(dict(record))
+        index = len(self._people)
+        self._people.append(person)
+        self._parent.append(index)
+
+        matched = set()
+        keys = person.blocking_keys()
+        for key in keys:
+            for candidate in self._blocks.get(key, [])[-MAX_BLOCK_SIZE:]:
+                root = self._find(candidate)
+                # Compare with the merged person, so a record without a company can't
+                # bridge two people with the same name at different companies
+                if root not in matched and same_person(person, self._people[root]):
+                    matched.add(root)
+        for key in keys:
+            self._blocks.setdefault(key, []).append(index)
+
+        if not matched:
+            return True
+        roots = sorted(matched)
+        for root in roots[1:]:
+            if self._find(root) != self._find(roots[0]):
+                self._union(self._find(roots[0]), self._find(root))
+        self._union(self._find(roots[0]), index)
+        self.duplicates += 1
+        return False
+
+    def people(self) -> List[Dict[str, Any]]:
+        """Return one merged record per person, in first-seen order."""
+        return [person.record for index, person in enumerate(self._people) if self._find(index) == index]
+
+
+def resolve_people(records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    De-duplicate a list of speaker/attendee records.
+
+    Args:
+        records: Dicts with at least "name" (and usually "title" and "company").
+
+    Returns:
+        One merged record per person, in first-seen order. Records without a name
+        are dropped.
+    """
+    resolver = EntityResolver()
+    for record in records:
+        if isinstance(record, dict) and not _is_missing(record.get("name")):
+            resolver.add(record)
+    return resolver.people()
+
+
+def unique_people(records: Iterable[Dict[str, Any]], resolver: Optional[EntityResolver] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily yield the records that are not duplicates of an earlier record.
+
+    Args:
+        records: Stream of speaker/attendee records.
+        resolver: Resolver to use (e.g. to read .duplicates afterwards).
+    """
+    resolver = resolver or EntityResolver()
+    for record in records:
+        if resolver.add(record):
+            yield record
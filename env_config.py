@@ -0,0 +1,19 @@
+"""
+Environment loading shared by the web app, the CLI and the API clients.
+"""
+import threading
+
+_loaded = False
+_lock = threading.Lock()
+
+
+def load_env():
+    """Load variables from the .env file once per process; later calls are no-ops."""
+    global _loaded
+    if _loaded:
+        return
+    with _lock:
+        if not _loaded:
+            from dotenv import load_dotenv
+            load_dotenv()
+            _loaded = True
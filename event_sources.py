@@ -0,0 +1,357 @@
+"""
+Event-source registry: routes an event URL to where its speaker list comes from.
+
+URLs are parsed and normalized once, then dispatched with dict lookups over the
+host and its path prefixes, so routing cost depends on the URL's path depth and
+not on how many events are registered. Sources are pluggable: hardcoded lists,
+local files, cached snapshots of earlier extractions, or live Linkup extraction.
+"""
+import csv
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+from urllib.parse import urlparse
+
+from attendee_import import iter_markdown_attendees
+
+
+class EventURL(NamedTuple):
+    """A parsed, normalized event URL."""
+    host: str
+    path: str
+    canonical: str
+
+
+def parse_event_url(url: str) -> EventURL:
+    """
+    Parse and normalize an event URL (or a "host/path" pattern).
+
+    The host is lowercased with "www." removed; the path drops trailing slashes,
+    query string and fragment.
+
+    Args:
+        url: URL or URL pattern.
+
+    Returns:
+        The parsed EventURL.
+    """
+    url = (url or "").strip()
+    if "://" not in url:
+        url = f"https://{url}"
+    parsed = urlparse(url)
+    host = parsed.netloc.lower().split("@")[-1]
+    if host.endswith(":443") or host.endswith(":80"):
+        host = host.rsplit(":", 1)[0]
+    if host.startswith("www."):
+        host = host[4:]
+    path = "/".join(segment for segment in parsed.path.split("/") if segment)
+    path = f"/{path}" if path else ""
+    return EventURL(host=host, path=path, canonical=f"{host}{path}")
+
+
+class EventSource:
+    """Base class for a provider of an event's speaker list."""
+
+    name = "source"
+    # Live sources scrape on every request; pre-scraped sources are cheap to read
+    live = False
+
+    def fetch(self, event_url: str, deadline=None) -> Dict[str, Any]:
+        """
+        Return the speakers for an event.
+
+        Args:
+            event_url: URL of the event page.
+            deadline: Optional deadline.Deadline; live sources bound their request by it.
+
+        Returns:
+            Dictionary with "speakers" (list of name/title/company dicts) and "sources".
+        """
+        raise NotImplementedError
+
+
+class StaticEventSource(EventSource):
+    """Speakers held in memory (e.g. hardcoded lists)."""
+
+    name = "hardcoded"
+
+    def __init__(self, speakers: List[Dict[str, Any]], sources: Optional[List[Any]] = None):
+        self.speakers = speakers
+        self.sources = sources or []
+
+    def fetch(self, event_url: str, deadline=None) -> Dict[str, Any]:
+        return {"speakers": self.speakers, "sources": self.sources}
+
+
+class FileEventSource(EventSource):
+    """
+    Speakers loaded lazily from a local JSON, JSONL or CSV file.
+
+    JSON files may hold a list of speakers or an object with "speakers" (and
+    optionally "sources" and "urls"). CSV files need name/title/company columns.
+    """
+
+    name = "file"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._data: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, Any]:
+        """Read and cache the file contents."""
+        with self._lock:
+            if self._data is None:
+                self._data = _read_speaker_file(self.path)
+            return self._data
+
+    def urls(self) -> List[str]:
+        """Return the event URLs the file declares it covers."""
+        return list(self.load().get("urls", []))
+
+    def fetch(self, event_url: str, deadline=None) -> Dict[str, Any]:
+        data = self.load()
+        return {"speakers": data.get("speakers", []), "sources": data.get("sources", [])}
+
+
+class SnapshotEventSource(EventSource):
+    """
+    Directory of saved extraction results, one JSON file per canonical event URL.
+
+    Live extractions can be saved here so the next request for the same event
+    skips scraping. Snapshots older than max_age are ignored, so the event is
+    extracted (and snapshotted) again.
+    """
+
+    name = "snapshot"
+
+    def __init__(self, directory: str, max_age: Optional[float] = None):
+        """
+        Args:
+            directory: Directory holding the snapshot files.
+            max_age: Seconds a snapshot is used for (default: no limit).
+        """
+        self.directory = directory
+        self.max_age = max_age
+
+    def _path(self, event_url: str) -> str:
+        canonical = parse_event_url(event_url).canonical
+        digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:24]
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def has(self, event_url: str) -> bool:
+        """Return True if a snapshot younger than max_age exists for the event URL."""
+        try:
+            saved_at = os.path.getmtime(self._path(event_url))
+        except OSError:
+            return False
+        return self.max_age is None or time.time() - saved_at <= self.max_age
+
+    def fetch(self, event_url: str, deadline=None) -> Dict[str, Any]:
+        with open(self._path(event_url)) as f:
+            data = json.load(f)
+        return {"speakers": data.get("speakers", []), "sources": data.get("sources", [])}
+
+    def save(self, event_url: str, speakers: List[Dict[str, Any]], sources: Optional[List[Any]] = None):
+        """Save an extraction result as the snapshot for event_url."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(event_url)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "event_url": parse_event_url(event_url).canonical,
+                "speakers": speakers,
+                "sources": sources or []
+            }, f)
+        os.replace(tmp_path, path)
+
+
+class LinkupEventSource(EventSource):
+    """
+    Live speaker extraction through the Linkup structured-output API.
+
+    If the structured extraction finds nobody, the page is extracted again as a
+    markdown table (which copes better with some page layouts) and parsed into
+    the same speaker records.
+    """
+
+    name = "linkup"
+    live = True
+
+    def __init__(self, get_client: Callable[[], Any], reserve: float = 0.0):
+        """
+        Args:
+            get_client: Returns the LinkupClient to use; called on each fetch so the
+                client can be constructed lazily.
+            reserve: Seconds of a request's deadline kept for the steps after extraction.
+        """
+        self.get_client = get_client
+        self.reserve = reserve
+
+    def request_options(self, deadline=None) -> Dict[str, Any]:
+        """
+        Return the search depth and timeout to use within a deadline.
+
+        The depth is None (the client's depth policy decides) unless there is too
+        little time left for a deep search, which forces standard.
+        """
+        if deadline is None:
+            return {"depth": None, "timeout": None}
+        depth = deadline.search_depth("deep")
+        return {"depth": None if depth == "deep" else depth, "timeout": deadline.timeout(reserve=self.reserve)}
+
+    def fetch(self, event_url: str, deadline=None) -> Dict[str, Any]:
+        linkup_client = self.get_client()
+        if linkup_client is None:
+            raise RuntimeError("Linkup client is not configured")
+        response = linkup_client.extract_speakers_sharded(event_url, **self.request_options(deadline))
+        speakers = parse_structured_speakers(response)
+        if speakers or (deadline is not None and deadline.remaining() <= self.reserve):
+            return {
+                "speakers": speakers,
+                "sources": response.get("sources", []),
+                "truncated": bool(response.get("truncated"))
+            }
+
+        print("Structured extraction found no speakers, trying the markdown table extraction")
+        response = linkup_client.extract_attendees_from_url(event_url, **self.request_options(deadline))
+        return {
+            "speakers": parse_attendee_table(response),
+            "sources": response.get("sources", [])
+        }
+
+
+def parse_attendee_table(response: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Extract attendee records from the markdown table(s) in a Linkup sourcedAnswer response."""
+    return list(iter_markdown_attendees(response.get("answer") or ""))
+
+
+def parse_structured_speakers(response: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Extract the speaker list from a Linkup structured-output response.
+
+    Linkup may return the speakers at the root level or nested (possibly as a
+    JSON string) under "structuredOutput"/"structured_output".
+    """
+    if "speakers" in response:
+        return response.get("speakers") or []
+    for key in ("structuredOutput", "structured_output"):
+        if key in response:
+            structured_output = response.get(key) or {}
+            if isinstance(structured_output, str):
+                try:
+                    structured_output = json.loads(structured_output)
+                except json.JSONDecodeError:
+                    structured_output = {}
+            if isinstance(structured_output, dict):
+                return structured_output.get("speakers") or []
+            return []
+    return []
+
+
+def _read_speaker_file(path: str) -> Dict[str, Any]:
+    """Read speakers from a JSON, JSONL or CSV file."""
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, newline="" if extension == ".csv" else None) as f:
+        if extension == ".csv":
+            speakers = [
+                {key.strip().lower(): (value or "").strip() for key, value in row.items() if key}
+                for row in csv.DictReader(f)
+            ]
+            return {"speakers": speakers}
+        if extension == ".jsonl":
+            return {"speakers": [json.loads(line) for line in f if line.strip()]}
+        data = json.load(f)
+    if isinstance(data, list):
+        return {"speakers": data}
+    return data
+
+
+class EventSourceRegistry:
+    """
+    Routes event URLs to EventSources.
+
+    Patterns are registered as "host" (matches every page on that exact host) or
+    "host/path" (matches that path and anything below it). Resolution checks the
+    URL's own path, then each shorter path prefix, then the bare host - the most
+    specific registration wins and subdomains never match their parent's entries.
+    """
+
+    def __init__(
+        self,
+        fallback: Optional[EventSource] = None,
+        snapshots: Optional[SnapshotEventSource] = None
+    ):
+        """
+        Initialize the registry.
+
+        Args:
+            fallback: Source used for URLs with no registration (e.g. live Linkup).
+            snapshots: Optional snapshot store consulted before the fallback.
+        """
+        self.fallback = fallback
+        self.snapshots = snapshots
+        self._routes: Dict[str, EventSource] = {}
+
+    def register(self, url_pattern: str, source: EventSource):
+        """Register a source for a URL pattern ("host" or "host/path")."""
+        self._routes[parse_event_url(url_pattern).canonical] = source
+
+    def register_many(self, url_patterns: Iterable[str], source: EventSource):
+        """Register one source for several URL patterns."""
+        for url_pattern in url_patterns:
+            self.register(url_pattern, source)
+
+    def load_directory(self, directory: str) -> int:
+        """
+        Register every event file in a directory.
+
+        Each JSON file must declare the event URLs it covers under "urls".
+
+        Args:
+            directory: Directory containing event JSON files.
+
+        Returns:
+            Number of files registered.
+        """
+        count = 0
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith(".json"):
+                continue
+            source = FileEventSource(os.path.join(directory, filename))
+            urls = source.urls()
+            if urls:
+                self.register_many(urls, source)
+                count += 1
+        return count
+
+    def match(self, event_url: str) -> Optional[EventSource]:
+        """Return the registered source for event_url, or None if no pattern matches."""
+        parsed = parse_event_url(event_url)
+        segments = parsed.path.split("/")[1:] if parsed.path else []
+        for depth in range(len(segments), -1, -1):
+            key = parsed.host + "".join(f"/{segment}" for segment in segments[:depth])
+            source = self._routes.get(key)
+            if source is not None:
+                return source
+        return None
+
+    def resolve(self, event_url: str, refresh: bool = False) -> Optional[EventSource]:
+        """
+        Return the source to use for event_url.
+
+        Registered patterns win, then a saved snapshot (unless refresh is set),
+        then the fallback source.
+        """
+        source = self.match(event_url)
+        if source is not None:
+            return source
+        if not refresh and self.snapshots is not None and self.snapshots.has(event_url):
+            return self.snapshots
+        return self.fallback
+
+    def __len__(self) -> int:
+        return len(self._routes)
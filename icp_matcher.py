@@ -2,37 +2,53 @@
 ICP Matcher using Claude AI to analyze if event attendees match company's ideal customer profile.
 """
 import os
-import json
 from typing import Dict, List, Any, Optional
-from anthropic import Anthropic
-from dotenv import load_dotenv
 
-load_dotenv()
+from cassette import anthropic_message, open_cassette, replay_api_key
+from env_config import load_env
+from json_recovery import recover_partial_result
+from truncation_recovery import TruncationRecoveryMixin
+from tracing import model_span, record_usage
 
 
-class ICPMatcher:
+class ICPMatcher(TruncationRecoveryMixin):
     """Analyzes event attendees to determine if they match the company's ICP using Claude."""
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, cassette=None):
         """
         Initialize the ICP Matcher with Claude.
 
         Args:
             api_key: Anthropic API key. If not provided, will look for ANTHROPIC_API_KEY env variable.
+            cassette: Optional cassette.Cassette that records or replays model calls
+                (default: the one configured by CASSETTE_MODE, if any).
         """
-        self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
+        load_env()
+        self.cassette = cassette if cassette is not None else open_cassette()
+        self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY") or replay_api_key(self.cassette)
         if not self.api_key:
             raise ValueError(
                 "Anthropic API key must be provided or set in ANTHROPIC_API_KEY environment variable"
             )
 
+        # The Anthropic SDK is slow to import, so load it only when a matcher is built
+        from anthropic import Anthropic
         self.client = Anthropic(api_key=self.api_key)
 
+    def _create_message(self, **request):
+        """Create a message, through the cassette if there is one."""
+        if self.cassette is None:
+            return self.client.messages.create(**request)
+        return self.cassette.call(
+            "anthropic", request, lambda: self.client.messages.create(**request), decode=anthropic_message
+        )
+
     def analyze_icp_match(
         self,
         company_info: str,
         attendee_info: str,
-        company_name: str = "your company"
+        company_name: str = "your company",
+        already_analyzed: Optional[List[str]] = None
     ) -> Dict[str, Any]:
         """
         Analyze if event attendees match the company's ICP using Claude.
@@ -41,6 +57,8 @@ class ICPMatcher:
             company_info: Information about your company and its ICP (from Linkup).
             attendee_info: Information about event attendees (from Linkup).
             company_name: Name of your company.
+            already_analyzed: Names to skip, used to re-request only the attendees
+                missing from a truncated response.
 
         Returns:
             Dictionary containing ICP match analysis for each attendee.
@@ -106,41 +124,42 @@ Return your analysis as a structured JSON with this exact schema:
 
 Be thorough, analytical, and business-focused. Base your assessment on factual information provided."""
 
-        try:
-            message = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=4096,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ]
+        if already_analyzed:
+            prompt += (
+                "\n\nThese attendees were already analyzed - do NOT include them again, "
+                "only analyze the remaining attendees: " + "; ".join(already_analyzed)
             )
 
+        try:
+            with model_span("anthropic", "claude-sonnet-4-20250514", "analyze_icp_match") as current:
+                message = self._create_message(
+                    model="claude-sonnet-4-20250514",
+                    max_tokens=4096,
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": prompt
+                        }
+                    ]
+                )
+                record_usage(current, message)
+
             # Extract the text response
             response_text = message.content[0].text
 
-            # Try to parse as JSON
-            # Claude might wrap it in markdown code blocks, so handle that
-            response_text = response_text.strip()
-            if response_text.startswith("```json"):
-                response_text = response_text[7:]  # Remove ```json
-            if response_text.startswith("```"):
-                response_text = response_text[3:]  # Remove ```
-            if response_text.endswith("```"):
-                response_text = response_text[:-3]  # Remove trailing ```
-            response_text = response_text.strip()
-
-            try:
-                result = json.loads(response_text)
-            except json.JSONDecodeError:
-                # If JSON parsing fails, return the raw text with a warning
-                result = {
+            # Tolerate markdown fences and recover complete attendees from truncated output
+            result = recover_partial_result(response_text, array_key="attendees")
+            if result is None:
+                return {
                     "error": "Failed to parse JSON response",
                     "raw_response": response_text
                 }
 
+            if result.get("partial") and already_analyzed is None:
+                result = self._complete_partial_analysis(
+                    result, company_info, attendee_info, company_name
+                )
+
             return result
 
         except Exception as e:
@@ -190,16 +209,18 @@ Based on what you know about {company_name}"""
 Keep it concise and business-focused (3-4 paragraphs max)."""
 
         try:
-            message = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=1024,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ]
-            )
+            with model_span("anthropic", "claude-sonnet-4-20250514", "quick_company_icp") as current:
+                message = self._create_message(
+                    model="claude-sonnet-4-20250514",
+                    max_tokens=1024,
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": prompt
+                        }
+                    ]
+                )
+                record_usage(current, message)
 
             return message.content[0].text
 
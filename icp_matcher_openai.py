@@ -1,38 +1,202 @@
 """
 ICP Matcher using OpenAI to analyze if event attendees match company's ideal customer profile.
 """
+import asyncio
 import os
-import json
-from typing import Dict, List, Any, Optional
-from openai import OpenAI
-from dotenv import load_dotenv
+import re
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Any, NamedTuple, Optional
 
-load_dotenv()
+from cassette import open_cassette, openai_completion, replay_api_key
+from env_config import load_env
+from json_recovery import recover_partial_result
+from lead_ranking import BestFirstRanker
+from tracing import model_span, propagate, record_usage
+from person_scores import icp_fingerprint
+from truncation_recovery import TruncationRecoveryMixin
 
+# Bump whenever a matching prompt changes so cached results are invalidated
+PROMPT_VERSION = "2025-01-openai-v1"
 
-class ICPMatcher:
+# Follow-up requests allowed for attendees dropped from a truncated response
+MAX_RECOVERY_ROUNDS = 2
+
+# Matching under a deadline: with less than MIN_MODEL_SECONDS left attendees get
+# heuristic scores; with less than FULL_TABLE_SECONDS the table is scored in
+# parallel chunks of DEGRADED_CHUNK_SIZE so each model call finishes sooner
+MODEL_TIMEOUT = 30
+MIN_MODEL_SECONDS = 5
+FULL_TABLE_SECONDS = 45
+DEGRADED_CHUNK_SIZE = 3
+
+# Title keywords and the business value they suggest, for heuristic scores
+_SENIORITY_TIERS = (
+    (80, ("chief", "ceo", "cto", "cio", "coo", "cfo", "cpo", "ciso", "founder", "co-founder", "president", "owner")),
+    (65, ("vp", "vice president", "head", "director", "partner", "principal", "general manager")),
+    (45, ("manager", "lead", "senior", "architect", "staff")),
+)
+_STOPWORDS = frozenset(
+    "with that from their they this have need into over such more than your what when "
+    "about which also other these those using based like provides company companies".split()
+)
+
+
+def _split_table(table: str) -> tuple:
+    """Split a markdown table into (header lines, data rows)."""
+    lines = [line.strip() for line in table.splitlines() if line.strip().startswith("|")]
+    header = lines[:1]
+    rows = lines[1:]
+    if rows and set(rows[0]) <= set("|-: "):
+        header.append(rows[0])
+        rows = rows[1:]
+    return header, rows
+
+
+def _normalize_name(name: Any) -> str:
+    """Normalize a person's name for matching model output back to input rows."""
+    return " ".join(str(name or "").lower().split())
+
+
+def _row_name(row: str) -> str:
+    """Return the normalized first cell (the person's name) of a table row."""
+    cells = row.strip().strip("|").split("|")
+    return _normalize_name(cells[0]) if cells else ""
+
+
+def _row_person(row: str) -> tuple:
+    """Return the (name, company) cells of an attendee table row."""
+    cells = [cell.strip() for cell in row.strip().strip("|").split("|")]
+    return cells[0], cells[2] if len(cells) > 2 else ""
+
+
+def _keywords(text: str) -> set:
+    """Return the distinct lowercase words of 4+ letters in text, minus stopwords."""
+    return {word for word in re.findall(r"[a-z][a-z-]{3,}", (text or "").lower()) if word not in _STOPWORDS}
+
+
+def _opportunity_type(average: float) -> str:
+    """Map an average score to the matcher's opportunity buckets."""
+    if average >= 86:
+        return "Perfect"
+    if average >= 61:
+        return "Good"
+    if average >= 31:
+        return "Moderate"
+    return "Poor"
+
+
+def heuristic_scores(icp_text: str, rows: List[str]) -> List[Dict[str, Any]]:
+    """
+    Score attendee table rows without a model call, for when the deadline is too close.
+
+    Business value comes from title seniority; ICP fit from how many ICP keywords
+    appear in the title, company and background. Scores are marked with
+    "score_source": "heuristic" and are never cached.
+
+    Args:
+        icp_text: The ICP the attendees are matched against.
+        rows: Markdown table rows (Name | Role/Title | Company | Background).
+
+    Returns:
+        Attendee objects in the matcher's output format.
+    """
+    icp_words = _keywords(icp_text)
+    attendees = []
+    for row in rows:
+        cells = [cell.strip() for cell in row.strip().strip("|").split("|")]
+        name = cells[0] if cells else ""
+        title = cells[1] if len(cells) > 1 else ""
+        company = cells[2] if len(cells) > 2 else ""
+        background = " ".join(cells[3:])
+
+        business_value = 25
+        for value, terms in _SENIORITY_TIERS:
+            if any(re.search(rf"\b{re.escape(term)}\b", title.lower()) for term in terms):
+                business_value = value
+                break
+        overlap = icp_words & _keywords(f"{title} {company} {background}")
+        icp_score = min(95, 25 + 15 * len(overlap))
+
+        attendees.append({
+            "name": name,
+            "role": title,
+            "company": company,
+            "icp_match_score": icp_score,
+            "business_value_score": business_value,
+            "match_reasoning": "Estimated from title seniority and ICP keyword overlap; "
+                               "model scoring was skipped to meet the deadline.",
+            "opportunity_type": _opportunity_type((icp_score + business_value) / 2),
+            "recommended_action": "Review manually",
+            "score_source": "heuristic"
+        })
+    return attendees
+
+
+def prior_scores(icp_text: str, rows: List[str]) -> List[float]:
+    """Return a cheap 0-100 prior per attendee row: the average of its heuristic scores."""
+    return [
+        (attendee["icp_match_score"] + attendee["business_value_score"]) / 2
+        for attendee in heuristic_scores(icp_text, rows)
+    ]
+
+
+def _average_score(attendee: Dict[str, Any]) -> float:
+    try:
+        return (float(attendee.get("icp_match_score") or 0) + float(attendee.get("business_value_score") or 0)) / 2
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class _ScoringPlan(NamedTuple):
+    """Which attendee rows reuse cached scores and which still go to the model."""
+    fingerprint: Optional[str]
+    rows: List[str]
+    reused: Dict[str, Dict[str, Any]]
+    table: Optional[str]
+
+
+class ICPMatcher(TruncationRecoveryMixin):
     """Analyzes event attendees to determine if they match the company's ICP using OpenAI."""
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, score_cache=None, cassette=None):
         """
         Initialize the ICP Matcher with OpenAI.
 
         Args:
             api_key: OpenAI API key. If not provided, will look for OPENAI_API_KEY env variable.
+            score_cache: Optional person_scores.PersonScoreCache. Attendees already scored
+                against the same ICP are filled in from it instead of being re-scored.
+            cassette: Optional cassette.Cassette that records or replays model calls
+                (default: the one configured by CASSETTE_MODE, if any).
         """
-        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        load_env()
+        self.cassette = cassette if cassette is not None else open_cassette()
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY") or replay_api_key(self.cassette)
         if not self.api_key:
             raise ValueError(
                 "OpenAI API key must be provided or set in OPENAI_API_KEY environment variable"
             )
 
+        # The OpenAI SDK takes ~0.5s to import, so load it only when a matcher is built
+        from openai import OpenAI
         self.client = OpenAI(api_key=self.api_key)
+        self.score_cache = score_cache
+
+    def _complete(self, **request):
+        """Create a chat completion, through the cassette if there is one."""
+        if self.cassette is None:
+            return self.client.chat.completions.create(**request)
+        return self.cassette.call(
+            "openai", request, lambda: self.client.chat.completions.create(**request),
+            decode=openai_completion, timeout=request.get("timeout")
+        )
 
     def analyze_icp_match(
         self,
         company_info: str,
         attendee_info: str,
-        company_name: str = "your company"
+        company_name: str = "your company",
+        already_analyzed: Optional[List[str]] = None
     ) -> Dict[str, Any]:
         """
         Analyze if event attendees match the company's ICP using OpenAI.
@@ -41,6 +205,8 @@ class ICPMatcher:
             company_info: Information about your company and its ICP (from Linkup).
             attendee_info: Information about event attendees (from Linkup).
             company_name: Name of your company.
+            already_analyzed: Names to skip, used to re-request only the attendees
+                missing from a truncated response.
 
         Returns:
             Dictionary containing ICP match analysis for each attendee.
@@ -106,36 +272,48 @@ Return your analysis as a structured JSON with this exact schema:
 
 Be thorough, analytical, and business-focused. Base your assessment on factual information provided."""
 
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert sales and marketing analyst specializing in ICP analysis and lead qualification."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.7,
-                max_tokens=4096
+        if already_analyzed:
+            prompt += (
+                "\n\nThese attendees were already analyzed - do NOT include them again, "
+                "only analyze the remaining attendees: " + "; ".join(already_analyzed)
             )
 
+        try:
+            with model_span("openai", "gpt-4o", "analyze_icp_match") as current:
+                response = self._complete(
+                    model="gpt-4o",
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": "You are an expert sales and marketing analyst specializing in ICP analysis and lead qualification."
+                        },
+                        {
+                            "role": "user",
+                            "content": prompt
+                        }
+                    ],
+                    response_format={"type": "json_object"},
+                    temperature=0.7,
+                    max_tokens=4096
+                )
+                record_usage(current, response)
+
             # Extract the text response
             response_text = response.choices[0].message.content
 
-            try:
-                result = json.loads(response_text)
-            except json.JSONDecodeError:
-                # If JSON parsing fails, return the raw text with a warning
-                result = {
+            # Tolerate markdown fences and recover complete attendees from truncated output
+            result = recover_partial_result(response_text, array_key="attendees")
+            if result is None:
+                return {
                     "error": "Failed to parse JSON response",
                     "raw_response": response_text
                 }
 
+            if result.get("partial") and already_analyzed is None:
+                result = self._complete_partial_analysis(
+                    result, company_info, attendee_info, company_name
+                )
+
             return result
 
         except Exception as e:
@@ -144,28 +322,12 @@ Be thorough, analytical, and business-focused. Base your assessment on factual i
                 "details": str(e)
             }
 
-    # Hardcoded Linkup ICP for faster results
-    LINKUP_ICP = """Linkup's Ideal Customer Profile:
-- Company Size: Startups to large enterprises needing scalable API solutions
-- Target Industries: AI apps, SaaS platforms, Business Intelligence, Fintech, Legal Tech, LLM developers
-- Buyer Roles: Product Directors, CPOs, COOs, AI/ML Engineers, CTOs, Technical Founders
-- Pain Points:
-  • Need fast, accurate web search for AI grounding and fact-checking
-  • Require real-time fact-based information for AI agents
-  • CRM enrichment with verified web data
-  • Secure, compliant enterprise API solutions
-- Primary Use Cases:
-  • Powering AI agents with reliable, up-to-date data
-  • Building chatbots and answer engines with sourced information
-  • Company enrichment for lead generation and sales intelligence
-  • Deep research, due diligence, and risk analysis
-- Value Proposition: Linkup provides a search API that delivers accurate, real-time web data optimized for AI applications"""
-
     def match_companies_to_icp(
         self,
         user_icp: str,
         enriched_attendees: str,
-        company_name: str = "your company"
+        company_name: str = "your company",
+        deadline=None
     ) -> Dict[str, Any]:
         """
         Match attendee companies against the user company's ICP.
@@ -174,10 +336,273 @@ Be thorough, analytical, and business-focused. Base your assessment on factual i
             user_icp: The ICP analysis of the user's company.
             enriched_attendees: The enriched attendee data with company descriptions.
             company_name: Name of the user's company.
+            deadline: Optional deadline.Deadline. Model calls are bounded by it, and
+                attendees that cannot be scored in time get heuristic scores.
 
         Returns:
             Dictionary containing match analysis with scores and recommendations.
         """
+        no_data = self._no_data_result(enriched_attendees)
+        if no_data is not None:
+            return no_data
+
+        icp_to_use = user_icp
+        plan = self._plan_scoring(icp_to_use, enriched_attendees)
+        result = {"attendees": []}
+        if plan.table is not None and deadline is not None:
+            result = self._match_within_deadline(icp_to_use, plan.table, company_name, deadline)
+        elif plan.table is not None:
+            result = self._match_table(icp_to_use, plan.table, company_name)
+            if result.get("partial"):
+                result = self._recover_missing_attendees(result, icp_to_use, plan.table, company_name)
+        return self._apply_reused_scores(plan, result)
+
+    def match_top_k(
+        self,
+        user_icp: str,
+        enriched_attendees: str,
+        company_name: str = "your company",
+        k: int = 20,
+        deadline=None
+    ) -> Dict[str, Any]:
+        """
+        Score attendees best-first and return only the K best.
+
+        Rows are ordered by prior_scores and scored in chunks (see
+        lead_ranking.BestFirstRanker) until no remaining row can enter the top K.
+
+        Args:
+            user_icp: The ICP analysis of the user's company.
+            enriched_attendees: The enriched attendee table.
+            company_name: Name of the user's company.
+            k: Number of leads wanted.
+            deadline: Optional deadline.Deadline; once K attendees are scored,
+                no chunk is started with less than FULL_TABLE_SECONDS left.
+
+        Returns:
+            The match result for the K best attendees, with a "top_k" entry
+            describing how many attendees were scored.
+        """
+        header, rows = _split_table(enriched_attendees)
+        if not rows:
+            return self.match_companies_to_icp(user_icp, enriched_attendees, company_name, deadline)
+
+        ranker = self._top_k_ranker(user_icp, rows, k)
+        results = []
+        chunk = ranker.next_chunk()
+        while chunk:
+            result = self.match_companies_to_icp(user_icp, "\n".join(header + chunk), company_name, deadline)
+            if "error" in result:
+                if not results:
+                    return result
+                print(f"Stopping top-{k} scoring after a failed chunk: {result['error']}")
+                break
+            results.append(result)
+            ranker.add(result.get("attendees", []))
+            if self._top_k_out_of_time(ranker, deadline):
+                break
+            chunk = ranker.next_chunk()
+        return self._top_k_result(ranker, results)
+
+    @staticmethod
+    def _top_k_ranker(user_icp: str, rows: List[str], k: int) -> BestFirstRanker:
+        return BestFirstRanker(rows, prior_scores(user_icp, rows), k, score_of=_average_score)
+
+    @staticmethod
+    def _top_k_out_of_time(ranker: BestFirstRanker, deadline) -> bool:
+        """True if the deadline leaves no time for another chunk once K attendees are scored."""
+        if deadline is None or ranker.kth_best() is None or ranker.settled():
+            return False
+        if deadline.remaining() < FULL_TABLE_SECONDS:
+            deadline.degrade("top-K scoring stopped before every candidate was ruled out")
+            return True
+        return False
+
+    def _top_k_result(self, ranker: BestFirstRanker, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Combine the chunk results into one result holding the K best attendees."""
+        attendees = ranker.top()
+        stats = ranker.stats()
+        print(
+            f"Top {stats['k']}: scored {stats['scored']} of {stats['candidates']} attendees in {stats['model_calls']} calls"
+            + (" (approximate)" if stats["approximate"] else "")
+        )
+        result = {
+            "summary": self.summarize_matches(attendees),
+            "attendees": attendees,
+            "top_k": stats,
+        }
+        for key in ("overall_event_assessment", "recommendations"):
+            value = next((r[key] for r in results if r.get(key)), None)
+            if value:
+                result[key] = value
+        heuristic = [a["name"] for a in attendees if a.get("score_source") == "heuristic"]
+        if heuristic:
+            result["heuristic_attendees"] = heuristic
+        return result
+
+    def _match_within_deadline(
+        self,
+        icp_to_use: str,
+        enriched_attendees: str,
+        company_name: str,
+        deadline
+    ) -> Dict[str, Any]:
+        """Score a table in chunks sized to the time left; rows not scored in time get heuristic scores."""
+        header, rows = _split_table(enriched_attendees)
+        if not rows:
+            return self._match_chunk(icp_to_use, enriched_attendees, company_name, deadline)
+
+        chunks = self._deadline_chunks(rows, deadline)
+        results = []
+        finished = True
+        if chunks:
+            pool = ThreadPoolExecutor(max_workers=len(chunks), thread_name_prefix="icp-match")
+            futures = [
+                pool.submit(propagate(self._match_chunk), icp_to_use, "\n".join(header + chunk), company_name, deadline)
+                for chunk in chunks
+            ]
+            done, not_done = wait(futures, timeout=deadline.remaining())
+            # Calls still running are bounded by the deadline; don't wait for them
+            pool.shutdown(wait=False, cancel_futures=True)
+            results = [future.result() for future in futures if future in done]
+            finished = not not_done
+        return self._merge_deadline_results(icp_to_use, rows, results, finished, deadline)
+
+    def _match_chunk(self, icp_to_use: str, table: str, company_name: str, deadline) -> Dict[str, Any]:
+        """Score one chunk, re-requesting the attendees a truncated response dropped while time is left."""
+        result = self._match_table(icp_to_use, table, company_name, deadline)
+        if result.get("partial"):
+            result = self._recover_missing_attendees(result, icp_to_use, table, company_name, deadline)
+        return result
+
+    @staticmethod
+    def _deadline_chunks(rows: List[str], deadline) -> List[List[str]]:
+        """Split rows into the chunks to score with the time left (none if there is no time)."""
+        remaining = deadline.remaining()
+        if remaining < MIN_MODEL_SECONDS:
+            deadline.degrade("heuristic scores instead of model scoring")
+            return []
+        if remaining < FULL_TABLE_SECONDS and len(rows) > DEGRADED_CHUNK_SIZE:
+            deadline.degrade(f"attendees scored in parallel chunks of {DEGRADED_CHUNK_SIZE}")
+            return [rows[i:i + DEGRADED_CHUNK_SIZE] for i in range(0, len(rows), DEGRADED_CHUNK_SIZE)]
+        return [rows]
+
+    def _merge_deadline_results(
+        self,
+        icp_to_use: str,
+        rows: List[str],
+        results: List[Dict[str, Any]],
+        finished: bool,
+        deadline
+    ) -> Dict[str, Any]:
+        """
+        Combine chunk results and fill the rows they missed with heuristic scores.
+
+        The deadline is only marked degraded if rows were missed for lack of time
+        (a chunk did not finish, or too little time was left to recover them).
+        """
+        attendees = []
+        scored = set()
+        assessment = None
+        errors = []
+        for result in results:
+            if "error" in result:
+                errors.append(result)
+                continue
+            for attendee in result.get("attendees", []):
+                key = _normalize_name(attendee.get("name"))
+                if key not in scored:
+                    scored.add(key)
+                    attendees.append(attendee)
+            assessment = assessment or result.get("overall_event_assessment")
+
+        # Every call failed with time to spare: a real error (e.g. auth), not the deadline
+        if errors and not attendees and finished and deadline.remaining() >= MIN_MODEL_SECONDS:
+            return errors[0]
+
+        missing = [row for row in rows if _row_name(row) not in scored]
+        if missing:
+            if not finished or deadline.remaining() < MIN_MODEL_SECONDS:
+                deadline.degrade("heuristic scores for attendees not scored in time")
+            attendees.extend(heuristic_scores(icp_to_use, missing))
+
+        result = {
+            "summary": self.summarize_matches(attendees),
+            "attendees": attendees,
+            "overall_event_assessment": assessment or "Scored with heuristics to meet the request deadline."
+        }
+        if missing:
+            result["heuristic_attendees"] = [_row_person(row)[0] for row in missing]
+        return result
+
+    def _plan_scoring(self, icp_to_use: str, enriched_attendees: str) -> _ScoringPlan:
+        """Look up every attendee row in the score cache; the rest are left to score."""
+        if self.score_cache is None:
+            return _ScoringPlan(None, [], {}, enriched_attendees)
+        header, rows = _split_table(enriched_attendees)
+        if not rows:
+            return _ScoringPlan(None, [], {}, enriched_attendees)
+
+        fingerprint = icp_fingerprint(icp_to_use)
+        reused = {}
+        to_score = []
+        for row in rows:
+            name, company = _row_person(row)
+            cached = self.score_cache.get(name, company, fingerprint)
+            if cached is not None:
+                reused[_normalize_name(name)] = cached
+            else:
+                to_score.append(row)
+
+        if reused:
+            print(f"Reusing {len(reused)} cached attendee scores, scoring {len(to_score)} new attendees")
+        table = "\n".join(header + to_score) if to_score else None
+        return _ScoringPlan(fingerprint, rows, reused, table)
+
+    def _apply_reused_scores(self, plan: _ScoringPlan, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Cache newly scored attendees and merge in the reused ones, in input order."""
+        if plan.fingerprint is None or "error" in result:
+            return result
+
+        people = {_row_name(row): _row_person(row) for row in plan.rows}
+        for attendee in result.get("attendees", []):
+            key = _normalize_name(attendee.get("name"))
+            if attendee.get("score_source") == "heuristic":
+                continue
+            if key in people and key not in plan.reused:
+                name, company = people[key]
+                self.score_cache.set(name, company, plan.fingerprint, attendee)
+
+        if not plan.reused:
+            return result
+
+        scored = {}
+        for attendee in result.get("attendees", []):
+            scored.setdefault(_normalize_name(attendee.get("name")), attendee)
+        attendees = []
+        seen = set()
+        for row in plan.rows:
+            key = _row_name(row)
+            attendee = plan.reused.get(key) or scored.get(key)
+            if attendee is not None and key not in seen:
+                seen.add(key)
+                attendees.append(attendee)
+        attendees.extend(a for key, a in scored.items() if key not in seen)
+
+        result["attendees"] = attendees
+        result["summary"] = self.summarize_matches(attendees)
+        result["reused_scores"] = len(plan.reused)
+        if not result.get("overall_event_assessment"):
+            summary = result["summary"]
+            result["overall_event_assessment"] = (
+                f"{summary['perfect_matches'] + summary['good_matches']} of {len(attendees)} "
+                "attendees are Perfect or Good matches (scores reused from earlier analyses)."
+            )
+        return result
+
+    @staticmethod
+    def _no_data_result(enriched_attendees: str) -> Optional[Dict[str, Any]]:
+        """Return the empty result for attendee data that holds no people, else None."""
         # Check if we actually have attendee data
         no_data_phrases = [
             "no individuals found",
@@ -188,7 +613,13 @@ Be thorough, analytical, and business-focused. Base your assessment on factual i
             "cannot be found"
         ]
 
-        if len(enriched_attendees) < 200 or any(phrase in enriched_attendees.lower() for phrase in no_data_phrases):
+        # Free-text answers are checked for "no data" phrasing; a markdown table with
+        # rows always counts as data, however short (e.g. the last import chunk)
+        _, rows = _split_table(enriched_attendees)
+        no_data = len(enriched_attendees) < 200 or any(
+            phrase in enriched_attendees.lower() for phrase in no_data_phrases
+        )
+        if not rows and no_data:
             return {
                 "summary": {
                     "total_attendees_analyzed": 0,
@@ -205,11 +636,51 @@ Be thorough, analytical, and business-focused. Base your assessment on factual i
                     "Consider using event platforms that display public RSVPs (some Eventbrite or Luma events)"
                 ]
             }
+        return None
+
+    def _match_table(
+        self,
+        icp_to_use: str,
+        enriched_attendees: str,
+        company_name: str,
+        deadline=None
+    ) -> Dict[str, Any]:
+        """
+        Score one attendee table against the ICP with a single model call.
 
-        # Use hardcoded ICP for Linkup, dynamic ICP for others
-        is_linkup = company_name.lower() in ["linkup", "linkup.so", "linkup api"]
-        icp_to_use = self.LINKUP_ICP if is_linkup else user_icp
+        Returns the parsed result. If the response was truncated or malformed, the
+        complete attendee objects are recovered and the result is marked "partial".
+        With a deadline, each attempt's timeout is bounded by the time left.
+        """
+        request = self._match_request(icp_to_use, enriched_attendees, company_name)
+
+        # Retry logic for connection errors (common on serverless)
+        max_retries = 3
+        last_error = None
+
+        for attempt in range(max_retries):
+            try:
+                if deadline is not None:
+                    request["timeout"] = deadline.timeout(cap=MODEL_TIMEOUT)
+                with model_span("openai", request["model"], "match", attempt=attempt) as current:
+                    response = self._complete(**request)
+                    record_usage(current, response)
+                return self._parse_match_response(response.choices[0].message.content)
+
+            except Exception as e:
+                last_error = e
+                if attempt < max_retries - 1 and (deadline is None or deadline.remaining() >= MIN_MODEL_SECONDS):
+                    import time
+                    time.sleep(0.5)  # Quick retry for serverless
+                    continue
+                break
 
+        # If all retries failed, return error
+        return self._match_error(last_error)
+
+    @staticmethod
+    def _match_request(icp_to_use: str, enriched_attendees: str, company_name: str) -> Dict[str, Any]:
+        """Return the chat completion arguments for scoring one attendee table."""
         prompt = f"""You are an expert sales and marketing analyst. Your task is to analyze the attendees and their companies from an event and determine which ones are a good match for {company_name}'s Ideal Customer Profile (ICP).
 
 IMPORTANT: Only analyze people who are actually mentioned in the Event Attendees data below. Do NOT make up or hallucinate any attendees. If no attendees are listed, return an empty attendees array.
@@ -273,54 +744,149 @@ Return your analysis as a structured JSON. CRITICAL: Include ALL attendees from
 
 You MUST analyze every single person. Do not truncate or skip anyone."""
 
-        # Retry logic for connection errors (common on serverless)
-        max_retries = 3
-        last_error = None
+        return {
+            "model": "gpt-4o-mini",
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "You are an expert sales and marketing analyst specializing in ICP analysis and lead qualification."
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            "response_format": {"type": "json_object"},
+            "temperature": 0.5,  # Lower temp for faster, more deterministic responses
+            "max_tokens": 4000,  # Reduced for faster response with fewer speakers
+            "timeout": MODEL_TIMEOUT  # 30 second timeout for Vercel compatibility
+        }
 
-        for attempt in range(max_retries):
-            try:
-                response = self.client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": "You are an expert sales and marketing analyst specializing in ICP analysis and lead qualification."
-                        },
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ],
-                    response_format={"type": "json_object"},
-                    temperature=0.5,  # Lower temp for faster, more deterministic responses
-                    max_tokens=4000,  # Reduced for faster response with fewer speakers
-                    timeout=30  # 30 second timeout for Vercel compatibility
-                )
+    @staticmethod
+    def _parse_match_response(response_text: str) -> Dict[str, Any]:
+        """Parse a scoring response, recovering complete attendees from truncated output."""
+        result = recover_partial_result(response_text, array_key="attendees")
+        if result is None:
+            result = {
+                "error": "Failed to parse JSON response",
+                "raw_response": response_text
+            }
+        return result
 
-                response_text = response.choices[0].message.content
+    @staticmethod
+    def _match_error(error: Exception) -> Dict[str, Any]:
+        """Return the error result once every retry failed."""
+        return {
+            "error": f"Failed to match companies to ICP: {str(error)}",
+            "details": str(error)
+        }
 
-                try:
-                    result = json.loads(response_text)
-                except json.JSONDecodeError:
-                    result = {
-                        "error": "Failed to parse JSON response",
-                        "raw_response": response_text
-                    }
+    def _recover_missing_attendees(
+        self,
+        result: Dict[str, Any],
+        icp_to_use: str,
+        enriched_attendees: str,
+        company_name: str,
+        deadline=None
+    ) -> Dict[str, Any]:
+        """
+        Re-request only the attendees missing from a partial (truncated) response.
 
-                return result
+        Args:
+            result: Partial result holding the recovered attendee objects.
+            icp_to_use: The ICP text used for the original request.
+            enriched_attendees: The original attendee table.
+            company_name: Name of the user's company.
+            deadline: Optional deadline.Deadline bounding the follow-up calls; no
+                follow-up is started with less than MIN_MODEL_SECONDS left.
 
-            except Exception as e:
-                last_error = e
-                if attempt < max_retries - 1:
-                    import time
-                    time.sleep(0.5)  # Quick retry for serverless
-                    continue
+        Returns:
+            The merged result with a recomputed summary. If some attendees could still
+            not be scored, "partial" stays True and their names are listed in
+            "missing_attendees".
+        """
+        attendees = list(result.get("attendees", []))
+        header, rows = _split_table(enriched_attendees)
+        scored = {_normalize_name(a.get("name")) for a in attendees}
+        missing = [row for row in rows if _row_name(row) not in scored]
+
+        for _ in range(MAX_RECOVERY_ROUNDS):
+            if not missing:
+                break
+            if deadline is not None and deadline.remaining() < MIN_MODEL_SECONDS:
+                break
+            print(f"Recovering {len(missing)} attendees missing from a truncated response...")
+            follow_up = self._match_table(icp_to_use, "\n".join(header + missing), company_name, deadline)
+            if "error" in follow_up:
                 break
+            missing = self._merge_follow_up(result, attendees, scored, missing, follow_up)
 
-        # If all retries failed, return error
+        return self._finish_recovery(result, attendees, missing)
+
+    @staticmethod
+    def _merge_follow_up(
+        result: Dict[str, Any],
+        attendees: List[Dict[str, Any]],
+        scored: set,
+        missing: List[str],
+        follow_up: Dict[str, Any]
+    ) -> List[str]:
+        """Add newly scored attendees from a follow-up call; return the rows still missing."""
+        for attendee in follow_up.get("attendees", []):
+            key = _normalize_name(attendee.get("name"))
+            if key not in scored:
+                scored.add(key)
+                attendees.append(attendee)
+        if not result.get("overall_event_assessment") and follow_up.get("overall_event_assessment"):
+            result["overall_event_assessment"] = follow_up["overall_event_assessment"]
+        return [row for row in missing if _row_name(row) not in scored]
+
+    def _finish_recovery(
+        self,
+        result: Dict[str, Any],
+        attendees: List[Dict[str, Any]],
+        missing: List[str]
+    ) -> Dict[str, Any]:
+        """Store the merged attendees and summary, listing any still missing."""
+        result["attendees"] = attendees
+        result["summary"] = self.summarize_matches(attendees)
+        result.setdefault(
+            "overall_event_assessment",
+            "Analysis recovered from a truncated model response."
+        )
+        result["partial"] = bool(missing)
+        if missing:
+            result["missing_attendees"] = [
+                row.strip().strip("|").split("|")[0].strip() for row in missing
+            ]
+        return result
+
+    @classmethod
+    def heuristic_match(cls, user_icp: str, enriched_attendees: str) -> Dict[str, Any]:
+        """Score a whole attendee table with heuristics (no model call), in the matcher's format."""
+        _, rows = _split_table(enriched_attendees)
+        attendees = heuristic_scores(user_icp, rows)
+        return {
+            "summary": cls.summarize_matches(attendees),
+            "attendees": attendees,
+            "overall_event_assessment": "Scored with heuristics to meet the request deadline.",
+            "heuristic_attendees": [attendee["name"] for attendee in attendees]
+        }
+
+    @staticmethod
+    def summarize_matches(attendees: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Recompute the match summary from a list of scored attendees."""
+        counts = {"Perfect": 0, "Good": 0, "Moderate": 0, "Poor": 0}
+        for attendee in attendees:
+            opportunity = attendee.get("opportunity_type")
+            if opportunity in counts:
+                counts[opportunity] += 1
         return {
-            "error": f"Failed to match companies to ICP: {str(last_error)}",
-            "details": str(last_error)
+            "total_attendees_analyzed": len(attendees),
+            "perfect_matches": counts["Perfect"],
+            "good_matches": counts["Good"],
+            "moderate_matches": counts["Moderate"],
+            "poor_matches": counts["Poor"]
         }
 
     def quick_company_icp_analysis(
@@ -364,23 +930,206 @@ Based on what you know about {company_name}"""
 Keep it concise and business-focused (3-4 paragraphs max)."""
 
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert in B2B sales and ICP definition."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.7,
-                max_tokens=1024
-            )
+            with model_span("openai", "gpt-4o", "quick_company_icp") as current:
+                response = self._complete(
+                    model="gpt-4o",
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": "You are an expert in B2B sales and ICP definition."
+                        },
+                        {
+                            "role": "user",
+                            "content": prompt
+                        }
+                    ],
+                    temperature=0.7,
+                    max_tokens=1024
+                )
+                record_usage(current, response)
 
             return response.choices[0].message.content
 
         except Exception as e:
             return f"Error generating ICP analysis: {str(e)}"
+
+
+class AsyncICPMatcher(ICPMatcher):
+    """
+    ICP matcher for asyncio code (the ASGI app).
+
+    Uses the same prompts and response handling as ICPMatcher, sent through the
+    AsyncOpenAI client so many matches can wait on the model from one thread.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, score_cache=None, cassette=None):
+        """
+        Initialize the async ICP Matcher.
+
+        Args:
+            api_key: OpenAI API key. If not provided, will look for OPENAI_API_KEY env variable.
+            score_cache: Optional person_scores.PersonScoreCache (see ICPMatcher).
+            cassette: Optional cassette.Cassette (see ICPMatcher).
+        """
+        super().__init__(api_key=api_key, score_cache=score_cache, cassette=cassette)
+        from openai import AsyncOpenAI
+        self.async_client = AsyncOpenAI(api_key=self.api_key)
+
+    async def _acomplete(self, **request):
+        """Async version of _complete."""
+        if self.cassette is None:
+            return await self.async_client.chat.completions.create(**request)
+        return await self.cassette.acall(
+            "openai", request, lambda: self.async_client.chat.completions.create(**request),
+            decode=openai_completion, timeout=request.get("timeout")
+        )
+
+    async def amatch_companies_to_icp(
+        self,
+        user_icp: str,
+        enriched_attendees: str,
+        company_name: str = "your company",
+        deadline=None
+    ) -> Dict[str, Any]:
+        """Async version of match_companies_to_icp."""
+        no_data = self._no_data_result(enriched_attendees)
+        if no_data is not None:
+            return no_data
+
+        icp_to_use = user_icp
+        # Score cache lookups may read the shared SQLite store, so they run on the default thread pool
+        plan = await asyncio.to_thread(self._plan_scoring, icp_to_use, enriched_attendees)
+        result = {"attendees": []}
+        if plan.table is not None and deadline is not None:
+            result = await self._amatch_within_deadline(icp_to_use, plan.table, company_name, deadline)
+        elif plan.table is not None:
+            result = await self._amatch_table(icp_to_use, plan.table, company_name)
+            if result.get("partial"):
+                result = await self._arecover_missing_attendees(result, icp_to_use, plan.table, company_name)
+        if plan.fingerprint is None:
+            return self._apply_reused_scores(plan, result)
+        return await asyncio.to_thread(self._apply_reused_scores, plan, result)
+
+    async def amatch_top_k(
+        self,
+        user_icp: str,
+        enriched_attendees: str,
+        company_name: str = "your company",
+        k: int = 20,
+        deadline=None
+    ) -> Dict[str, Any]:
+        """Async version of match_top_k."""
+        header, rows = _split_table(enriched_attendees)
+        if not rows:
+            return await self.amatch_companies_to_icp(user_icp, enriched_attendees, company_name, deadline)
+
+        ranker = self._top_k_ranker(user_icp, rows, k)
+        results = []
+        chunk = ranker.next_chunk()
+        while chunk:
+            result = await self.amatch_companies_to_icp(user_icp, "\n".join(header + chunk), company_name, deadline)
+            if "error" in result:
+                if not results:
+                    return result
+                print(f"Stopping top-{k} scoring after a failed chunk: {result['error']}")
+                break
+            results.append(result)
+            ranker.add(result.get("attendees", []))
+            if self._top_k_out_of_time(ranker, deadline):
+                break
+            chunk = ranker.next_chunk()
+        return self._top_k_result(ranker, results)
+
+    async def _amatch_within_deadline(
+        self,
+        icp_to_use: str,
+        enriched_attendees: str,
+        company_name: str,
+        deadline
+    ) -> Dict[str, Any]:
+        """Async version of _match_within_deadline."""
+        header, rows = _split_table(enriched_attendees)
+        if not rows:
+            return await self._amatch_chunk(icp_to_use, enriched_attendees, company_name, deadline)
+
+        chunks = self._deadline_chunks(rows, deadline)
+        results = []
+        finished = True
+        if chunks:
+            tasks = [
+                asyncio.ensure_future(
+                    self._amatch_chunk(icp_to_use, "\n".join(header + chunk), company_name, deadline)
+                )
+                for chunk in chunks
+            ]
+            done, pending = await asyncio.wait(tasks, timeout=deadline.remaining())
+            for task in pending:
+                task.cancel()
+            results = [task.result() for task in tasks if task in done]
+            finished = not pending
+        return self._merge_deadline_results(icp_to_use, rows, results, finished, deadline)
+
+    async def _amatch_chunk(self, icp_to_use: str, table: str, company_name: str, deadline) -> Dict[str, Any]:
+        """Async version of _match_chunk."""
+        result = await self._amatch_table(icp_to_use, table, company_name, deadline)
+        if result.get("partial"):
+            result = await self._arecover_missing_attendees(result, icp_to_use, table, company_name, deadline)
+        return result
+
+    async def _amatch_table(
+        self,
+        icp_to_use: str,
+        enriched_attendees: str,
+        company_name: str,
+        deadline=None
+    ) -> Dict[str, Any]:
+        """Async version of _match_table."""
+        request = self._match_request(icp_to_use, enriched_attendees, company_name)
+
+        max_retries = 3
+        last_error = None
+
+        for attempt in range(max_retries):
+            try:
+                if deadline is not None:
+                    request["timeout"] = deadline.timeout(cap=MODEL_TIMEOUT)
+                with model_span("openai", request["model"], "match", attempt=attempt) as current:
+                    response = await self._acomplete(**request)
+                    record_usage(current, response)
+                return self._parse_match_response(response.choices[0].message.content)
+
+            except Exception as e:
+                last_error = e
+                if attempt < max_retries - 1 and (deadline is None or deadline.remaining() >= MIN_MODEL_SECONDS):
+                    await asyncio.sleep(0.5)
+                    continue
+                break
+
+        return self._match_error(last_error)
+
+    async def _arecover_missing_attendees(
+        self,
+        result: Dict[str, Any],
+        icp_to_use: str,
+        enriched_attendees: str,
+        company_name: str,
+        deadline=None
+    ) -> Dict[str, Any]:
+        """Async version of _recover_missing_attendees."""
+        attendees = list(result.get("attendees", []))
+        header, rows = _split_table(enriched_attendees)
+        scored = {_normalize_name(a.get("name")) for a in attendees}
+        missing = [row for row in rows if _row_name(row) not in scored]
+
+        for _ in range(MAX_RECOVERY_ROUNDS):
+            if not missing:
+                break
+            if deadline is not None and deadline.remaining() < MIN_MODEL_SECONDS:
+                break
+            print(f"Recovering {len(missing)} attendees missing from a truncated response...")
+            follow_up = await self._amatch_table(icp_to_use, "\n".join(header + missing), company_name, deadline)
+            if "error" in follow_up:
+                break
+            missing = self._merge_follow_up(result, attendees, scored, missing, follow_up)
+
+        return self._finish_recovery(result, attendees, missing)
@@ -0,0 +1,260 @@
+"""
+Stored, named and versioned ICP profiles.
+
+A company's ICP changes rarely, so it is generated once (from Linkup research or
+written by hand), stored under an id, edited as new versions, and referenced by
+id instead of being re-researched on every analysis. Every version carries a
+content fingerprint (person_scores.icp_fingerprint) that caches key on.
+"""
+import json
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from person_scores import icp_fingerprint
+
+# Hardcoded Linkup ICP, served as the built-in "linkup" profile
+LINKUP_ICP = """Linkup's Ideal Customer Profile:
+- Company Size: Startups to large enterprises needing scalable API solutions
+- Target Industries: AI apps, SaaS platforms, Business Intelligence, Fintech, Legal Tech, LLM developers
+- Buyer Roles: Product Directors, CPOs, COOs, AI/ML Engineers, CTOs, Technical Founders
+- Pain Points:
+  • Need fast, accurate web search for AI grounding and fact-checking
+  • Require real-time fact-based information for AI agents
+  • CRM enrichment with verified web data
+  • Secure, compliant enterprise API solutions
+- Primary Use Cases:
+  • Powering AI agents with reliable, up-to-date data
+  • Building chatbots and answer engines with sourced information
+  • Company enrichment for lead generation and sales intelligence
+  • Deep research, due diligence, and risk analysis
+- Value Proposition: Linkup provides a search API that delivers accurate, real-time web data optimized for AI applications"""
+
+# Profiles available without a store file. Company names in "aliases" use the
+# profile automatically when no profile id is given.
+BUILTIN_PROFILES = {
+    "linkup": {
+        "name": "Linkup",
+        "company_name": "Linkup",
+        "company_url": "https://linkup.so",
+        "aliases": ["linkup", "linkup.so", "linkup api"],
+        "icp": LINKUP_ICP,
+    },
+}
+
+
+def profile_id_for(name: str) -> str:
+    """Return the id for a profile name (lowercase slug, e.g. "Acme Corp" -> "acme-corp")."""
+    return re.sub(r"[^a-z0-9]+", "-", (name or "").lower()).strip("-") or "profile"
+
+
+def _version_entry(version: int, icp: str, sources: Optional[List[Any]], source: str) -> Dict[str, Any]:
+    return {
+        "version": version,
+        "icp": icp,
+        "fingerprint": icp_fingerprint(icp),
+        "sources": sources or [],
+        "source": source,
+        "created_at": datetime.now().isoformat(),
+    }
+
+
+class ICPProfileStore:
+    """
+    JSON file of ICP profiles, each with a history of versions.
+
+    The file is re-read when another process changes it, and written atomically.
+    """
+
+    def __init__(self, path: Optional[str]):
+        """
+        Initialize the store.
+
+        Args:
+            path: JSON file holding the profiles (created on first save). With no
+                path, only the built-in profiles are available and saves fail.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._profiles: Dict[str, Dict[str, Any]] = {}
+        self._mtime = None
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Return all profiles, reloading the file if it changed. Call with the lock held."""
+        mtime = os.path.getmtime(self.path) if self.path and os.path.exists(self.path) else None
+        if self._profiles and mtime == self._mtime:
+            return self._profiles
+
+        profiles = {}
+        for profile_id, builtin in BUILTIN_PROFILES.items():
+            profiles[profile_id] = {
+                "id": profile_id,
+                "name": builtin["name"],
+                "company_name": builtin["company_name"],
+                "company_url": builtin["company_url"],
+                "aliases": builtin["aliases"],
+                "builtin": True,
+                "versions": [_version_entry(1, builtin["icp"], [], "builtin")],
+            }
+        if mtime is not None:
+            with open(self.path) as f:
+                profiles.update(json.load(f).get("profiles", {}))
+        self._profiles = profiles
+        self._mtime = mtime
+        return profiles
+
+    def _save(self):
+        """Write every non-built-in profile. Call with the lock held."""
+        if not self.path:
+            raise ValueError("No ICP profile store configured (set ICP_PROFILES_PATH)")
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        stored = {pid: p for pid, p in self._profiles.items() if not p.get("builtin")}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"profiles": stored}, f, indent=2)
+        os.replace(tmp_path, self.path)
+        self._mtime = os.path.getmtime(self.path)
+
+    @staticmethod
+    def _view(profile: Dict[str, Any], entry: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": profile["id"],
+            "name": profile["name"],
+            "company_name": profile.get("company_name"),
+            "company_url": profile.get("company_url"),
+            "builtin": bool(profile.get("builtin")),
+            "latest_version": profile["versions"][-1]["version"],
+            **entry,
+        }
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Return the latest version of every profile, without the ICP text."""
+        with self._lock:
+            profiles = list(self._load().values())
+        summaries = []
+        for profile in profiles:
+            view = self._view(profile, profile["versions"][-1])
+            view.pop("icp")
+            view.pop("sources")
+            summaries.append(view)
+        return sorted(summaries, key=lambda p: p["id"])
+
+    def get(self, profile_id: str, version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Look up a profile.
+
+        Args:
+            profile_id: Profile id.
+            version: Version number (default: the latest).
+
+        Returns:
+            The profile fields merged with the version's icp, fingerprint, sources
+            and created_at, or None if the profile or version does not exist.
+        """
+        with self._lock:
+            profile = self._load().get(profile_id)
+        if profile is None:
+            return None
+        if version is None:
+            return self._view(profile, profile["versions"][-1])
+        for entry in profile["versions"]:
+            if entry["version"] == version:
+                return self._view(profile, entry)
+        return None
+
+    def history(self, profile_id: str) -> List[Dict[str, Any]]:
+        """Return version, fingerprint, source and created_at for every version of a profile."""
+        with self._lock:
+            profile = self._load().get(profile_id)
+        if profile is None:
+            return []
+        return [
+            {key: entry[key] for key in ("version", "fingerprint", "source", "created_at")}
+            for entry in profile["versions"]
+        ]
+
+    def find_by_company(self, company_name: str) -> Optional[Dict[str, Any]]:
+        """Return the latest version of the profile whose aliases include company_name."""
+        normalized = (company_name or "").strip().lower()
+        with self._lock:
+            profiles = list(self._load().values())
+        for profile in profiles:
+            if normalized in profile.get("aliases", []):
+                return self._view(profile, profile["versions"][-1])
+        return None
+
+    def save(
+        self,
+        name: str,
+        icp: str,
+        company_name: Optional[str] = None,
+        company_url: Optional[str] = None,
+        sources: Optional[List[Any]] = None,
+        source: str = "manual",
+        profile_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Create a profile, or add a version to an existing one.
+
+        A new version is only added if the ICP text changed (by fingerprint).
+
+        Args:
+            name: Display name (also used to derive the id of a new profile).
+            icp: ICP text.
+            company_name: Company the ICP describes.
+            company_url: Company website.
+            sources: Sources the ICP was generated from.
+            source: How the ICP was produced ("linkup", "claude", "manual", ...).
+            profile_id: Id of the profile to update (default: derived from name).
+
+        Returns:
+            The saved (latest) version of the profile.
+        """
+        if not (icp or "").strip():
+            raise ValueError("ICP text must not be empty")
+        profile_id = profile_id or profile_id_for(name)
+        with self._lock:
+            profiles = self._load()
+            profile = profiles.get(profile_id)
+            if profile is None:
+                profile = {
+                    "id": profile_id,
+                    "name": name or profile_id,
+                    "company_name": company_name or name,
+                    "company_url": company_url,
+                    "aliases": [],
+                    "versions": [],
+                }
+                profiles[profile_id] = profile
+            else:
+                profile["company_name"] = company_name or profile.get("company_name")
+                profile["company_url"] = company_url or profile.get("company_url")
+
+            latest = profile["versions"][-1] if profile["versions"] else None
+            if latest is None or latest["fingerprint"] != icp_fingerprint(icp):
+                number = latest["version"] + 1 if latest else 1
+                profile["versions"].append(_version_entry(number, icp, sources, source))
+                # An edited built-in profile is stored like any other
+                profile.pop("builtin", None)
+                self._save()
+            return self._view(profile, profile["versions"][-1])
+
+    def delete(self, profile_id: str) -> bool:
+        """
+        Delete a stored profile. Built-in profiles revert to their original text.
+
+        Returns:
+            True if a stored profile was removed.
+        """
+        with self._lock:
+            profiles = self._load()
+            profile = profiles.get(profile_id)
+            if profile is None or profile.get("builtin"):
+                return False
+            del profiles[profile_id]
+            self._save()
+            # Reload so a deleted override of a built-in profile falls back to the original
+            self._profiles = {}
+            return True
@@ -0,0 +1,105 @@
+"""
+Import-time and cold-start profile report for the web app.
+
+Runs a fresh interpreter with `python -X importtime`, then reports the slowest
+imports and the time to serve the first /api/health request, the way a
+serverless cold start would.
+
+Usage:
+    python import_profile.py [--module app] [--top 15]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Executed in a fresh interpreter: import the module, then time the first health check
+_COLD_START_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+module = __import__({module!r})
+imported = time.perf_counter()
+result = {{"import_ms": (imported - start) * 1000}}
+app = getattr(module, "app", None)
+if app is not None and hasattr(app, "test_client"):
+    response = app.test_client().get("/api/health")
+    result["first_health_ms"] = (time.perf_counter() - imported) * 1000
+    result["health_status"] = response.status_code
+result["heavy_sdks_loaded"] = sorted(m for m in ("openai", "anthropic", "requests") if m in sys.modules)
+print(json.dumps(result))
+"""
+
+
+def parse_importtime(stderr: str) -> list:
+    """
+    Parse `-X importtime` output.
+
+    Returns:
+        List of (cumulative_us, self_us, module) tuples.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        try:
+            self_us, cumulative_us, module = line[len("import time:"):].split("|", 2)
+            rows.append((int(cumulative_us), int(self_us), module.rstrip()))
+        except ValueError:
+            continue
+    return rows
+
+
+def profile(module: str = "app") -> dict:
+    """
+    Profile a cold import of module in a fresh interpreter.
+
+    Args:
+        module: Module to import (default: the Flask app).
+
+    Returns:
+        Dictionary with per-module import rows and cold-start timings.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _COLD_START_SCRIPT.format(module=module)],
+        cwd=here,
+        capture_output=True,
+        text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+
+    timings = json.loads(completed.stdout.strip().splitlines()[-1])
+    return {"imports": parse_importtime(completed.stderr), **timings}
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description="Report import time and cold-start latency.")
+    parser.add_argument("--module", default="app", help="Module to profile (default: app)")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to show")
+    args = parser.parse_args()
+
+    report = profile(args.module)
+
+    print(f"\n{'='*70}")
+    print(f"Cold start profile: import {args.module}")
+    print(f"{'='*70}\n")
+    print(f"Import time:        {report['import_ms']:.1f} ms")
+    if "first_health_ms" in report:
+        print(f"First /api/health:  {report['first_health_ms']:.1f} ms (status {report['health_status']})")
+    print(f"Heavy SDKs loaded:  {', '.join(report['heavy_sdks_loaded']) or 'none'}")
+
+    # Top-level imports and their direct imports only (importtime indents nested
+    # modules by two spaces per level), so deep submodules don't crowd the list
+    shallow = [row for row in report["imports"] if len(row[2]) - len(row[2].lstrip()) <= 3]
+    print("\nSlowest imports (cumulative ms / self ms):")
+    for cumulative_us, self_us, name in sorted(shallow, reverse=True)[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f}  {self_us / 1000:8.1f}  {name.strip()}")
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
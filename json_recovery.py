@@ -0,0 +1,173 @@
+"""
+Tolerant JSON extraction for LLM responses.
+
+Model output is usually valid JSON, but it can arrive wrapped in markdown fences,
+surrounded by prose, or cut off mid-object when the max_tokens limit is hit. The
+helpers here recover as much structured data as possible instead of discarding
+the whole response.
+"""
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+_decoder = json.JSONDecoder()
+
+
+def strip_code_fences(text: str) -> str:
+    """
+    Remove surrounding markdown code fences (```json ... ```) from a response.
+
+    Args:
+        text: Raw model output.
+
+    Returns:
+        The text without leading/trailing fences and whitespace.
+    """
+    text = (text or "").strip()
+    if text.startswith("```"):
+        first_newline = text.find("\n")
+        text = text[first_newline + 1:] if first_newline != -1 else text[3:]
+    if text.endswith("```"):
+        text = text[:-3]
+    return text.strip()
+
+
+def parse_json_response(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse a JSON object from model output, tolerating fences and surrounding prose.
+
+    Args:
+        text: Raw model output.
+
+    Returns:
+        The parsed object, or None if no complete JSON object could be decoded.
+    """
+    text = strip_code_fences(text)
+    try:
+        result = json.loads(text)
+        return result if isinstance(result, dict) else None
+    except json.JSONDecodeError:
+        pass
+
+    # Fall back to the object starting at the first brace (e.g. prose before the JSON).
+    # Later braces are not tried: in truncated output they belong to nested objects.
+    start = text.find("{")
+    if start == -1:
+        return None
+    try:
+        result, _ = _decoder.raw_decode(text, start)
+    except json.JSONDecodeError:
+        return None
+    return result if isinstance(result, dict) else None
+
+
+def _skip_value(text: str, pos: int) -> Optional[int]:
+    """
+    Skip past a (possibly malformed) bracketed value starting at pos.
+
+    Tracks bracket depth while respecting string literals. Returns the index just
+    after the closing bracket, or None if the text ends first (truncated output).
+    """
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(pos, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return None
+
+
+def recover_array_items(
+    text: str,
+    array_key: str = "attendees",
+    required_key: Optional[str] = "name"
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Recover every complete object from a JSON array in truncated or malformed output.
+
+    Args:
+        text: Raw model output.
+        array_key: Key of the array to recover (e.g. "attendees").
+        required_key: Objects missing this key are discarded.
+
+    Returns:
+        Tuple of (recovered objects, whether the array was fully closed).
+    """
+    text = strip_code_fences(text)
+    key_pos = text.find(f'"{array_key}"')
+    if key_pos == -1:
+        return [], False
+    pos = text.find("[", key_pos)
+    if pos == -1:
+        return [], False
+    pos += 1
+
+    items: List[Dict[str, Any]] = []
+    length = len(text)
+    while pos < length:
+        # Skip whitespace and separators between items
+        while pos < length and text[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= length:
+            break
+        if text[pos] == "]":
+            return items, True
+        if text[pos] != "{":
+            # Unexpected token - jump to the next object candidate
+            next_obj = text.find("{", pos)
+            if next_obj == -1:
+                break
+            pos = next_obj
+            continue
+
+        try:
+            item, end = _decoder.raw_decode(text, pos)
+            if isinstance(item, dict) and (required_key is None or item.get(required_key)):
+                items.append(item)
+            pos = end
+        except json.JSONDecodeError:
+            end = _skip_value(text, pos)
+            if end is None:
+                break  # Truncated mid-object: everything recoverable is recovered
+            pos = end
+
+    return items, False
+
+
+def recover_partial_result(
+    text: str,
+    array_key: str = "attendees"
+) -> Optional[Dict[str, Any]]:
+    """
+    Parse a response, recovering complete array items when full parsing fails.
+
+    Args:
+        text: Raw model output.
+        array_key: Key of the per-item array in the expected response.
+
+    Returns:
+        The parsed object. When only partial recovery succeeded, the object holds
+        the recovered items under array_key and "partial": True. None if nothing
+        could be recovered.
+    """
+    result = parse_json_response(text)
+    if result is not None:
+        return result
+
+    items, _ = recover_array_items(text, array_key=array_key)
+    if not items:
+        return None
+    return {array_key: items, "partial": True}
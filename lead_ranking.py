@@ -0,0 +1,147 @@
+"""
+Best-first scoring for "top K leads" analyses.
+
+Scoring every attendee with a model is wasted work when only the best K are
+wanted. Candidates are ordered by a cheap local prior (title seniority and ICP
+keyword overlap, see icp_matcher_openai.heuristic_scores) and scored in chunks,
+best first. Each unscored candidate is assumed to score at most its prior plus
+PRIOR_MARGIN; once the K-th best model score reaches that bound for the next
+candidate (the highest remaining one), no candidate left can enter the top K
+and scoring stops.
+
+The margin is an assumption, not a guarantee: the prior is a heuristic, and a
+candidate with a low prior can still score at the top of the scale. A result
+that left candidates unscored is therefore reported as approximate (see
+BestFirstRanker.stats).
+"""
+import heapq
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# How far (in points of 100) a model score may exceed the prior. Larger margins
+# score more candidates before stopping, and are safer for sparse attendee data.
+PRIOR_MARGIN = 30.0
+# Candidates scored per model call (kept small whatever K is, so a response is
+# never long enough to be truncated)
+TOP_K_CHUNK_SIZE = 10
+MAX_TOP_K = 100
+
+
+class BestFirstRanker:
+    """Hands out candidates best prior first and decides when the top K is settled."""
+
+    def __init__(
+        self,
+        candidates: Sequence[Any],
+        priors: Sequence[float],
+        k: int,
+        score_of: Callable[[Dict[str, Any]], float],
+        max_score: float = 100.0,
+        margin: float = PRIOR_MARGIN,
+        chunk_size: int = TOP_K_CHUNK_SIZE
+    ):
+        """
+        Initialize the ranker.
+
+        Args:
+            candidates: Items to score (e.g. attendee table rows).
+            priors: Prior score of each candidate, on a 0-100 scale.
+            k: Number of leads wanted.
+            score_of: Returns the model score of a scored attendee, on the
+                0-max_score scale.
+            max_score: Top of the model's score scale (100, or 10 for the Claude matcher).
+            margin: How far above its prior (0-100 scale) a candidate may score.
+            chunk_size: Candidates per chunk.
+        """
+        self.k = k
+        self.score_of = score_of
+        self.max_score = max_score
+        self.chunk_size = chunk_size
+        scale = max_score / 100.0
+        order = sorted(range(len(candidates)), key=lambda i: (-priors[i], i))
+        self._queue = [candidates[i] for i in order]
+        self._bounds = [min(max_score, (priors[i] + margin) * scale) for i in order]
+        self._next = 0
+        self._scored: List[Dict[str, Any]] = []
+        self._model_scored = 0
+        self.chunks = 0
+
+    def kth_best(self) -> Optional[float]:
+        """
+        Return the K-th best model score so far (None until K attendees have one).
+
+        Heuristic scores (attendees the model did not score) are not evidence
+        that the rest cannot do better, so they are left out.
+        """
+        confirmed = [
+            self.score_of(attendee) for attendee in self._scored
+            if attendee.get("score_source") != "heuristic"
+        ]
+        if len(confirmed) < self.k:
+            return None
+        return heapq.nlargest(self.k, confirmed)[-1]
+
+    def settled(self) -> bool:
+        """Return True if no remaining candidate can enter the top K."""
+        if self._next >= len(self._queue):
+            return True
+        kth = self.kth_best()
+        return kth is not None and kth >= self._bounds[self._next]
+
+    def next_chunk(self) -> List[Any]:
+        """Return the next candidates to score (empty once the top K is settled)."""
+        if self.settled():
+            return []
+        chunk = self._queue[self._next:self._next + self.chunk_size]
+        self._next += len(chunk)
+        self.chunks += 1
+        return chunk
+
+    def add(self, attendees: List[Dict[str, Any]]):
+        """Record the scored attendees of a chunk."""
+        scored = [attendee for attendee in attendees if isinstance(attendee, dict)]
+        self._scored.extend(scored)
+        self._model_scored += sum(1 for attendee in scored if attendee.get("score_source") != "heuristic")
+
+    def top(self) -> List[Dict[str, Any]]:
+        """Return the K best scored attendees, best first."""
+        ranked = heapq.nlargest(
+            self.k, enumerate(self._scored),
+            key=lambda item: (self.score_of(item[1]), -item[0])
+        )
+        return [attendee for _, attendee in ranked]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return K, the candidate and scored counts, and whether scoring stopped early.
+
+        "scored" counts attendees the model actually scored (chunks that failed or
+        fell back to heuristics are not included). "approximate" is True when some
+        candidates were never scored by the model, so one of them could still
+        have outscored the K-th lead.
+        """
+        return {
+            "k": self.k,
+            "candidates": len(self._queue),
+            "scored": self._model_scored,
+            "model_calls": self.chunks,
+            "stopped_early": self._next < len(self._queue),
+            "approximate": self._model_scored < len(self._queue),
+        }
+
+
+def parse_top_k(value: Any) -> Optional[int]:
+    """
+    Validate a requested top K (None, "" or 0 mean all attendees).
+
+    Raises:
+        ValueError: If the value is not a whole number between 1 and MAX_TOP_K.
+    """
+    if value in (None, "", 0, "0"):
+        return None
+    try:
+        top_k = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"top_k must be a whole number, got '{value}'")
+    if not 1 <= top_k <= MAX_TOP_K:
+        raise ValueError(f"top_k must be between 1 and {MAX_TOP_K}")
+    return top_k
@@ -1,33 +1,199 @@
 """
 Linkup API Client for searching and retrieving online content.
 """
+import asyncio
 import os
-import requests
-from typing import Optional, List, Dict, Any
-from dotenv import load_dotenv
+import copy
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Optional, List, Dict, Any, Callable
+from urllib.parse import urlparse
 
-load_dotenv()
+from attendee_import import iter_markdown_attendees, iter_markdown_rows
+from cassette import open_cassette, replay_api_key
+from env_config import load_env
+from event_sources import parse_structured_speakers
+from entity_resolution import company_tokens, jaro_winkler, resolve_people
+from singleflight import AsyncSingleFlight, SingleFlight
+from tracing import current_span, propagate, span
+
+# Bump whenever a query prompt or schema changes so cached results are invalidated
+PROMPT_VERSION = "2025-01-linkup-v1"
+
+# Quality checks for adaptive depth: a standard-depth result is retried at deep
+# depth if it has fewer speakers/rows or a shorter answer than this
+MIN_SPEAKERS = 3
+MIN_ANSWER_CHARS = 200
+MIN_DESCRIBED_RATIO = 0.8
+# Don't escalate to deep with less than this many seconds of the timeout left
+MIN_ESCALATION_SECONDS = 30
+
+# Sharded speaker extraction: a whole-page result with at least SHARD_CHECK_SPEAKERS
+# speakers may be truncated, so the page's shards are looked up; pages estimated to
+# list at least SHARD_MIN_SPEAKERS (and more than were found) are then extracted
+# section by section (at most MAX_SHARDS, SHARD_WORKERS at a time)
+SHARD_CHECK_SPEAKERS = 40
+SHARD_MIN_SPEAKERS = 100
+MAX_SHARDS = 24
+SHARD_WORKERS = 8
+SHARD_DISCOVERY_TIMEOUT = 60
+
+# Company enrichment: unique companies researched ENRICH_BATCH_SIZE per search,
+# ENRICH_WORKERS searches at a time, each retried up to ENRICH_RETRIES times
+ENRICH_BATCH_SIZE = 5
+ENRICH_WORKERS = 6
+ENRICH_RETRIES = 2
+ENRICH_RETRY_BACKOFF = 1.0
+
+
+def _domain(url: Optional[str]) -> str:
+    """Return the host of a URL or bare domain."""
+    if not url:
+        return ""
+    return urlparse(url if "://" in url else f"https://{url}").netloc.lower()
+
+
+def _table_rows(text: str) -> int:
+    """Count the data rows of the markdown tables in a text."""
+    return sum(1 for _ in iter_markdown_rows(text or ""))
+
+
+def has_speakers(response: Dict[str, Any]) -> bool:
+    """Quality check: the structured output lists at least MIN_SPEAKERS named speakers."""
+    speakers = parse_structured_speakers(response)
+    return sum(1 for speaker in speakers if isinstance(speaker, dict) and speaker.get("name")) >= MIN_SPEAKERS
+
+
+def has_answer(response: Dict[str, Any]) -> bool:
+    """Quality check: the answer is substantial and not a "nothing found" reply."""
+    answer = (response.get("answer") or "").strip()
+    return len(answer) >= MIN_ANSWER_CHARS and "no individuals found" not in answer.lower()
+
+
+def has_attendee_table(response: Dict[str, Any]) -> bool:
+    """Quality check: the answer contains a table with at least MIN_SPEAKERS people."""
+    return has_answer(response) and _table_rows(response.get("answer", "")) >= MIN_SPEAKERS
+
+
+def has_any_speaker(response: Dict[str, Any]) -> bool:
+    """Quality check for one shard: at least one named speaker (a section may be small)."""
+    return any(isinstance(speaker, dict) and speaker.get("name") for speaker in parse_structured_speakers(response))
+
+
+def _structured(response: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the object of a structured-output response (at the root or nested)."""
+    # With includeSources the object is returned under "data" next to "sources"
+    for key in ("structuredOutput", "structured_output", "data"):
+        if key in response:
+            value = response.get(key) or {}
+            if isinstance(value, str):
+                try:
+                    value = json.loads(value)
+                except json.JSONDecodeError:
+                    value = {}
+            return value if isinstance(value, dict) else {}
+    return response
+
+
+def merge_speakers(speaker_lists: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Merge speaker lists from several shards, resolving duplicate people.
+
+    A speaker listed by more than one shard (possibly with a different spelling of
+    the name or company) is kept once, at its first position, with missing fields
+    filled in from the other copies.
+    """
+    return resolve_people(speaker for speakers in speaker_lists for speaker in speakers)
+
+
+def company_key(company: Any) -> str:
+    """Normalize a company name for grouping ("Acme, Inc." and "ACME" -> "acme")."""
+    return " ".join(company_tokens(company))
+
+
+def match_descriptions(companies: List[str], response: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Map the companies of one enrichment batch to the descriptions in its response.
+
+    Returned names are matched by normalized name, falling back to the closest
+    Jaro-Winkler match, since the model may spell a company slightly differently.
+
+    Returns:
+        Description by company key, for the companies that were described.
+    """
+    wanted = {company_key(company): company for company in companies}
+    descriptions = {}
+    for item in _structured(response).get("companies") or []:
+        if not isinstance(item, dict) or not (item.get("description") or "").strip():
+            continue
+        key = company_key(item.get("company"))
+        if key not in wanted:
+            best = max(wanted, key=lambda candidate: jaro_winkler(candidate, key), default=None)
+            if best is None or jaro_winkler(best, key) < 0.85:
+                continue
+            key = best
+        descriptions.setdefault(key, " ".join(item["description"].split()))
+    return descriptions
+
+
+def describes_companies(companies: List[str]) -> Callable[[Dict[str, Any]], bool]:
+    """Quality check factory: the response describes most companies of the batch."""
+    def check(response: Dict[str, Any]) -> bool:
+        return len(match_descriptions(companies, response)) >= len(companies) * MIN_DESCRIBED_RATIO
+
+    return check
 
 
 class LinkupClient:
     """Client for interacting with the Linkup API."""
 
-    def __init__(self, api_key: Optional[str] = None):
+    # Shared by every client in the process so concurrent Flask threads issuing the
+    # same search share one in-flight request
+    _inflight = SingleFlight()
+    _stats_lock = threading.Lock()
+    _coalesced_requests = 0
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        response_cache=None,
+        response_cache_ttl: float = 86400,
+        depth_policy=None,
+        cassette=None
+    ):
         """
         Initialize the Linkup client.
 
         Args:
             api_key: Linkup API key. If not provided, will look for LINKUP_API_KEY env variable.
+            response_cache: Optional cache of raw search responses, shared between worker
+                processes (e.g. shared_cache.SQLiteCache).
+            response_cache_ttl: Seconds a cached response may be reused.
+            depth_policy: Optional depth_policy.DepthPolicy. With one, searches that
+                used to always run deep try standard depth first and escalate to deep
+                only when the result fails a quality check. Without one they run deep.
+            cassette: Optional cassette.Cassette that records or replays searches
+                (default: the one configured by CASSETTE_MODE, if any).
         """
-        self.api_key = (api_key or os.getenv("LINKUP_API_KEY", "")).strip()
+        load_env()
+        self.cassette = cassette if cassette is not None else open_cassette()
+        self.api_key = (api_key or os.getenv("LINKUP_API_KEY", "") or replay_api_key(self.cassette) or "").strip()
         if not self.api_key:
             raise ValueError("Linkup API key must be provided or set in LINKUP_API_KEY environment variable")
 
-        self.base_url = "https://api.linkup.so/v1"
+        self.base_url = os.getenv("LINKUP_BASE_URL", "https://api.linkup.so/v1").rstrip("/")
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
+        self.response_cache = response_cache
+        self.response_cache_ttl = response_cache_ttl
+        self.depth_policy = depth_policy
+        # One HTTP session per thread keeps connections to Linkup alive between calls
+        self._local = threading.local()
 
     def search(
         self,
@@ -41,7 +207,8 @@ class LinkupClient:
         exclude_domains: Optional[List[str]] = None,
         include_domains: Optional[List[str]] = None,
         include_inline_citations: bool = False,
-        include_sources: bool = False
+        include_sources: bool = False,
+        timeout: Optional[float] = None
     ) -> Dict[str, Any]:
         """
         Search for information using the Linkup API.
@@ -58,10 +225,50 @@ class LinkupClient:
             include_domains: List of domains to search on.
             include_inline_citations: Whether to include inline citations (for sourcedAnswer).
             include_sources: Whether to include sources (for structured output).
+            timeout: Seconds to wait for the response (default: no limit).
 
         Returns:
             API response containing search results.
         """
+        attributes = {"linkup.depth": depth, "linkup.output_type": output_type, "linkup.timeout": timeout}
+        with span("linkup.search", **attributes) as current:
+            payload = self._build_payload(
+                query=query,
+                depth=depth,
+                output_type=output_type,
+                structured_output_schema=structured_output_schema,
+                include_images=include_images,
+                from_date=from_date,
+                to_date=to_date,
+                exclude_domains=exclude_domains,
+                include_domains=include_domains,
+                include_inline_citations=include_inline_citations,
+                include_sources=include_sources
+            )
+            key = self._payload_key(payload)
+            result, shared = self._inflight.do(key, lambda: self._fetch(payload, key, timeout), timeout=timeout)
+            current.set_attribute("linkup.coalesced", shared)
+            if shared:
+                self._count_coalesced()
+            # Every caller, the leader included, gets its own copy: followers copy the
+            # shared result after the leader returns, so it must never be mutated
+            return copy.deepcopy(result)
+
+    @staticmethod
+    def _build_payload(
+        query: str,
+        depth: str = "standard",
+        output_type: str = "sourcedAnswer",
+        structured_output_schema: Optional[Dict[str, Any]] = None,
+        include_images: bool = False,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        exclude_domains: Optional[List[str]] = None,
+        include_domains: Optional[List[str]] = None,
+        include_inline_citations: bool = False,
+        include_sources: bool = False
+    ) -> Dict[str, Any]:
+        """Build the /search request body (arguments as for search)."""
         payload = {
             "q": query,
             "depth": depth,
@@ -87,12 +294,81 @@ class LinkupClient:
         if include_domains:
             payload["includeDomains"] = include_domains
 
+        return payload
+
+    @classmethod
+    def _count_coalesced(cls):
+        with LinkupClient._stats_lock:
+            LinkupClient._coalesced_requests += 1
+        print("Joined an identical in-flight Linkup request")
+
+    def _payload_key(self, payload: Dict[str, Any]) -> str:
+        """Build the single-flight key for a payload (whitespace-normalized query)."""
+        normalized = {**payload, "q": " ".join(payload["q"].split())}
+        return self.base_url + json.dumps(normalized, sort_keys=True)
+
+    def _fetch(self, payload: Dict[str, Any], key: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Serve a search from the shared response cache, or post it and cache the response."""
+        if self.response_cache is None:
+            return self._post(payload, timeout)
+
+        cached = self._cached_response(key)
+        current_span().set_attribute("cache.hit", cached is not None)
+        if cached is not None:
+            return cached
+
+        result = self._post(payload, timeout)
+        self._cache_response(key, result)
+        return result
+
+    def _cached_response(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the shared-cache response for a single-flight key, if still fresh."""
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        try:
+            cached = self.response_cache.get(digest, max_age=self.response_cache_ttl)
+        except Exception as e:
+            print(f"Linkup response cache read failed: {e}")
+            return None
+        if cached is None:
+            return None
+        print("Using cached Linkup response")
+        return cached[1]
+
+    def _cache_response(self, key: str, result: Dict[str, Any]):
+        """Store a response in the shared cache under a single-flight key."""
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        try:
+            self.response_cache.set(digest, result)
+        except Exception as e:
+            print(f"Linkup response cache write failed: {e}")
+
+    def _session(self):
+        """Return this thread's HTTP session, creating it on first use."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            import requests  # Deferred to keep cold starts fast
+            session = requests.Session()
+            session.headers.update(self.headers)
+            self._local.session = session
+        return session
+
+    def _post(self, payload: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Send a search payload to the Linkup API, through the cassette if there is one."""
+        if self.cassette is not None:
+            return self.cassette.call("linkup", payload, lambda: self._send(payload, timeout), timeout=timeout)
+        return self._send(payload, timeout)
+
+    def _send(self, payload: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Send a search payload to the Linkup API."""
+        import requests  # Deferred to keep cold starts fast
+
         try:
-            response = requests.post(
+            response = self._session().post(
                 f"{self.base_url}/search",
-                headers=self.headers,
-                json=payload
+                json=payload,
+                timeout=timeout
             )
+            current_span().set_attribute("http.status_code", response.status_code)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -101,11 +377,69 @@ class LinkupClient:
                 print(f"Response: {e.response.text}")
             raise
 
+    @classmethod
+    def coalescing_stats(cls) -> Dict[str, int]:
+        """Return the number of in-flight and coalesced Linkup requests in this process."""
+        with cls._stats_lock:
+            coalesced = cls._coalesced_requests
+        return {
+            "in_flight": cls._inflight.in_flight(),
+            "coalesced": coalesced
+        }
+
+    def _search_adaptive(
+        self,
+        operation: str,
+        domain: Optional[str],
+        request: Dict[str, Any],
+        check: Callable[[Dict[str, Any]], bool],
+        depth: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Run a search at an explicit depth, or at the depth policy's choice.
+
+        A standard-depth result that fails check is retried at deep depth (if the
+        timeout leaves room), and the outcome is recorded for the domain.
+
+        Args:
+            operation: Kind of search, for per-domain stats (e.g. "speakers").
+            domain: Domain the search is about.
+            request: search() arguments without depth.
+            check: Returns True if a response is good enough.
+            depth: Force "standard" or "deep" (default: the policy's choice, or deep
+                without a policy).
+            timeout: Seconds to wait for the response(s), in total.
+        """
+        with span("linkup.adaptive_search", **{"linkup.operation": operation, "linkup.domain": domain}) as current:
+            if depth is not None or self.depth_policy is None:
+                return self.search(**request, depth=depth or "deep", timeout=timeout)
+
+            depth = self.depth_policy.choose(operation, domain)
+            started = time.monotonic()
+            result = self.search(**request, depth=depth, timeout=timeout)
+            passed = check(result)
+            current.set_attributes({"linkup.initial_depth": depth, "linkup.quality_passed": passed})
+            self.depth_policy.record(operation, domain, depth, passed)
+            if passed or depth == "deep":
+                return result
+
+            remaining = None if timeout is None else timeout - (time.monotonic() - started)
+            if remaining is not None and remaining < MIN_ESCALATION_SECONDS:
+                print(f"Linkup {operation}: standard result for {domain or 'query'} failed quality check, no time to retry deep")
+                return result
+            print(f"Linkup {operation}: standard result for {domain or 'query'} failed quality check, retrying at deep depth")
+            current.set_attribute("linkup.escalated", True)
+            result = self.search(**request, depth="deep", timeout=remaining)
+            self.depth_policy.record(operation, domain, "deep", check(result), escalated=True)
+            return result
+
     def search_event_attendees(
         self,
         event_name: str,
         event_url: Optional[str] = None,
-        additional_context: Optional[str] = None
+        additional_context: Optional[str] = None,
+        depth: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Search for people attending a specific event.
@@ -114,6 +448,7 @@ class LinkupClient:
             event_name: Name of the event.
             event_url: URL of the event page (optional but recommended).
             additional_context: Additional context about the event.
+            depth: "standard" or "deep" (default: adaptive with a depth policy, else deep).
 
         Returns:
             Dictionary containing information about event attendees.
@@ -150,11 +485,9 @@ class LinkupClient:
 
         query = "\n".join(query_parts)
 
-        # Use deep search for more comprehensive results
         include_domains_list = []
         if event_url:
             # Extract domain from event URL
-            from urllib.parse import urlparse
             domain = urlparse(event_url).netloc
             if domain:
                 include_domains_list.append(domain)
@@ -169,27 +502,42 @@ class LinkupClient:
             "partful.com"
         ])
 
-        return self.search(
-            query=query,
-            depth="deep",
-            output_type="sourcedAnswer",
-            include_domains=include_domains_list if include_domains_list else None,
-            include_inline_citations=True
-        )
+        request = {
+            "query": query,
+            "output_type": "sourcedAnswer",
+            "include_domains": include_domains_list if include_domains_list else None,
+            "include_inline_citations": True
+        }
+        return self._search_adaptive("attendees", _domain(event_url), request, has_answer, depth)
 
     def extract_attendees_from_url(
         self,
-        event_url: str
+        event_url: str,
+        depth: Optional[str] = None,
+        timeout: Optional[float] = None
     ) -> Dict[str, Any]:
         """
         Extract attendees from an event URL and return as a structured table.
 
+        The answer holds a "| Name | Role/Title | Affiliation/Company |" markdown
+        table; attendee_import.iter_markdown_attendees turns it into records.
+
         Args:
             event_url: URL of the event page to extract attendees from.
+            depth: "standard" or "deep" (default: adaptive with a depth policy, else deep).
+            timeout: Seconds to wait for the response(s) (default: no limit).
 
         Returns:
             Dictionary containing the attendee list and sources.
         """
+        return self._search_adaptive(
+            "attendee_table", _domain(event_url), self._attendee_table_request(event_url),
+            has_attendee_table, depth, timeout
+        )
+
+    @staticmethod
+    def _attendee_table_request(event_url: str) -> Dict[str, Any]:
+        """Return the search arguments (without depth) for extract_attendees_from_url."""
         query = f"""Visit {event_url} and extract ALL people listed on the page (attendees, speakers, sponsors, organizers, etc.). This page may be dynamically loaded with JavaScript - wait for it to fully render and look at ALL content on the page.
 
 Search EVERYWHERE on the page for:
@@ -213,33 +561,109 @@ Format as a markdown table:
 Extract EVERYONE you can find - speakers, sponsors, organizers, or anyone else mentioned. If the page truly has zero people listed, return: "No individuals found on this page." But try very hard to find at least some people first."""
 
         # Don't restrict domains - let Linkup search broadly
-        return self.search(
-            query=query,
-            depth="deep",
-            output_type="sourcedAnswer",
-            include_inline_citations=True
-        )
+        return {
+            "query": query,
+            "output_type": "sourcedAnswer",
+            "include_inline_citations": True
+        }
 
     def enrich_company_descriptions(
         self,
-        attendee_data: str
+        attendee_data: str,
+        depth: Optional[str] = None,
+        timeout: Optional[float] = None
     ) -> Dict[str, Any]:
         """
         Enrich attendee data with company descriptions.
 
+        The unique companies of the table are researched ENRICH_BATCH_SIZE at a
+        time, ENRICH_WORKERS batches concurrently, and the descriptions are
+        stitched back into the table. A failed batch is retried on its own, then
+        company by company; companies that still fail are left undescribed
+        instead of failing the whole table.
+
         Args:
             attendee_data: The attendee table data from extract_attendees_from_url.
+            depth: "standard" or "deep" (default: adaptive with a depth policy, else deep).
+            timeout: Seconds to wait for each batch (default: no limit).
 
         Returns:
-            Dictionary containing enriched attendee data with company descriptions.
+            Dictionary with "answer" (markdown table with Name, Role/Title,
+            Affiliation/Company and Company Description columns), "sources", and
+            "failed_companies" (companies no batch could describe).
         """
-        query = f"""You are a business research assistant. I have a table of people and their companies from an event. For each company in the table, research what the company does by visiting their official website and business sources.
+        attendees = list(iter_markdown_attendees(attendee_data))
+        companies = {}
+        for attendee in attendees:
+            key = company_key(attendee["company"])
+            if key:
+                companies.setdefault(key, attendee["company"])
+        batches = [
+            list(companies.values())[start:start + ENRICH_BATCH_SIZE]
+            for start in range(0, len(companies), ENRICH_BATCH_SIZE)
+        ]
+        print(f"Enriching {len(companies)} companies in {len(batches)} batches")
+
+        results = self._enrich_batches(batches, depth, timeout)
+        # A batch that keeps failing may be failing on one company: retry its companies one by one
+        split = [[company] for batch, result in results if isinstance(result, BaseException) and len(batch) > 1 for company in batch]
+        if split:
+            results = [
+                (batch, result) for batch, result in results
+                if not (isinstance(result, BaseException) and len(batch) > 1)
+            ] + self._enrich_batches(split, depth, timeout)
+
+        descriptions: Dict[str, str] = {}
+        sources: List[Any] = []
+        failed: List[str] = []
+        for batch, result in results:
+            if isinstance(result, BaseException):
+                print(f"Company enrichment failed for {', '.join(batch)}: {result}")
+                failed.extend(batch)
+                continue
+            described = match_descriptions(batch, result)
+            descriptions.update(described)
+            failed.extend(company for company in batch if company_key(company) not in described)
+            sources.extend(source for source in result.get("sources", []) if source not in sources)
+
+        return {
+            "answer": self._enriched_table(attendees, descriptions),
+            "sources": sources,
+            "failed_companies": failed
+        }
 
-Create a new table with these columns:
-1. Name (person's name)
-2. Role/Title
-3. Affiliation/Company
-4. Company Description (what the company does - 1-2 sentences)
+    def _enrich_batches(self, batches: List[List[str]], depth: Optional[str], timeout: Optional[float]) -> List[tuple]:
+        """Research batches concurrently; returns (batch, response or exception) pairs."""
+        if not batches:
+            return []
+        with ThreadPoolExecutor(max_workers=min(ENRICH_WORKERS, len(batches)), thread_name_prefix="linkup-enrich") as executor:
+            enrich = propagate(lambda batch: self._enrich_batch(batch, depth, timeout))
+            return list(zip(batches, executor.map(enrich, batches)))
+
+    def _enrich_batch(self, companies: List[str], depth: Optional[str], timeout: Optional[float]) -> Any:
+        """
+        Research one batch of companies, retrying with backoff.
+
+        Returns:
+            The search response, or the last exception if every attempt failed.
+        """
+        with span("linkup.enrich_batch", **{"linkup.companies": len(companies)}) as current:
+            request = self._enrich_request(companies)
+            for attempt in range(ENRICH_RETRIES + 1):
+                current.set_attribute("linkup.retries", attempt)
+                try:
+                    return self._search_adaptive("enrich", None, request, describes_companies(companies), depth, timeout)
+                except Exception as e:
+                    if attempt == ENRICH_RETRIES:
+                        current.record_exception(e)
+                        return e
+                    time.sleep(ENRICH_RETRY_BACKOFF * 2 ** attempt)
+
+    @staticmethod
+    def _enrich_request(companies: List[str]) -> Dict[str, Any]:
+        """Return the search arguments (without depth) for one enrichment batch."""
+        company_list = "\n".join(f"- {company}" for company in companies)
+        query = f"""You are a business research assistant. For each company below, research what the company does by visiting their official website and business sources, and describe it in 1-2 sentences.
 
 Research each company to understand:
 - What products/services they offer
@@ -247,23 +671,57 @@ Research each company to understand:
 - What problem they solve
 - Their target customers
 
-Here is the attendee table to enrich:
+Companies:
+{company_list}
 
-{attendee_data}
+Focus on factual information from company websites, LinkedIn company pages, Crunchbase, and reputable tech/business news sources. Use the company names exactly as given."""
 
-Return the enriched table in markdown format with all 4 columns. Focus on searching for factual information from company websites, LinkedIn company pages, Crunchbase, and reputable tech/business news sources."""
+        schema = {
+            "type": "object",
+            "properties": {
+                "companies": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "company": {"type": "string"},
+                            "description": {"type": "string"}
+                        }
+                    }
+                }
+            }
+        }
 
-        return self.search(
-            query=query,
-            depth="deep",
-            output_type="sourcedAnswer",
-            include_inline_citations=True
-        )
+        return {
+            "query": query,
+            "output_type": "structured",
+            "structured_output_schema": schema,
+            "include_sources": True
+        }
+
+    @staticmethod
+    def _enriched_table(attendees: List[Dict[str, Any]], descriptions: Dict[str, str]) -> str:
+        """Build the 4-column enriched attendee table."""
+        lines = [
+            "| Name | Role/Title | Affiliation/Company | Company Description |",
+            "|------|-----------|---------------------|---------------------|"
+        ]
+        for attendee in attendees:
+            cells = [
+                attendee.get("name") or "N/A",
+                attendee.get("title") or "N/A",
+                attendee.get("company") or "N/A",
+                descriptions.get(company_key(attendee.get("company"))) or "N/A"
+            ]
+            cells = [cell.replace("|", "-").replace("\n", " ") for cell in cells]
+            lines.append(f"| {' | '.join(cells)} |")
+        return "\n".join(lines)
 
     def get_company_icp_from_url(
         self,
         company_url: str,
-        company_name: str = "the company"
+        company_name: str = "the company",
+        timeout: Optional[float] = None
     ) -> Dict[str, Any]:
         """
         Get the Ideal Customer Profile for a company from their website.
@@ -271,35 +729,59 @@ Return the enriched table in markdown format with all 4 columns. Focus on search
         Args:
             company_url: URL of the company website.
             company_name: Name of the company (for better context).
+            timeout: Seconds to wait for the response (default: no limit).
 
         Returns:
             Dictionary containing ICP analysis.
         """
+        return self.search(**self._company_icp_request(company_url, company_name), timeout=timeout)
+
+    @staticmethod
+    def _company_icp_request(company_url: str, company_name: str) -> Dict[str, Any]:
+        """Return the search arguments for get_company_icp_from_url."""
         query = f"""You are an expert in B2B SaaS market analysis. Identify and describe the Ideal Customer Profile (ICP) for {company_name} (website: {company_url}). Focus your research on the company's homepage, product pages, and any case studies or customer testimonials available on the site. Analyze the target industries, company sizes, buyer personas, and typical use cases addressed by {company_name}. Present your findings in a concise bullet-point list, highlighting key characteristics and patterns."""
 
         # Use standard depth for faster response (deep takes 30-60s)
-        return self.search(
-            query=query,
-            depth="standard",
-            output_type="sourcedAnswer",
-            include_inline_citations=True
-        )
+        return {
+            "query": query,
+            "depth": "standard",
+            "output_type": "sourcedAnswer",
+            "include_inline_citations": True
+        }
 
-    def extract_speakers_structured(self, event_url: str) -> Dict[str, Any]:
+    def extract_speakers_structured(
+        self,
+        event_url: str,
+        depth: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
         """
         Extract speakers from an event URL using structured output.
 
         Args:
             event_url: URL of the event page to extract speakers from.
+            depth: "standard" or "deep" (default: adaptive with a depth policy, else deep).
+            timeout: Seconds to wait for the response(s) (default: no limit).
 
         Returns:
             Dictionary containing structured speaker data.
         """
+        return self._search_adaptive(
+            "speakers", _domain(event_url), self._speakers_structured_request(event_url),
+            has_speakers, depth, timeout
+        )
+
+    @staticmethod
+    def _speakers_structured_request(event_url: str, section: Optional[str] = None) -> Dict[str, Any]:
+        """Return the search arguments for extract_speakers_structured (or one shard of it)."""
         query = f"""You are an expert data extraction assistant. Visit the event page at {event_url}.
 Identify and extract a complete list of all featured speakers, panelists, hosts, and presenters.
 For each person, extract their full name, job title/role, and company/organization.
 Look for speaker sections, agenda items with speaker names, host information, and any bio cards.
 Extract EVERYONE listed as a speaker, host, or presenter on the page."""
+        if section:
+            query += f"""
+Only extract the speakers listed under "{section}"; ignore every other section of the page."""
 
         schema = {
             "type": "object",
@@ -320,15 +802,191 @@ Extract EVERYONE listed as a speaker, host, or presenter on the page."""
             }
         }
 
-        return self.search(
-            query=query,
-            depth="deep",
-            output_type="structured",
-            structured_output_schema=schema,
-            include_images=False,
-            include_sources=False
+        return {
+            "query": query,
+            "output_type": "structured",
+            "structured_output_schema": schema,
+            "include_images": False,
+            "include_sources": False
+        }
+
+    @staticmethod
+    def _speaker_shards_request(event_url: str) -> Dict[str, Any]:
+        """Return the search arguments for discover_speaker_shards."""
+        query = f"""You are an expert web analyst. Visit the event page at {event_url}.
+Do NOT extract the speakers. Instead, describe how the speaker list is organized so it can be extracted in parts:
+1. Estimate the total number of speakers, panelists, hosts and presenters listed for the event.
+2. List the URLs of pages that hold parts of the speaker list (e.g. "/speakers?page=2", per-track, per-day or per-letter speaker pages).
+3. If the speakers are all on one page, list the sections they are grouped under (tracks, days, stages, or alphabetical ranges such as "A-F"), with the page URL.
+Each part should hold at most about 50 speakers, and together the parts must cover every speaker."""
+
+        schema = {
+            "type": "object",
+            "properties": {
+                "estimated_speakers": {"type": "integer"},
+                "shards": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "url": {"type": "string"},
+                            "section": {"type": "string"}
+                        }
+                    }
+                }
+            }
+        }
+
+        return {
+            "query": query,
+            "depth": "standard",
+            "output_type": "structured",
+            "structured_output_schema": schema,
+            "include_images": False,
+            "include_sources": False
+        }
+
+    @staticmethod
+    def _parse_speaker_shards(event_url: str, response: Dict[str, Any]) -> tuple:
+        """
+        Read a discover_speaker_shards response.
+
+        Returns:
+            Tuple of (estimated speaker count, list of {"url", "section"} shards).
+        """
+        plan = _structured(response)
+        try:
+            estimated = int(plan.get("estimated_speakers") or 0)
+        except (TypeError, ValueError):
+            estimated = 0
+        shards, seen = [], set()
+        for shard in plan.get("shards") or []:
+            if not isinstance(shard, dict):
+                continue
+            url = (shard.get("url") or event_url).strip()
+            if url.startswith("/"):
+                url = f"{urlparse(event_url).scheme}://{_domain(event_url)}{url}"
+            section = (shard.get("section") or "").strip() or None
+            if (url, section) in seen or (url == event_url and not section):
+                continue
+            seen.add((url, section))
+            shards.append({"url": url, "section": section})
+        return estimated, shards[:MAX_SHARDS]
+
+    def discover_speaker_shards(self, event_url: str, timeout: Optional[float] = None) -> tuple:
+        """
+        Find how an event's speaker list is split into pages or sections.
+
+        Returns:
+            Tuple of (estimated speaker count, list of {"url", "section"} shards).
+        """
+        response = self.search(**self._speaker_shards_request(event_url), timeout=timeout)
+        return self._parse_speaker_shards(event_url, response)
+
+    def _extract_speaker_shard(
+        self,
+        event_url: str,
+        shard: Dict[str, Any],
+        depth: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Extract the speakers of one shard (a sub-page or a section of the page)."""
+        return self._search_adaptive(
+            "speaker_shard", _domain(event_url),
+            self._speakers_structured_request(shard["url"], shard["section"]),
+            has_any_speaker, depth, timeout
         )
 
+    @staticmethod
+    def _may_be_truncated(full: Dict[str, Any]) -> bool:
+        """Return True if a whole-page extraction found enough speakers to have been cut short."""
+        return len(parse_structured_speakers(full)) >= SHARD_CHECK_SPEAKERS
+
+    @staticmethod
+    def _should_shard(estimated: int, shards: List[Dict[str, Any]], found: int) -> bool:
+        return len(shards) >= 2 and estimated >= SHARD_MIN_SPEAKERS and estimated > found
+
+    @staticmethod
+    def _remaining(timeout: Optional[float], started: float) -> Optional[float]:
+        return None if timeout is None else timeout - (time.monotonic() - started)
+
+    @staticmethod
+    def _merge_shard_results(full: Dict[str, Any], shards: List[Dict[str, Any]], results: List[Any]) -> Dict[str, Any]:
+        """Merge the whole-page extraction with the shard extractions (failed shards are skipped)."""
+        speaker_lists = [parse_structured_speakers(full)]
+        failed = []
+        for shard, result in zip(shards, results):
+            if isinstance(result, BaseException):
+                print(f"Speaker shard {shard['section'] or shard['url']} failed: {result}")
+                failed.append(shard["section"] or shard["url"])
+            else:
+                speaker_lists.append(parse_structured_speakers(result))
+        return {
+            "speakers": merge_speakers(speaker_lists),
+            "sources": full.get("sources", []),
+            "shards": {"total": len(shards), "failed": failed},
+            "truncated": bool(failed)
+        }
+
+    def extract_speakers_sharded(
+        self,
+        event_url: str,
+        depth: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Extract speakers from a possibly very large event page, shard by shard.
+
+        The whole page is extracted first. Only when that result lists at least
+        SHARD_CHECK_SPEAKERS speakers (so it may have been cut short) does a quick
+        standard search look for the page's speaker sub-pages or sections. If the
+        page is estimated to list at least SHARD_MIN_SPEAKERS speakers, more than
+        were found, every shard is extracted concurrently and merged by name with
+        the whole-page result. Other pages cost a single extraction.
+
+        Args:
+            event_url: URL of the event page to extract speakers from.
+            depth: "standard" or "deep" (default: adaptive with a depth policy, else deep).
+            timeout: Seconds to wait for the extraction, in total (default: no limit).
+
+        Returns:
+            Dictionary with "speakers" and "sources", plus "shards" (count and failed
+            shards) when the page was sharded. "truncated" is True when the speaker
+            list is known or likely to be incomplete (failed shards, or a long
+            whole-page result that could not be sharded).
+        """
+        started = time.monotonic()
+        full = self.extract_speakers_structured(event_url, depth, timeout)
+        if not self._may_be_truncated(full):
+            return full
+
+        remaining = self._remaining(timeout, started)
+        if remaining is not None and remaining < MIN_ESCALATION_SECONDS:
+            return {**full, "truncated": True}
+        try:
+            discovery_timeout = min(remaining, SHARD_DISCOVERY_TIMEOUT) if remaining else SHARD_DISCOVERY_TIMEOUT
+            estimated, shards = self.discover_speaker_shards(event_url, timeout=discovery_timeout)
+        except Exception as e:
+            print(f"Speaker shard discovery failed, keeping the whole-page extraction: {e}")
+            return {**full, "truncated": True}
+        found = len(parse_structured_speakers(full))
+        if not self._should_shard(estimated, shards, found):
+            return full
+
+        remaining = self._remaining(timeout, started)
+        if remaining is not None and remaining < MIN_ESCALATION_SECONDS:
+            print(f"Page lists ~{estimated} speakers but there is no time left to shard it")
+            return {**full, "truncated": True}
+        print(f"Extracting ~{estimated} speakers from {event_url} in {len(shards)} shards ({found} found on the whole page)")
+        with ThreadPoolExecutor(max_workers=SHARD_WORKERS, thread_name_prefix="linkup-shard") as executor:
+            shard_futures = [
+                executor.submit(propagate(self._extract_speaker_shard), event_url, shard, depth, remaining)
+                for shard in shards
+            ]
+            wait(shard_futures)
+        results = [future.exception() or future.result() for future in shard_futures]
+        return self._merge_shard_results(full, shards, results)
+
     def enrich_speaker_profile(self, name: str, title: str, company: str) -> Dict[str, Any]:
         """
         Enrich a speaker's profile with LinkedIn and company information.
@@ -354,7 +1012,8 @@ including company overview, products/services, and what they do."""
     def get_company_info(
         self,
         company_name: str,
-        company_domain: Optional[str] = None
+        company_domain: Optional[str] = None,
+        depth: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Get detailed information about a company to help define ICP.
@@ -362,6 +1021,7 @@ including company overview, products/services, and what they do."""
         Args:
             company_name: Name of the company.
             company_domain: Domain of the company website.
+            depth: "standard" or "deep" (default: adaptive with a depth policy, else deep).
 
         Returns:
             Dictionary containing company information.
@@ -396,10 +1056,225 @@ including company overview, products/services, and what they do."""
         if company_domain:
             include_domains_list.append(company_domain)
 
-        return self.search(
-            query=query,
-            depth="deep",
-            output_type="sourcedAnswer",
-            include_domains=include_domains_list if include_domains_list else None,
-            include_inline_citations=True
+        request = {
+            "query": query,
+            "output_type": "sourcedAnswer",
+            "include_domains": include_domains_list if include_domains_list else None,
+            "include_inline_citations": True
+        }
+        return self._search_adaptive("company_info", _domain(company_domain), request, has_answer, depth)
+
+
+class AsyncLinkupClient(LinkupClient):
+    """
+    Linkup client for asyncio code (the ASGI app).
+
+    Builds the same queries and payloads as LinkupClient, but sends them with a
+    shared httpx.AsyncClient so many searches can wait on the network from one
+    thread. Must be used from a single event loop.
+    """
+
+    # Longest a single search may take (deep searches can run for minutes)
+    TIMEOUT = 300
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._async_inflight = AsyncSingleFlight()
+        self._http = None
+
+    def _http_client(self):
+        """Return the shared async HTTP client, creating it on first use."""
+        if self._http is None:
+            try:
+                import httpx
+            except ImportError:
+                raise ImportError("The async Linkup client requires httpx: pip install httpx")
+            self._http = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=httpx.Timeout(self.TIMEOUT, connect=10)
+            )
+        return self._http
+
+    async def aclose(self):
+        """Close the HTTP connection pool."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def asearch(self, timeout: Optional[float] = None, **search_args) -> Dict[str, Any]:
+        """
+        Search for information using the Linkup API.
+
+        Args:
+            timeout: Seconds to wait for the response (default: TIMEOUT).
+            **search_args: Same arguments as LinkupClient.search.
+
+        Returns:
+            API response containing search results.
+        """
+        attributes = {
+            "linkup.depth": search_args.get("depth", "standard"),
+            "linkup.output_type": search_args.get("output_type", "sourcedAnswer"),
+            "linkup.timeout": timeout
+        }
+        with span("linkup.search", **attributes) as current:
+            payload = self._build_payload(**search_args)
+            key = self._payload_key(payload)
+            result, shared = await self._async_inflight.do(key, lambda: self._afetch(payload, key, timeout), timeout=timeout)
+            current.set_attribute("linkup.coalesced", shared)
+            if shared:
+                self._count_coalesced()
+            # Every caller gets its own copy (see search)
+            return copy.deepcopy(result)
+
+    async def _afetch(self, payload: Dict[str, Any], key: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Serve a search from the shared response cache, or post it and cache the response."""
+        if self.response_cache is None:
+            return await self._apost(payload, timeout)
+
+        # SQLite calls block, so they run on the default thread pool
+        cached = await asyncio.to_thread(self._cached_response, key)
+        current_span().set_attribute("cache.hit", cached is not None)
+        if cached is not None:
+            return cached
+
+        result = await self._apost(payload, timeout)
+        await asyncio.to_thread(self._cache_response, key, result)
+        return result
+
+    async def _apost(self, payload: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Send a search payload to the Linkup API, through the cassette if there is one."""
+        if self.cassette is not None:
+            return await self.cassette.acall("linkup", payload, lambda: self._asend(payload, timeout), timeout=timeout)
+        return await self._asend(payload, timeout)
+
+    async def _asend(self, payload: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Send a search payload to the Linkup API."""
+        import httpx
+
+        try:
+            client = self._http_client()
+            response = await client.post(
+                f"{self.base_url}/search",
+                json=payload,
+                timeout=httpx.Timeout(timeout, connect=min(timeout, 10)) if timeout else client.timeout
+            )
+            current_span().set_attribute("http.status_code", response.status_code)
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError as e:
+            print(f"Error making Linkup API request: {e}")
+            if isinstance(e, httpx.HTTPStatusError):
+                print(f"Response: {e.response.text}")
+            raise
+
+    async def aget_company_icp_from_url(
+        self,
+        company_url: str,
+        company_name: str = "the company",
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Async version of get_company_icp_from_url."""
+        return await self.asearch(**self._company_icp_request(company_url, company_name), timeout=timeout)
+
+    async def _asearch_adaptive(
+        self,
+        operation: str,
+        domain: Optional[str],
+        request: Dict[str, Any],
+        check: Callable[[Dict[str, Any]], bool],
+        depth: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Async version of _search_adaptive."""
+        with span("linkup.adaptive_search", **{"linkup.operation": operation, "linkup.domain": domain}) as current:
+            if depth is not None or self.depth_policy is None:
+                return await self.asearch(**request, depth=depth or "deep", timeout=timeout)
+
+            # The policy may read its shared backend (SQLite), so keep it off the event loop
+            depth = await asyncio.to_thread(self.depth_policy.choose, operation, domain)
+            started = time.monotonic()
+            result = await self.asearch(**request, depth=depth, timeout=timeout)
+            passed = check(result)
+            current.set_attributes({"linkup.initial_depth": depth, "linkup.quality_passed": passed})
+            await asyncio.to_thread(self.depth_policy.record, operation, domain, depth, passed)
+            if passed or depth == "deep":
+                return result
+
+            remaining = None if timeout is None else timeout - (time.monotonic() - started)
+            if remaining is not None and remaining < MIN_ESCALATION_SECONDS:
+                print(f"Linkup {operation}: standard result for {domain or 'query'} failed quality check, no time to retry deep")
+                return result
+            print(f"Linkup {operation}: standard result for {domain or 'query'} failed quality check, retrying at deep depth")
+            current.set_attribute("linkup.escalated", True)
+            result = await self.asearch(**request, depth="deep", timeout=remaining)
+            await asyncio.to_thread(self.depth_policy.record, operation, domain, "deep", check(result), True)
+            return result
+
+    async def aextract_speakers_sharded(
+        self,
+        event_url: str,
+        depth: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Async version of extract_speakers_sharded."""
+        started = time.monotonic()
+        full = await self.aextract_speakers_structured(event_url, depth, timeout)
+        if not self._may_be_truncated(full):
+            return full
+
+        remaining = self._remaining(timeout, started)
+        if remaining is not None and remaining < MIN_ESCALATION_SECONDS:
+            return {**full, "truncated": True}
+        try:
+            discovery_timeout = min(remaining, SHARD_DISCOVERY_TIMEOUT) if remaining else SHARD_DISCOVERY_TIMEOUT
+            response = await self.asearch(**self._speaker_shards_request(event_url), timeout=discovery_timeout)
+            estimated, shards = self._parse_speaker_shards(event_url, response)
+        except Exception as e:
+            print(f"Speaker shard discovery failed, keeping the whole-page extraction: {e}")
+            return {**full, "truncated": True}
+        found = len(parse_structured_speakers(full))
+        if not self._should_shard(estimated, shards, found):
+            return full
+
+        remaining = self._remaining(timeout, started)
+        if remaining is not None and remaining < MIN_ESCALATION_SECONDS:
+            print(f"Page lists ~{estimated} speakers but there is no time left to shard it")
+            return {**full, "truncated": True}
+        print(f"Extracting ~{estimated} speakers from {event_url} in {len(shards)} shards ({found} found on the whole page)")
+        semaphore = asyncio.Semaphore(SHARD_WORKERS)
+
+        async def extract(shard):
+            async with semaphore:
+                return await self._asearch_adaptive(
+                    "speaker_shard", _domain(event_url),
+                    self._speakers_structured_request(shard["url"], shard["section"]),
+                    has_any_speaker, depth, remaining
+                )
+
+        results = await asyncio.gather(*(extract(shard) for shard in shards), return_exceptions=True)
+        return self._merge_shard_results(full, shards, results)
+
+    async def aextract_attendees_from_url(
+        self,
+        event_url: str,
+        depth: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Async version of extract_attendees_from_url."""
+        return await self._asearch_adaptive(
+            "attendee_table", _domain(event_url), self._attendee_table_request(event_url),
+            has_attendee_table, depth, timeout
+        )
+
+    async def aextract_speakers_structured(
+        self,
+        event_url: str,
+        depth: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Async version of extract_speakers_structured."""
+        return await self._asearch_adaptive(
+            "speakers", _domain(event_url), self._speakers_structured_request(event_url),
+            has_speakers, depth, timeout
         )
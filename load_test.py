@@ -0,0 +1,652 @@
+"""
+Load test of the web app under concurrent users.
+
+Starts local stand-ins for the Linkup and OpenAI APIs (with configurable latency
+and error rate), runs app.py against them in a child process, and drives it
+with simulated users at increasing concurrency levels. Each user sends a
+request picked from the request mix, waits for the response, then thinks (an
+exponentially distributed pause) before sending the next one.
+
+For every level it reports throughput, latency percentiles, the error rate and
+the server's threads and memory, then the saturation point: the first level at
+which throughput stops growing, p95 latency passes --slo, or errors pass
+--max-error-rate.
+
+Request kinds for --mix:
+    analyze     POST /api/analyze with refresh (the full pipeline)
+    cached      POST /api/analyze without refresh (mostly result cache hits)
+    top_k       POST /api/analyze with refresh and top_k 5
+    attendees   GET a page of /api/results/<id>/attendees for an earlier result
+    health      GET /api/health
+
+Usage:
+    python load_test.py [--levels 1,2,4,8,16] [--duration 30] [--think-time 1]
+                        [--mix analyze=6,cached=2,attendees=1,health=1]
+                        [--linkup-latency 2] [--openai-latency 3]
+                        [--output report.json] [--max-error-rate 0.01] [--max-p95 60]
+
+    python load_test.py --url http://localhost:5001 --pid <server pid>
+        Drive an already running server (e.g. serve.py) instead.
+    python load_test.py --replay cassettes/prod.jsonl --event-url <recorded event>
+        Replay recorded API traffic (see cassette.py) instead of the stand-ins.
+"""
+import argparse
+import hashlib
+import http.client
+import json
+import math
+import os
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+REQUEST_KINDS = ("analyze", "cached", "top_k", "attendees", "health")
+DEFAULT_MIX = "analyze=6,cached=2,attendees=1,health=1"
+DEFAULT_LEVELS = "1,2,4,8,16"
+COMPANY_URL = "https://www.load-test.example.com"
+COMPANY_NAME = "Load Test Inc"
+# A level saturates the server when it adds less than this share of throughput
+SATURATION_GAIN = 0.10
+# Seconds between samples of the server's threads and memory
+SAMPLE_INTERVAL = 0.5
+# Longest a single request may take (an analysis is capped at 300s on Vercel)
+REQUEST_TIMEOUT = 330
+
+_FIRST_NAMES = ("Ada", "Ben", "Chloe", "Dev", "Elena", "Farid", "Grace", "Hiro", "Ines", "Jonas", "Kemi", "Liam")
+_LAST_NAMES = ("Ahmed", "Brown", "Chen", "Diaz", "Evans", "Fischer", "Garcia", "Haddad", "Ito", "Jensen", "Kowalski")
+_TITLES = ("CTO", "VP Engineering", "Head of Data", "Staff Engineer", "Product Manager", "CEO", "Data Scientist")
+_COMPANIES = ("Acme Analytics", "Globex", "Initech", "Umbrella Health", "Stark Logistics", "Wayne Finance")
+
+_ICP_ANSWER = (
+    "Load Test Inc sells developer tooling to mid-market and enterprise software companies. "
+    "Its ideal customers are engineering and data leaders (CTOs, VPs of Engineering, heads of "
+    "data) at B2B SaaS, fintech and healthcare technology companies with 200 to 5,000 employees "
+    "in North America and Europe, who struggle with slow delivery and unreliable data pipelines."
+)
+
+
+def _seed(text: str) -> int:
+    return int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16)
+
+
+def synthetic_speakers(event_url: str, count: int) -> List[Dict[str, str]]:
+    """Return the same made-up speakers for an event URL on every call."""
+    rng = random.Random(_seed(event_url))
+    return [
+        {
+            "name": f"{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)} {i + 1}",
+            "title": rng.choice(_TITLES),
+            "company": rng.choice(_COMPANIES),
+            "bio": "Speaks about scaling engineering teams and data platforms.",
+        }
+        for i in range(count)
+    ]
+
+
+def linkup_response(payload: Dict[str, Any], speakers: int) -> Dict[str, Any]:
+    """Answer a Linkup /search payload the way the real API would, with synthetic data."""
+    output_type = payload.get("outputType")
+    if output_type == "structured":
+        schema = json.dumps(payload.get("structuredOutputSchema") or {})
+        if "estimated_speakers" in schema:
+            # A single page: no sharding
+            return {"estimated_speakers": speakers, "shards": []}
+        match = re.search(r"https?://[^\s\"']+", payload.get("q", ""))
+        event_url = match.group(0).rstrip(".,") if match else "event"
+        return {"speakers": synthetic_speakers(event_url, speakers)}
+    if output_type == "searchResults":
+        return {"results": []}
+    return {
+        "answer": _ICP_ANSWER,
+        "sources": [{"name": "Load Test Inc", "url": COMPANY_URL, "snippet": _ICP_ANSWER[:120]}],
+    }
+
+
+def openai_response(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Answer a chat completion request, scoring every row of the attendee table in the prompt."""
+    prompt = payload["messages"][-1]["content"]
+    rows = [line.strip().strip("|").split("|") for line in prompt.splitlines() if line.strip().startswith("|")]
+    attendees = []
+    for cells in rows[2:]:
+        cells = [cell.strip() for cell in cells]
+        if len(cells) < 3:
+            continue
+        rng = random.Random(_seed(cells[0]))
+        icp_score, value_score = rng.randint(10, 95), rng.randint(10, 95)
+        average = (icp_score + value_score) / 2
+        attendees.append({
+            "name": cells[0],
+            "role": cells[1],
+            "company": cells[2],
+            "icp_match_score": icp_score,
+            "business_value_score": value_score,
+            "match_reasoning": "Synthetic score from the load-test stand-in.",
+            "opportunity_type": "Perfect" if average > 85 else "Good" if average > 60 else "Moderate" if average > 30 else "Poor",
+            "recommended_action": "Reach out after the event.",
+        })
+    content = json.dumps({"attendees": attendees, "overall_event_assessment": "Synthetic event."}) if rows else _ICP_ANSWER
+    return {
+        "id": f"chatcmpl-load-test-{random.getrandbits(32):08x}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": payload.get("model", "gpt-4o-mini"),
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4, "total_tokens": (len(prompt) + len(content)) // 4},
+    }
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serves Linkup /v1/search and OpenAI /v1/chat/completions."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        stand_in = self.server.stand_in
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        if self.path.endswith("/search"):
+            service, body = "linkup", linkup_response(payload, stand_in.speakers)
+        elif self.path.endswith("/chat/completions"):
+            service, body = "openai", openai_response(payload)
+        else:
+            self._send(404, {"error": f"Unknown path {self.path}"})
+            return
+        status = stand_in.respond(service)
+        self._send(status, body if status == 200 else {"error": {"message": "Stand-in failure", "type": "server_error"}})
+
+    def _send(self, status: int, body: Dict[str, Any]):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInAPIs:
+    """Local Linkup and OpenAI stand-ins with a configurable latency and error rate."""
+
+    def __init__(self, linkup_latency: float = 2.0, openai_latency: float = 3.0, error_rate: float = 0.0, speakers: int = 8):
+        """
+        Args:
+            linkup_latency: Mean seconds per Linkup search.
+            openai_latency: Mean seconds per chat completion.
+            error_rate: Share of calls answered with HTTP 500.
+            speakers: Speakers listed for every event.
+        """
+        self.latency = {"linkup": linkup_latency, "openai": openai_latency}
+        self.error_rate = error_rate
+        self.speakers = speakers
+        self.calls = {"linkup": 0, "openai": 0}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+        self._server.daemon_threads = True
+        self._server.stand_in = self
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def respond(self, service: str) -> int:
+        """Wait out a call's latency (+/-25% jitter) and return its HTTP status."""
+        with self._lock:
+            self.calls[service] += 1
+        time.sleep(self.latency[service] * random.uniform(0.75, 1.25))
+        return 500 if random.random() < self.error_rate else 200
+
+    def start(self) -> "StandInAPIs":
+        threading.Thread(target=self._server.serve_forever, name="stand-in-apis", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class ProcessSampler:
+    """Samples the thread count and resident memory of a process (Linux /proc, or psutil)."""
+
+    def __init__(self, pid: int, interval: float = SAMPLE_INTERVAL):
+        self.pid = pid
+        self.interval = interval
+        self.threads: List[int] = []
+        self.rss_mb: List[float] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def sample(self) -> Optional[tuple]:
+        """Return (threads, RSS in MB), or None if the process cannot be inspected."""
+        try:
+            with open(f"/proc/{self.pid}/status") as f:
+                fields = dict(line.split(":", 1) for line in f if ":" in line)
+            return int(fields["Threads"]), int(fields["VmRSS"].split()[0]) / 1024
+        except (OSError, KeyError, ValueError):
+            pass
+        try:
+            import psutil
+            process = psutil.Process(self.pid)
+            return process.num_threads(), process.memory_info().rss / 2 ** 20
+        except Exception:
+            return None
+
+    def start(self) -> "ProcessSampler":
+        self._thread = threading.Thread(target=self._run, name="process-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            sample = self.sample()
+            if sample is not None:
+                self.threads.append(sample[0])
+                self.rss_mb.append(sample[1])
+
+    def stop(self) -> Optional[Dict[str, float]]:
+        """Stop sampling and return peak/mean threads and memory (None without samples)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if not self.threads:
+            return None
+        return {
+            "threads_peak": max(self.threads),
+            "threads_mean": round(sum(self.threads) / len(self.threads), 1),
+            "rss_peak_mb": round(max(self.rss_mb), 1),
+            "rss_mean_mb": round(sum(self.rss_mb) / len(self.rss_mb), 1),
+        }
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """
+    Parse a request mix such as "analyze=6,health=1" into weights.
+
+    Raises:
+        ValueError: If a kind is unknown or a weight is not a positive number.
+    """
+    mix = {}
+    for part in filter(None, (part.strip() for part in text.split(","))):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in REQUEST_KINDS:
+            raise ValueError(f"Unknown request kind '{kind}' (expected one of {', '.join(REQUEST_KINDS)})")
+        mix[kind] = float(weight or 1)
+        if mix[kind] <= 0:
+            raise ValueError(f"Weight of '{kind}' must be positive")
+    if not mix:
+        raise ValueError("The request mix is empty")
+    return mix
+
+
+def percentile(sorted_values: List[float], share: float) -> Optional[float]:
+    """Nearest-rank percentile of already sorted values (None if empty)."""
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(share * len(sorted_values)) - 1)]
+
+
+class LoadGenerator:
+    """Simulated users sending a request mix to the app."""
+
+    def __init__(self, base_url: str, mix: Dict[str, float], events: List[str], think_time: float = 1.0):
+        """
+        Args:
+            base_url: URL of the app (e.g. http://127.0.0.1:5001).
+            mix: Weight of each request kind.
+            events: Event URLs the analyze requests pick from.
+            think_time: Mean seconds a user waits between requests (0 for none).
+        """
+        parsed = urlparse(base_url)
+        self.host = parsed.hostname
+        self.port = parsed.port or (443 if parsed.scheme == "https" else 80)
+        self.https = parsed.scheme == "https"
+        self.kinds = list(mix)
+        self.weights = [mix[kind] for kind in self.kinds]
+        self.events = events
+        self.think_time = think_time
+        self.result_ids: List[str] = []
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        connection_class = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        return connection_class(self.host, self.port, timeout=REQUEST_TIMEOUT)
+
+    def _request(self, kind: str) -> tuple:
+        """Return (kind, method, path, body) for one request of a kind."""
+        if kind == "attendees":
+            with self._lock:
+                result_id = random.choice(self.result_ids) if self.result_ids else None
+            if result_id is not None:
+                return kind, "GET", f"/api/results/{result_id}/attendees?limit=25", None
+            kind = "cached"  # No result to page through yet
+        if kind == "health":
+            return kind, "GET", "/api/health", None
+        body = {
+            "event_url": random.choice(self.events),
+            "company_url": COMPANY_URL,
+            "company_name": COMPANY_NAME,
+            "view": "slim",
+            "refresh": kind != "cached",
+        }
+        if kind == "top_k":
+            body.update(top_k=5, view="summary")
+        return kind, "POST", "/api/analyze", body
+
+    def _send(self, connection, method: str, path: str, body: Optional[dict]) -> tuple:
+        """Send one request. Returns (status, response body)."""
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"} if data is not None else {}
+        connection.request(method, path, body=data, headers=headers)
+        response = connection.getresponse()
+        return response.status, response.read()
+
+    def _user(self, stop_at: float, samples: list):
+        rng = random.Random()
+        connection = self._connection()
+        while time.monotonic() < stop_at:
+            kind, method, path, body = self._request(rng.choices(self.kinds, self.weights)[0])
+            started = time.perf_counter()
+            try:
+                status, payload = self._send(connection, method, path, body)
+            except (OSError, http.client.HTTPException):
+                status, payload = 0, b""
+                connection.close()
+                connection = self._connection()
+            samples.append((kind, status, time.perf_counter() - started))
+            if kind != "attendees" and method == "POST" and status == 200:
+                self._remember(payload)
+            if self.think_time > 0:
+                time.sleep(min(rng.expovariate(1 / self.think_time), max(0.0, stop_at - time.monotonic())))
+        connection.close()
+
+    def _remember(self, payload: bytes):
+        try:
+            result_id = json.loads(payload)["metadata"]["result_id"]
+        except (ValueError, KeyError, TypeError):
+            return
+        with self._lock:
+            if result_id not in self.result_ids:
+                self.result_ids.append(result_id)
+
+    def run(self, users: int, duration: float, pid: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Run one concurrency level.
+
+        Args:
+            users: Concurrent users.
+            duration: Seconds users start new requests for (requests in flight
+                at the end are waited for and counted).
+            pid: Server process to sample threads and memory of.
+
+        Returns:
+            The level's report (see summarize).
+        """
+        samples: list = []
+        sampler = ProcessSampler(pid).start() if pid else None
+        started = time.monotonic()
+        threads = [
+            threading.Thread(target=self._user, args=(started + duration, samples), name=f"load-user-{i}", daemon=True)
+            for i in range(users)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+        report = summarize(samples, elapsed)
+        report["users"] = users
+        report["process"] = sampler.stop() if sampler is not None else None
+        return report
+
+
+def summarize(samples: List[tuple], elapsed: float) -> Dict[str, Any]:
+    """Throughput, latency percentiles and errors of one level's (kind, status, seconds) samples."""
+    latencies = sorted(seconds for _, status, seconds in samples if 200 <= status < 400)
+    errors = sum(1 for _, status, _ in samples if not 200 <= status < 400)
+    by_kind = {}
+    for kind in sorted({kind for kind, _, _ in samples}):
+        kind_latencies = sorted(seconds for k, status, seconds in samples if k == kind and 200 <= status < 400)
+        by_kind[kind] = {
+            "requests": sum(1 for k, _, _ in samples if k == kind),
+            "errors": sum(1 for k, status, _ in samples if k == kind and not 200 <= status < 400),
+            "p50": percentile(kind_latencies, 0.50),
+            "p95": percentile(kind_latencies, 0.95),
+        }
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "duration": round(elapsed, 2),
+        "throughput": round(len(latencies) / elapsed, 3) if elapsed else 0.0,
+        "latency": {
+            "mean": round(sum(latencies) / len(latencies), 3) if latencies else None,
+            "p50": percentile(latencies, 0.50),
+            "p90": percentile(latencies, 0.90),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "max": latencies[-1] if latencies else None,
+        },
+        "by_kind": by_kind,
+    }
+
+
+def find_saturation(levels: List[Dict[str, Any]], slo: Optional[float] = None, max_error_rate: float = 0.01) -> Dict[str, Any]:
+    """
+    Find the first level at which adding users stopped paying off.
+
+    A level saturates the server if its throughput grew less than SATURATION_GAIN
+    over the best level so far, its p95 latency is over slo, or its error rate
+    is over max_error_rate.
+
+    Returns:
+        Dictionary with the saturated level's users and reason (None if no level
+        saturated), and the best throughput seen and at how many users.
+    """
+    best = None
+    for level in levels:
+        p95 = level["latency"]["p95"]
+        reason = None
+        if level["error_rate"] > max_error_rate:
+            reason = f"error rate {level['error_rate']:.1%} over {max_error_rate:.1%}"
+        elif slo is not None and p95 is not None and p95 > slo:
+            reason = f"p95 latency {p95:.2f}s over the {slo:.2f}s SLO"
+        elif best is not None and level["throughput"] < best["throughput"] * (1 + SATURATION_GAIN):
+            reason = f"throughput {level['throughput']:.2f}/s did not grow past {best['throughput']:.2f}/s at {best['users']} users"
+        if reason is not None:
+            return {"users": level["users"], "reason": reason, **_best(best)}
+        best = level
+    return {"users": None, "reason": None, **_best(best)}
+
+
+def _best(level: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if level is None:
+        return {"max_throughput": None, "max_throughput_users": None}
+    return {"max_throughput": level["throughput"], "max_throughput_users": level["users"]}
+
+
+def _wait_until_healthy(base_url: str, process: Optional[subprocess.Popen], timeout: float = 60) -> dict:
+    """Poll /api/health until the server answers. Returns the health response."""
+    parsed = urlparse(base_url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"The app server exited with code {process.returncode} (see load_test_server.log)")
+        try:
+            connection = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=5)
+            connection.request("GET", "/api/health")
+            response = connection.getresponse()
+            if response.status == 200:
+                return json.loads(response.read())
+        except (OSError, http.client.HTTPException, ValueError):
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"The app at {base_url} did not become healthy within {timeout:.0f}s")
+
+
+def start_app_server(
+    port: int,
+    stand_in_url: Optional[str],
+    replay: Optional[str],
+    log_path: str,
+    warm_scores: bool = False
+) -> subprocess.Popen:
+    """
+    Run app.py in a child process, pointed at the stand-ins (or a replayed cassette).
+
+    Unless warm_scores is set, per-person scores are never reused, so every
+    refreshed analysis scores its attendees with the model.
+    """
+    env = dict(os.environ, PORT=str(port), FLASK_DEBUG="False", PYTHONUNBUFFERED="1")
+    if not warm_scores:
+        env["PERSON_SCORE_TTL"] = "0"
+    for name in ("CASSETTE_MODE", "CASSETTE_PATH", "SHARED_CACHE_PATH"):
+        env.pop(name, None)
+    env.setdefault("LINKUP_API_KEY", "load-test")
+    env.setdefault("OPENAI_API_KEY", "load-test")
+    if replay:
+        env.update(CASSETTE_MODE="replay", CASSETTE_PATH=replay)
+    else:
+        env.update(LINKUP_BASE_URL=stand_in_url, OPENAI_BASE_URL=stand_in_url, LINKUP_API_KEY="load-test", OPENAI_API_KEY="load-test")
+    log = open(log_path, "w")
+    return subprocess.Popen(
+        [sys.executable, "app.py"], cwd=os.path.dirname(os.path.abspath(__file__)) or ".",
+        env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+
+
+def _free_port() -> int:
+    import socket
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _seconds(value: Optional[float]) -> str:
+    return f"{value:.2f}s" if value is not None else "-"
+
+
+def print_report(report: Dict[str, Any]):
+    """Print the levels as a table, then the saturation point."""
+    print(f"\n{'users':>5} {'reqs':>6} {'err%':>6} {'req/s':>7} {'p50':>8} {'p90':>8} {'p95':>8} {'p99':>8} {'threads':>8} {'rss MB':>8}")
+    for level in report["levels"]:
+        latency, process = level["latency"], level["process"] or {}
+        print(
+            f"{level['users']:>5} {level['requests']:>6} {level['error_rate']:>6.1%} {level['throughput']:>7.2f} "
+            f"{_seconds(latency['p50']):>8} {_seconds(latency['p90']):>8} {_seconds(latency['p95']):>8} "
+            f"{_seconds(latency['p99']):>8} {process.get('threads_peak', '-'):>8} {process.get('rss_peak_mb', '-'):>8}"
+        )
+    saturation = report["saturation"]
+    if saturation["users"] is not None:
+        print(f"\nSaturated at {saturation['users']} users: {saturation['reason']}")
+    else:
+        print("\nNo saturation up to the highest level")
+    if saturation["max_throughput"] is not None:
+        print(f"Best throughput: {saturation['max_throughput']:.2f} req/s at {saturation['max_throughput_users']} users")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load test the web app with simulated concurrent users")
+    parser.add_argument("--levels", default=DEFAULT_LEVELS, help=f"Concurrent users per level (default: {DEFAULT_LEVELS})")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per level (default: 30)")
+    parser.add_argument("--think-time", type=float, default=1.0, help="Mean seconds between a user's requests (default: 1)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Request kinds and weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--events", type=int, default=20, help="Distinct synthetic events analyzed (default: 20)")
+    parser.add_argument("--event-url", action="append", help="Event URL to analyze (repeatable; replaces the synthetic events)")
+    parser.add_argument("--speakers", type=int, default=8, help="Speakers per synthetic event (default: 8)")
+    parser.add_argument("--linkup-latency", type=float, default=2.0, help="Mean seconds per stand-in Linkup call (default: 2)")
+    parser.add_argument("--openai-latency", type=float, default=3.0, help="Mean seconds per stand-in OpenAI call (default: 3)")
+    parser.add_argument("--api-error-rate", type=float, default=0.0, help="Share of stand-in API calls that fail (default: 0)")
+    parser.add_argument("--warm-scores", action="store_true", help="Let analyses reuse per-person scores (default: always score)")
+    parser.add_argument("--replay", metavar="CASSETTE", help="Serve API calls from a recorded cassette instead of the stand-ins")
+    parser.add_argument("--url", help="Load test a running server at this URL instead of starting app.py")
+    parser.add_argument("--pid", type=int, help="Process to sample threads and memory of (default: the server's)")
+    parser.add_argument("--slo", type=float, help="p95 latency in seconds past which a level counts as saturated")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Error rate past which a level counts as saturated (default: 0.01)")
+    parser.add_argument("--max-p95", type=float, help="Exit with status 1 if any level's p95 latency exceeds this")
+    parser.add_argument("--output", help="Write the full report as JSON to this file")
+    args = parser.parse_args()
+
+    try:
+        levels = [int(level) for level in args.levels.split(",") if level.strip()]
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    events = args.event_url or [f"https://events.load-test.example.com/{i}" for i in range(args.events)]
+
+    stand_in = None
+    server = None
+    try:
+        if args.url:
+            base_url = args.url.rstrip("/")
+            health = _wait_until_healthy(base_url, None)
+        else:
+            if not args.replay:
+                stand_in = StandInAPIs(args.linkup_latency, args.openai_latency, args.api_error_rate, args.speakers).start()
+                print(f"Stand-in Linkup/OpenAI APIs on {stand_in.url}")
+            port = _free_port()
+            server = start_app_server(
+                port, stand_in.url if stand_in else None, args.replay, "load_test_server.log", args.warm_scores
+            )
+            base_url = f"http://127.0.0.1:{port}"
+            health = _wait_until_healthy(base_url, server)
+            print(f"App server (pid {server.pid}) on {base_url}, log in load_test_server.log")
+
+        pid = args.pid or health.get("pid")
+        if args.url and pid and not args.pid and ProcessSampler(pid).sample() is None:
+            pid = None  # The server is not on this machine
+        generator = LoadGenerator(base_url, mix, events, args.think_time)
+
+        reports = []
+        for users in levels:
+            print(f"Running {users} users for {args.duration:.0f}s...")
+            level = generator.run(users, args.duration, pid)
+            reports.append(level)
+            print(f"  {level['throughput']:.2f} req/s, p95 {_seconds(level['latency']['p95'])}, errors {level['error_rate']:.1%}")
+
+        report = {
+            "settings": {
+                "url": base_url,
+                "levels": levels,
+                "duration": args.duration,
+                "think_time": args.think_time,
+                "mix": mix,
+                "events": len(events),
+                "backend": "replay" if args.replay else "external" if args.url else "stand-in",
+                "linkup_latency": args.linkup_latency,
+                "openai_latency": args.openai_latency,
+                "api_error_rate": args.api_error_rate,
+                "warm_scores": args.warm_scores,
+            },
+            "levels": reports,
+            "saturation": find_saturation(reports, args.slo, args.max_error_rate),
+            "api_calls": dict(stand_in.calls) if stand_in else None,
+        }
+    except RuntimeError as e:
+        print(f"✗ {e}")
+        return 1
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        if stand_in is not None:
+            stand_in.stop()
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+    # Errors past saturation are expected; errors at the lowest level are not
+    failed = bool(reports) and reports[0]["error_rate"] > args.max_error_rate
+    if args.max_p95 is not None:
+        failed = failed or any((level["latency"]["p95"] or 0) > args.max_p95 for level in reports)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
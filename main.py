@@ -6,15 +6,34 @@ if they match your company's Ideal Customer Profile.
 """
 import os
 import json
+import heapq
 import argparse
+from collections import Counter
 from datetime import datetime
-from typing import Optional
-from dotenv import load_dotenv
+from typing import Iterable, Iterator, Optional
 
 from linkup_client import LinkupClient
+from depth_policy import DepthPolicy
+from shared_cache import open_shared_cache
+from source_store import SourceStore
 from icp_matcher import ICPMatcher
+from icp_profiles import ICPProfileStore
+from attendee_import import attendees_to_table, chunked, iter_attendees, iter_markdown_attendees
+from attendee_index import sort_value, top_attendees
+from icp_matcher_openai import prior_scores
+from lead_ranking import BestFirstRanker, parse_top_k
+from cassette import Cassette
+from profiling import PROFILE_ENGINES, Profiler
+from tracing import traced
+from entity_resolution import unique_people
+from result_export import FORMATS, detect_format, open_result_writer, write_metadata
+from env_config import load_env
 
-load_dotenv()
+load_env()
+
+
+# Number of top matches shown in the console summary
+TOP_MATCHES_SHOWN = 5
 
 
 class EventICPMatcher:
@@ -23,7 +42,8 @@ class EventICPMatcher:
     def __init__(
         self,
         linkup_api_key: Optional[str] = None,
-        anthropic_api_key: Optional[str] = None
+        anthropic_api_key: Optional[str] = None,
+        cassette: Optional[Cassette] = None
     ):
         """
         Initialize the Event ICP Matcher.
@@ -31,10 +51,23 @@ class EventICPMatcher:
         Args:
             linkup_api_key: Linkup API key (optional, will use env variable if not provided).
             anthropic_api_key: Anthropic API key (optional, will use env variable if not provided).
+            cassette: Records or replays every Linkup and Claude call (default: CASSETTE_MODE).
         """
-        self.linkup = LinkupClient(api_key=linkup_api_key)
-        self.icp_matcher = ICPMatcher(api_key=anthropic_api_key)
+        self.linkup = LinkupClient(
+            api_key=linkup_api_key,
+            depth_policy=DepthPolicy(
+                mode=os.getenv("LINKUP_DEPTH_MODE", "adaptive"),
+                backend=open_shared_cache("linkup_depth")
+            ),
+            cassette=cassette
+        )
+        self.icp_matcher = ICPMatcher(api_key=anthropic_api_key, cassette=cassette)
+        self.icp_profiles = ICPProfileStore(os.getenv("ICP_PROFILES_PATH", "icp_profiles.json"))
+        # Saved results reference sources by id and carry a source_index with the
+        # records, so files stay readable without any store
+        self.sources = SourceStore()
 
+    @traced("cli.analyze_event")
     def analyze_event(
         self,
         event_name: str,
@@ -42,7 +75,10 @@ class EventICPMatcher:
         company_name: str = "Linkup",
         company_domain: str = "linkup.so",
         use_company_research: bool = True,
-        output_file: Optional[str] = None
+        output_file: Optional[str] = None,
+        output_format: Optional[str] = None,
+        icp_profile_id: Optional[str] = None,
+        top_k: Optional[int] = None
     ) -> dict:
         """
         Analyze event attendees and match them against company ICP.
@@ -54,6 +90,10 @@ class EventICPMatcher:
             company_domain: Your company domain.
             use_company_research: Whether to research company ICP using Linkup (recommended).
             output_file: Optional file path to save results.
+            output_format: "json" (default for .json), or "jsonl"/"csv"/"parquet" to export
+                attendees with metadata in a separate .meta.json file.
+            icp_profile_id: Stored ICP profile to use instead of researching the company.
+            top_k: Only analyze the K most promising attendees (see _analyze_top_k).
 
         Returns:
             Dictionary containing the full analysis results.
@@ -64,27 +104,9 @@ class EventICPMatcher:
 
         # Step 1: Get company information and ICP
         print(f"[Step 1/3] Researching {company_name}'s ICP...")
-        if use_company_research:
-            try:
-                company_response = self.linkup.get_company_info(
-                    company_name=company_name,
-                    company_domain=company_domain
-                )
-                company_info = company_response.get("answer", "")
-                print(f"✓ Company research completed ({len(company_info)} characters)")
-            except Exception as e:
-                print(f"⚠ Warning: Could not fetch company info from Linkup: {e}")
-                print("  Falling back to Claude's knowledge...")
-                company_info = self.icp_matcher.quick_company_icp_analysis(
-                    company_name=company_name,
-                    company_domain=company_domain
-                )
-        else:
-            company_info = self.icp_matcher.quick_company_icp_analysis(
-                company_name=company_name,
-                company_domain=company_domain
-            )
-            print(f"✓ Company ICP generated using Claude")
+        company_info, icp_profile = self._company_icp(
+            company_name, company_domain, use_company_research, icp_profile_id
+        )
 
         # Step 2: Find event attendees
         print(f"\n[Step 2/3] Searching for attendees of '{event_name}'...")
@@ -105,18 +127,21 @@ class EventICPMatcher:
             }
 
         # Step 3: Analyze ICP matches using Claude
-        print(f"\n[Step 3/3] Analyzing ICP matches with Claude AI...")
-        analysis_result = self.icp_matcher.analyze_icp_match(
-            company_info=company_info,
-            attendee_info=attendee_info,
-            company_name=company_name
-        )
+        print("\n[Step 3/3] Analyzing ICP matches with Claude AI...")
+        if top_k:
+            analysis_result = self._analyze_top_k(company_info, attendee_info, company_name, top_k)
+        else:
+            analysis_result = self.icp_matcher.analyze_icp_match(
+                company_info=company_info,
+                attendee_info=attendee_info,
+                company_name=company_name
+            )
 
         if "error" in analysis_result:
             print(f"✗ Error during analysis: {analysis_result['error']}")
             return analysis_result
 
-        print(f"✓ Analysis completed successfully\n")
+        print("✓ Analysis completed successfully\n")
 
         # Compile full results
         results = {
@@ -125,6 +150,7 @@ class EventICPMatcher:
                 "event_url": event_url,
                 "company_name": company_name,
                 "company_domain": company_domain,
+                "icp_profile": _profile_ref(icp_profile),
                 "analysis_date": datetime.now().isoformat(),
             },
             "company_icp": company_info,
@@ -138,11 +164,273 @@ class EventICPMatcher:
 
         # Save to file if requested
         if output_file:
-            self._save_results(results, output_file)
+            self._save_results(results, output_file, output_format)
+            print(f"\n✓ Full results saved to: {output_file}")
+
+        return results
+
+    def _analyze_top_k(self, company_info: str, attendee_info: str, company_name: str, top_k: int) -> dict:
+        """
+        Analyze only the K most promising attendees of an attendee table.
+
+        Attendees are ordered by a cheap prior (title seniority, ICP keywords) and
+        sent to Claude in chunks, best first, until no remaining attendee can make
+        the top K (see lead_ranking.BestFirstRanker). Answers without an attendee
+        table are analyzed in full.
+        """
+        attendees = list(unique_people(iter_markdown_attendees(attendee_info)))
+        if not attendees:
+            print(f"⚠ No attendee table in the search results; analyzing all attendees instead of the top {top_k}")
+            return self.icp_matcher.analyze_icp_match(
+                company_info=company_info,
+                attendee_info=attendee_info,
+                company_name=company_name
+            )
+
+        rows = attendees_to_table(attendees).splitlines()[2:]
+        ranker = BestFirstRanker(
+            attendees, prior_scores(company_info, rows), top_k,
+            score_of=lambda attendee: sort_value(attendee, "icp_match_score"),
+            max_score=10
+        )
+        results = []
+        chunk = ranker.next_chunk()
+        while chunk:
+            result = self.icp_matcher.analyze_icp_match(
+                company_info=company_info,
+                attendee_info=attendees_to_table(chunk),
+                company_name=company_name
+            )
+            if "error" in result:
+                if not results:
+                    return result
+                print(f"⚠ Warning: Stopping top-{top_k} analysis after a failed chunk: {result['error']}")
+                break
+            results.append(result)
+            ranker.add(result.get("attendees", []))
+            chunk = ranker.next_chunk()
+
+        stats = ranker.stats()
+        print(f"✓ Analyzed {stats['scored']} of {stats['candidates']} attendees for the top {top_k}")
+        if stats["approximate"]:
+            print("  (approximate: unscored attendees were ruled out by their prior, not by a model score)")
+        top = ranker.top()
+        analysis = {
+            "summary": self.icp_matcher.summarize_priorities(top),
+            "attendees": top,
+            "top_k": stats
+        }
+        for key in ("overall_event_assessment", "recommendations"):
+            value = next((result[key] for result in results if result.get(key)), None)
+            if value:
+                analysis[key] = value
+        return analysis
+
+    def _company_icp(
+        self,
+        company_name: str,
+        company_domain: str,
+        use_company_research: bool,
+        icp_profile_id: Optional[str] = None
+    ) -> tuple:
+        """
+        Return the company ICP from a stored profile, or research it.
+
+        Returns:
+            Tuple of (ICP text, profile or None).
+
+        Raises:
+            ValueError: If icp_profile_id does not name a stored profile.
+        """
+        if icp_profile_id:
+            icp_profile = self.icp_profiles.get(icp_profile_id)
+            if icp_profile is None:
+                raise ValueError(f"ICP profile not found: {icp_profile_id}")
+            print(f"✓ Using ICP profile '{icp_profile['id']}' v{icp_profile['version']} (skipping research)")
+            return icp_profile["icp"], icp_profile
+        return self._research_company_icp(company_name, company_domain, use_company_research), None
+
+    def _research_company_icp(
+        self,
+        company_name: str,
+        company_domain: str,
+        use_company_research: bool
+    ) -> str:
+        """Research the company's ICP with Linkup, falling back to Claude's knowledge."""
+        if use_company_research:
+            try:
+                company_response = self.linkup.get_company_info(
+                    company_name=company_name,
+                    company_domain=company_domain
+                )
+                company_info = company_response.get("answer", "")
+                print(f"✓ Company research completed ({len(company_info)} characters)")
+            except Exception as e:
+                print(f"⚠ Warning: Could not fetch company info from Linkup: {e}")
+                print("  Falling back to Claude's knowledge...")
+                company_info = self.icp_matcher.quick_company_icp_analysis(
+                    company_name=company_name,
+                    company_domain=company_domain
+                )
+        else:
+            company_info = self.icp_matcher.quick_company_icp_analysis(
+                company_name=company_name,
+                company_domain=company_domain
+            )
+            print("✓ Company ICP generated using Claude")
+
+        return company_info
+
+    @traced("cli.analyze_attendee_file")
+    def analyze_attendee_file(
+        self,
+        attendees_file: str,
+        event_name: str,
+        company_name: str = "Linkup",
+        company_domain: str = "linkup.so",
+        use_company_research: bool = True,
+        chunk_size: int = 20,
+        output_file: Optional[str] = None,
+        output_format: Optional[str] = None,
+        icp_profile_id: Optional[str] = None
+    ) -> dict:
+        """
+        Analyze a pre-scraped attendee export (CSV/JSONL) instead of searching with Linkup.
+
+        The file is streamed: attendees are read lazily and matched chunk by chunk.
+        With a streaming output format, scored attendees are written to the output
+        as they are produced and only the summary and top matches are kept in memory.
+
+        Args:
+            attendees_file: Path to a CSV or JSONL attendee export (Luma, Eventbrite, ...).
+            event_name: Name of the event (for reporting).
+            company_name: Your company name.
+            company_domain: Your company domain.
+            use_company_research: Whether to research company ICP using Linkup (recommended).
+            chunk_size: Attendees analyzed per Claude call.
+            output_file: Optional file path to save results.
+            output_format: "json", "jsonl", "csv" or "parquet" (inferred from output_file).
+            icp_profile_id: Stored ICP profile to use instead of researching the company.
+
+        Returns:
+            Dictionary containing the analysis results. When streaming to output_file,
+            "attendees" holds only the top matches.
+        """
+        print(f"\n{'='*70}")
+        print(f"Event ICP Matcher - Analyzing import: {event_name}")
+        print(f"{'='*70}\n")
+
+        print(f"[Step 1/2] Researching {company_name}'s ICP...")
+        company_info, icp_profile = self._company_icp(
+            company_name, company_domain, use_company_research, icp_profile_id
+        )
+
+        print(f"\n[Step 2/2] Analyzing attendees from {attendees_file} in chunks of {chunk_size}...")
+        if output_file and output_format is None:
+            output_format = detect_format(output_file)
+        writer = open_result_writer(output_file, output_format) if output_format in FORMATS else None
+
+        summary = Counter()
+        attendees = []
+        top_matches = []  # min-heap of (score, sequence, attendee) kept for display when streaming
+        try:
+            for sequence, scored in enumerate(self.iter_scored_attendees(
+                unique_people(iter_attendees(attendees_file)),
+                company_info=company_info,
+                company_name=company_name,
+                chunk_size=chunk_size
+            )):
+                summary.update(self.icp_matcher.summarize_priorities([scored]))
+                if writer is None:
+                    attendees.append(scored)
+                    continue
+                writer.write(scored)
+                entry = (_score(scored), sequence, scored)
+                if len(top_matches) < TOP_MATCHES_SHOWN:
+                    heapq.heappush(top_matches, entry)
+                else:
+                    heapq.heappushpop(top_matches, entry)
+        finally:
+            if writer is not None:
+                writer.close()
+
+        if not summary["total_attendees_analyzed"]:
+            print("✗ Error: No attendees could be analyzed from the file")
+            return {
+                "error": "No attendees analyzed",
+                "details": f"No usable attendee rows in {attendees_file}"
+            }
+
+        if writer is not None:
+            attendees = [entry[2] for entry in sorted(top_matches, reverse=True)]
+        analysis_result = {
+            "summary": dict(summary),
+            "attendees": attendees
+        }
+        print("✓ Analysis completed successfully\n")
+
+        results = {
+            "metadata": {
+                "event_name": event_name,
+                "attendee_file": attendees_file,
+                "company_name": company_name,
+                "company_domain": company_domain,
+                "icp_profile": _profile_ref(icp_profile),
+                "analysis_date": datetime.now().isoformat(),
+            },
+            "company_icp": company_info,
+            "icp_analysis": analysis_result
+        }
+
+        self._display_summary(analysis_result)
+
+        if writer is not None:
+            meta_path = write_metadata(output_file, {
+                **results,
+                "icp_analysis": {"summary": analysis_result["summary"]},
+                "attendees_file_output": output_file,
+                "attendees_written": writer.count
+            })
+            print(f"\n✓ {writer.count} attendees streamed to: {output_file} (metadata: {meta_path})")
+        elif output_file:
+            self._save_results(results, output_file, output_format)
             print(f"\n✓ Full results saved to: {output_file}")
 
         return results
 
+    def iter_scored_attendees(
+        self,
+        attendees: Iterable[dict],
+        company_info: str,
+        company_name: str,
+        chunk_size: int = 20
+    ) -> Iterator[dict]:
+        """
+        Score a stream of attendees chunk by chunk, yielding results as they are produced.
+
+        Args:
+            attendees: Iterable of normalized attendee dictionaries (consumed lazily).
+            company_info: Company ICP information.
+            company_name: Your company name.
+            chunk_size: Attendees analyzed per Claude call.
+
+        Yields:
+            Scored attendee dictionaries. Chunks whose analysis failed are skipped.
+        """
+        processed = 0
+        for chunk in chunked(attendees, chunk_size):
+            processed += len(chunk)
+            result = self.icp_matcher.analyze_icp_match(
+                company_info=company_info,
+                attendee_info=attendees_to_table(chunk),
+                company_name=company_name
+            )
+            if "error" in result:
+                print(f"⚠ Warning: Skipping chunk ending at attendee {processed}: {result['error']}")
+                continue
+            print(f"✓ Analyzed {processed} attendees")
+            yield from result.get("attendees", [])
+
     def _display_summary(self, analysis: dict):
         """Display a formatted summary of the analysis."""
         print(f"\n{'='*70}")
@@ -158,7 +446,7 @@ class EventICPMatcher:
             print(f"  • Not a Fit: {summary.get('not_a_fit', 0)}")
 
         if "overall_event_assessment" in analysis:
-            print(f"\nOverall Assessment:")
+            print("\nOverall Assessment:")
             print(f"  {analysis['overall_event_assessment']}")
 
         if "attendees" in analysis and len(analysis["attendees"]) > 0:
@@ -166,14 +454,10 @@ class EventICPMatcher:
             print("TOP PRIORITY MATCHES")
             print(f"{'='*70}\n")
 
-            # Sort by ICP match score
-            attendees = sorted(
-                analysis["attendees"],
-                key=lambda x: x.get("icp_match_score", 0),
-                reverse=True
-            )
+            # Best ICP match scores first (heap top-K, no full sort)
+            attendees = top_attendees(analysis["attendees"], TOP_MATCHES_SHOWN, sort="icp_match_score")
 
-            for i, attendee in enumerate(attendees[:5], 1):  # Show top 5
+            for i, attendee in enumerate(attendees, 1):
                 print(f"{i}. {attendee.get('name', 'Unknown')} - {attendee.get('role', 'Unknown role')}")
                 print(f"   Company: {attendee.get('company', 'Unknown')}")
                 print(f"   ICP Score: {attendee.get('icp_match_score', 0)}/10 ({attendee.get('opportunity_type', 'Unknown')})")
@@ -193,11 +477,48 @@ class EventICPMatcher:
 
         print(f"\n{'='*70}\n")
 
-    def _save_results(self, results: dict, output_file: str):
-        """Save results to a JSON file."""
+    def _save_results(self, results: dict, output_file: str, output_format: Optional[str] = None):
+        """
+        Save results to a file.
+
+        JSON output holds everything in one document. JSONL, CSV and Parquet output
+        holds one row per attendee, with the rest of the results written to a
+        separate .meta.json file. Sources are saved as ids (see source_store), with
+        their records in source_index.
+        """
         os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
-        with open(output_file, "w") as f:
-            json.dump(results, f, indent=2)
+        results = self.sources.compact(results)
+        results["source_index"] = self.sources.index(results)
+        output_format = output_format or detect_format(output_file)
+        if output_format not in FORMATS:
+            with open(output_file, "w") as f:
+                json.dump(results, f, indent=2)
+            return
+
+        analysis = results.get("icp_analysis", {})
+        with open_result_writer(output_file, output_format) as writer:
+            writer.write_many(analysis.get("attendees", []))
+        write_metadata(output_file, {
+            **results,
+            "icp_analysis": {key: value for key, value in analysis.items() if key != "attendees"},
+            "attendees_file_output": output_file,
+            "attendees_written": writer.count
+        })
+
+
+def _profile_ref(icp_profile: Optional[dict]) -> Optional[dict]:
+    """Return the id, version and fingerprint identifying an ICP profile."""
+    if icp_profile is None:
+        return None
+    return {key: icp_profile[key] for key in ("id", "version", "fingerprint")}
+
+
+def _score(attendee: dict) -> float:
+    """Return an attendee's ICP match score as a number (0 if missing or invalid)."""
+    try:
+        return float(attendee.get("icp_match_score", 0) or 0)
+    except (TypeError, ValueError):
+        return 0.0
 
 
 def main():
@@ -232,33 +553,134 @@ def main():
         action="store_true",
         help="Skip researching company ICP via Linkup and use Claude's knowledge instead"
     )
+    parser.add_argument(
+        "--icp-profile",
+        type=str,
+        help="Id of a stored ICP profile to use instead of researching the company"
+    )
+    parser.add_argument(
+        "--save-icp-profile",
+        type=str,
+        metavar="NAME",
+        help="Save the researched company ICP as a named profile (a new version if it exists)"
+    )
+    parser.add_argument(
+        "--attendees-file",
+        type=str,
+        help="CSV or JSONL attendee export to analyze instead of searching for attendees with Linkup"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=20,
+        help="Attendees analyzed per Claude call when using --attendees-file (default: 20)"
+    )
+    parser.add_argument(
+        "--top-k",
+        type=parse_top_k,
+        help="Only analyze and report the K most promising attendees (scored best-first)"
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="sample",
+        choices=PROFILE_ENGINES,
+        help="Profile the run and write the profile to PROFILE_DIR (default engine: sample)"
+    )
+    replay = parser.add_mutually_exclusive_group()
+    replay.add_argument(
+        "--record",
+        metavar="CASSETTE",
+        help="Record every Linkup and Claude call with its latency to a cassette file"
+    )
+    replay.add_argument(
+        "--replay",
+        metavar="CASSETTE",
+        help="Serve every Linkup and Claude call from a recorded cassette (no network or API keys)"
+    )
+    parser.add_argument(
+        "--latency-scale",
+        type=float,
+        default=1.0,
+        help="With --replay, multiply recorded latencies by this (default: 1, 0 for no delay)"
+    )
     parser.add_argument(
         "--output",
         type=str,
-        help="Output file path for saving results (JSON format)"
+        help="Output file path for saving results (.json, or .jsonl/.csv/.parquet for streaming export)"
+    )
+    parser.add_argument(
+        "--format",
+        choices=("json",) + FORMATS,
+        help="Output format (default: inferred from the --output extension, JSON otherwise)"
     )
 
     args = parser.parse_args()
+    if args.top_k and args.attendees_file:
+        # Attendee files are streamed chunk by chunk, so there is no whole list to rank best-first
+        parser.error("--top-k cannot be combined with --attendees-file")
 
+    profiler = None
+    cassette = None
     try:
-        matcher = EventICPMatcher()
-        results = matcher.analyze_event(
-            event_name=args.event_name,
-            event_url=args.event_url,
-            company_name=args.company_name,
-            company_domain=args.company_domain,
-            use_company_research=not args.no_company_research,
-            output_file=args.output
-        )
+        if args.record or args.replay:
+            cassette = Cassette(
+                args.record or args.replay,
+                "record" if args.record else "replay",
+                latency_scale=args.latency_scale
+            )
+        if args.profile:
+            profiler = Profiler(args.profile, label="cli").start()
+        matcher = EventICPMatcher(cassette=cassette)
+        if args.attendees_file:
+            results = matcher.analyze_attendee_file(
+                attendees_file=args.attendees_file,
+                event_name=args.event_name,
+                company_name=args.company_name,
+                company_domain=args.company_domain,
+                use_company_research=not args.no_company_research,
+                chunk_size=args.chunk_size,
+                output_file=args.output,
+                output_format=args.format,
+                icp_profile_id=args.icp_profile
+            )
+        else:
+            results = matcher.analyze_event(
+                event_name=args.event_name,
+                event_url=args.event_url,
+                company_name=args.company_name,
+                company_domain=args.company_domain,
+                use_company_research=not args.no_company_research,
+                output_file=args.output,
+                output_format=args.format,
+                icp_profile_id=args.icp_profile,
+                top_k=args.top_k
+            )
 
         # Return appropriate exit code
         if "error" in results:
             return 1
+
+        if args.save_icp_profile:
+            icp_profile = matcher.icp_profiles.save(
+                name=args.save_icp_profile,
+                icp=results["company_icp"],
+                company_name=args.company_name,
+                company_url=f"https://{args.company_domain}",
+                source="linkup" if not args.no_company_research else "claude"
+            )
+            print(f"✓ Saved ICP profile '{icp_profile['id']}' v{icp_profile['version']} "
+                  f"(fingerprint {icp_profile['fingerprint']})")
         return 0
 
     except Exception as e:
         print(f"\n✗ Fatal error: {e}")
         return 1
+    finally:
+        if profiler is not None:
+            profiler.stop()
+        if cassette is not None:
+            print(f"Cassette {cassette.path}: {cassette.stats()}")
 
 
 if __name__ == "__main__":
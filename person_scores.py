@@ -0,0 +1,136 @@
+"""
+Person-level ICP score cache shared across events.
+
+The same people speak at many events. Scores are cached per (person, company,
+ICP fingerprint), so a speaker already scored against an unchanged ICP is
+filled in locally and only new people are sent to the model.
+"""
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def icp_fingerprint(icp_text: str) -> str:
+    """
+    Return a stable fingerprint of an ICP text.
+
+    Whitespace differences do not change the fingerprint; any other edit does.
+
+    Args:
+        icp_text: The ICP description the attendees are matched against.
+
+    Returns:
+        Hex digest (16 characters).
+    """
+    normalized = " ".join((icp_text or "").split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def normalize_person(value: Any) -> str:
+    """Normalize a person or company name for cache keys."""
+    return " ".join(str(value or "").lower().replace(",", " ").split()).strip(" .")
+
+
+class PersonScoreCache:
+    """
+    LRU cache of scored attendee objects keyed by person, company and ICP fingerprint.
+
+    An optional shared backend (e.g. shared_cache.SQLiteCache) keeps scores across
+    worker processes and restarts.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 30 * 86400,
+        max_entries: int = 10000,
+        version: str = "",
+        backend=None
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Seconds a score may be reused.
+            max_entries: Maximum number of scores held in memory.
+            version: Scoring prompt version; bumping it invalidates every score.
+            backend: Optional cache shared between processes, with get(key, max_age)
+                and set(key, value, stored_at) methods.
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.version = version
+        self.backend = backend
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "stored": 0}
+
+    def key(self, name: Any, company: Any, fingerprint: str) -> str:
+        """Return the cache key for a person at a company under an ICP fingerprint."""
+        payload = [self.version, fingerprint, normalize_person(name), normalize_person(company)]
+        return hashlib.sha256(json.dumps(payload).encode("utf-8")).hexdigest()
+
+    def get(self, name: Any, company: Any, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached score.
+
+        Returns:
+            A copy of the scored attendee object, or None if not cached.
+        """
+        key = self.key(name, company, fingerprint)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return copy.deepcopy(entry[1])
+
+        entry = None
+        if self.backend is not None:
+            try:
+                entry = self.backend.get(key, max_age=self.ttl)
+            except Exception as e:
+                print(f"Shared person score cache read failed: {e}")
+        with self._lock:
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["hits"] += 1
+        self._store_local(key, entry[1], entry[0])
+        return copy.deepcopy(entry[1])
+
+    def set(self, name: Any, company: Any, fingerprint: str, attendee: Dict[str, Any]):
+        """Store a scored attendee object."""
+        key = self.key(name, company, fingerprint)
+        stored_at = time.time()
+        self._store_local(key, copy.deepcopy(attendee), stored_at)
+        with self._lock:
+            self._counters["stored"] += 1
+        if self.backend is not None:
+            try:
+                self.backend.set(key, attendee, stored_at=stored_at)
+            except Exception as e:
+                print(f"Shared person score cache write failed: {e}")
+
+    def _store_local(self, key: str, attendee: Dict[str, Any], stored_at: float):
+        with self._lock:
+            self._entries[key] = (stored_at, attendee)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the current hit rate."""
+        with self._lock:
+            counters = dict(self._counters)
+            entries = len(self._entries)
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            **counters,
+            "entries": entries,
+            "hit_rate": round(counters["hits"] / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,259 @@
+"""
+Opt-in profiling of single analyses.
+
+A profiled /api/analyze request (X-Profile header or ?profile=, with the
+X-Admin-Token header matching PROFILING_TOKEN) or a `main.py --profile` run
+records where its time went and writes the profile to PROFILE_DIR:
+
+    sample       Built-in wall-clock sampler of the calling thread and of the
+                 worker threads the pipeline fans out to (work wrapped with
+                 tracing.propagate), so concurrent requests on other threads are
+                 left out. Writes folded stacks (.folded) for flamegraph.pl,
+                 speedscope or inferno.
+    cprofile     cProfile of the calling thread. Writes a pstats file (.prof) for
+                 snakeviz, flameprof or python -m pstats.
+    pyinstrument pyinstrument (pip install pyinstrument) of the calling thread.
+                 Writes a speedscope profile (.speedscope.json).
+"""
+import contextlib
+import contextvars
+import hmac
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+PROFILE_ENGINES = ("sample", "cprofile", "pyinstrument")
+DEFAULT_ENGINE = "sample"
+# Seconds between stack samples of the built-in sampler
+SAMPLE_INTERVAL = 0.005
+
+_EXTENSIONS = {"sample": ".folded", "cprofile": ".prof", "pyinstrument": ".speedscope.json"}
+
+
+class ProfilingDenied(PermissionError):
+    """Raised when profiling is requested without a valid admin token."""
+
+
+def profile_dir() -> str:
+    return os.getenv("PROFILE_DIR", "profiles")
+
+
+def authorized(token: Optional[str]) -> bool:
+    """Return True if token matches PROFILING_TOKEN (profiling is off when it is unset)."""
+    expected = os.getenv("PROFILING_TOKEN")
+    return bool(expected and token) and hmac.compare_digest(expected.encode("utf-8"), token.encode("utf-8"))
+
+
+def requested_engine(flag: Optional[str], token: Optional[str]) -> Optional[str]:
+    """
+    Return the engine a request asked for, or None if it did not ask for profiling.
+
+    Args:
+        flag: Value of the X-Profile header or profile query parameter ("1",
+            "true" or an engine name).
+        token: Value of the X-Admin-Token header.
+
+    Raises:
+        ProfilingDenied: If profiling was requested without a valid token.
+        ValueError: If the engine is unknown.
+    """
+    flag = (flag or "").strip().lower()
+    if flag in ("", "0", "false", "no"):
+        return None
+    if not authorized(token):
+        raise ProfilingDenied("Profiling requires a valid X-Admin-Token")
+    engine = DEFAULT_ENGINE if flag in ("1", "true", "yes") else flag
+    if engine not in PROFILE_ENGINES:
+        raise ValueError(f"Unknown profiler '{engine}' (expected one of {', '.join(PROFILE_ENGINES)})")
+    return engine
+
+
+# Sampler of the profile running in this context, which threads doing work for it join
+_active_sampler: contextvars.ContextVar[Optional["StackSampler"]] = contextvars.ContextVar(
+    "active_sampler", default=None
+)
+
+
+@contextlib.contextmanager
+def profiled_thread():
+    """Include the current thread in the sample profile running in this context, if any."""
+    sampler = _active_sampler.get()
+    if sampler is None:
+        yield
+        return
+    ident = threading.get_ident()
+    sampler.add_thread(ident)
+    try:
+        yield
+    finally:
+        sampler.remove_thread(ident)
+
+
+class StackSampler:
+    """
+    Samples the stacks of the profiled threads at a fixed interval and counts them.
+
+    The thread that starts the sampler is profiled, and so is any thread while it
+    runs under profiled_thread() in the same context (tracing.propagate does this
+    for the pipeline's worker pools).
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Profiled thread idents, counted because a pool thread can join more than once
+        self._threads: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def add_thread(self, ident: int):
+        with self._lock:
+            self._threads[ident] += 1
+
+    def remove_thread(self, ident: int):
+        with self._lock:
+            self._threads[ident] -= 1
+            if self._threads[ident] <= 0:
+                del self._threads[ident]
+
+    def start(self):
+        self._owner = threading.get_ident()
+        self.add_thread(self._owner)
+        _active_sampler.set(self)
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if _active_sampler.get() is self:
+            _active_sampler.set(None)
+        if self._thread is not None:
+            self._thread.join()
+            self.remove_thread(self._owner)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                profiled = set(self._threads)
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident not in profiled:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        """Return the samples in folded-stack format ("frame;frame;frame count" per line)."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class Profiler:
+    """Profiles a block of code and writes the profile to PROFILE_DIR."""
+
+    def __init__(self, engine: str = DEFAULT_ENGINE, label: str = "analysis", directory: Optional[str] = None):
+        """
+        Prepare a profile (the file name is known before it is written).
+
+        Args:
+            engine: One of PROFILE_ENGINES.
+            label: Prefix of the file name.
+            directory: Where to write the profile (default: PROFILE_DIR).
+
+        Raises:
+            ValueError: If the engine is unknown.
+            ImportError: If the engine is pyinstrument and it is not installed.
+        """
+        if engine not in PROFILE_ENGINES:
+            raise ValueError(f"Unknown profiler '{engine}' (expected one of {', '.join(PROFILE_ENGINES)})")
+        if engine == "pyinstrument":
+            try:
+                import pyinstrument  # noqa: F401
+            except ImportError:
+                raise ImportError("The pyinstrument profiler requires pyinstrument: pip install pyinstrument")
+        self.engine = engine
+        self.directory = directory or profile_dir()
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.name = f"{label}-{stamp}-{uuid.uuid4().hex[:8]}{_EXTENSIONS[engine]}"
+        self.path = os.path.join(self.directory, self.name)
+        self.duration = None
+        self._impl = None
+        self._start = None
+
+    def start(self) -> "Profiler":
+        if self.engine == "sample":
+            self._impl = StackSampler()
+            self._impl.start()
+        elif self.engine == "cprofile":
+            import cProfile
+            self._impl = cProfile.Profile()
+            self._impl.enable()
+        else:
+            from pyinstrument import Profiler as PyinstrumentProfiler
+            self._impl = PyinstrumentProfiler(interval=SAMPLE_INTERVAL)
+            self._impl.start()
+        self._start = time.perf_counter()
+        return self
+
+    def stop(self, write: bool = True) -> str:
+        """
+        Stop profiling and write the profile. Returns its path.
+
+        Args:
+            write: Write the profile now. Pass False to only stop collecting (on the
+                thread that started the profile), and call write() later, e.g.
+                off an event loop.
+        """
+        self.duration = time.perf_counter() - self._start
+        if self.engine == "sample":
+            self._impl.stop()
+        elif self.engine == "cprofile":
+            self._impl.disable()
+        else:
+            self._impl.stop()
+        return self.write() if write else self.path
+
+    def write(self) -> str:
+        """Render a stopped profile and write it to its file. Returns its path."""
+        if self.engine == "sample":
+            content = self._impl.folded()
+        elif self.engine == "cprofile":
+            content = None
+        else:
+            from pyinstrument.renderers import SpeedscopeRenderer
+            content = self._impl.output(SpeedscopeRenderer())
+
+        os.makedirs(self.directory, exist_ok=True)
+        if content is None:
+            self._impl.dump_stats(self.path)
+        else:
+            with open(self.path, "w", encoding="utf-8") as f:
+                f.write(content)
+        print(f"Profile ({self.engine}, {self.duration:.2f}s) written to {self.path}")
+        return self.path
+
+    def __enter__(self) -> "Profiler":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def reference(self, url_prefix: Optional[str] = None) -> Dict[str, Any]:
+        """Describe the profile for response metadata (url is set when url_prefix is given)."""
+        reference = {"engine": self.engine, "file": self.name}
+        if url_prefix is not None:
+            reference["url"] = f"{url_prefix.rstrip('/')}/{self.name}"
+        return reference
@@ -0,0 +1,438 @@
+"""
+Full-response cache for /api/analyze with stale-while-revalidate and request coalescing.
+"""
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from singleflight import AsyncSingleFlight, SingleFlight
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a URL for cache keys: lowercase scheme and host, drop "www.",
+    fragments and trailing slashes.
+
+    Args:
+        url: URL as entered by the user.
+
+    Returns:
+        Canonical form of the URL.
+    """
+    url = (url or "").strip()
+    if "://" not in url:
+        url = f"https://{url}"
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    path = parsed.path.rstrip("/")
+    query = f"?{parsed.query}" if parsed.query else ""
+    return f"{host}{path}{query}"
+
+
+def make_cache_key(
+    event_url: str,
+    company_url: str,
+    company_name: str,
+    prompt_versions: Dict[str, str],
+    icp_fingerprint: Optional[str] = None,
+    top_k: Optional[int] = None
+) -> str:
+    """
+    Build a cache key from the normalized request and the prompt versions.
+
+    Args:
+        event_url: Event page URL.
+        company_url: User company website.
+        company_name: User company name.
+        prompt_versions: Version of every prompt the pipeline uses.
+        icp_fingerprint: Fingerprint of a stored ICP profile used instead of researching
+            the company, so editing the profile invalidates its results.
+        top_k: Number of leads requested, for top-K analyses.
+
+    Returns:
+        Hex digest identifying the request.
+    """
+    payload = {
+        "event_url": normalize_url(event_url),
+        "company_url": normalize_url(company_url),
+        "company_name": " ".join((company_name or "").lower().split()),
+        "prompts": prompt_versions,
+    }
+    if icp_fingerprint:
+        payload["icp_fingerprint"] = icp_fingerprint
+    if top_k:
+        payload["top_k"] = top_k
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    In-memory LRU cache of full analysis results.
+
+    Entries younger than ttl are served as hits. Entries older than ttl but younger
+    than stale_ttl are served immediately while a single background refresh runs.
+    Concurrent misses for the same key are coalesced into one computation.
+
+    Background refreshes need a process that keeps running after the response is
+    sent (serve.py, asgi.py). With background_refresh off (e.g. on serverless
+    platforms, which freeze the process after each response) a stale entry is
+    refreshed inline instead, and served only if the refresh fails.
+
+    An optional shared backend (e.g. shared_cache.SQLiteCache) makes results
+    computed by one worker process available to the others.
+    """
+
+    # Seconds after which a pending background refresh is assumed lost (e.g. its
+    # process was frozen) and another one may start
+    REFRESH_TIMEOUT = 900
+
+    def __init__(
+        self,
+        ttl: float = 3600,
+        stale_ttl: float = 86400,
+        max_entries: int = 256,
+        backend=None,
+        should_store: Optional[Callable[[Any], bool]] = None,
+        background_refresh: bool = True
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Seconds an entry is considered fresh.
+            stale_ttl: Seconds an entry may still be served while it is refreshed.
+            max_entries: Maximum number of cached results (least recently used are evicted).
+            backend: Optional cache shared between processes, with get(key, max_age)
+                and set(key, value, stored_at) methods.
+            should_store: Optional predicate deciding whether a computed value is
+                cached (e.g. to skip partial results); values failing it are still
+                returned to their callers, and any cached entry is kept.
+            background_refresh: Refresh stale entries after serving them (needs a
+                long-running process); when False they are refreshed inline.
+        """
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.max_entries = max_entries
+        self.backend = backend
+        self.should_store = should_store
+        self.background_refresh = background_refresh
+
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._async_flight = AsyncSingleFlight()
+        # Keys with a background refresh pending, and when it started (time.time())
+        self._refreshing: Dict[str, float] = {}
+        # Background refresh tasks on the event loop (kept referenced until done)
+        self._refresh_tasks = set()
+        self._counters = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+            "shared_hits": 0,
+        }
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _lookup_local(self, key: str) -> Optional[Tuple[float, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _lookup(self, key: str) -> Optional[Tuple[float, Any]]:
+        entry = self._lookup_local(key)
+        if entry is not None or self.backend is None:
+            return entry
+        return self._lookup_shared(key)
+
+    async def _alookup(self, key: str) -> Optional[Tuple[float, Any]]:
+        entry = self._lookup_local(key)
+        if entry is not None or self.backend is None:
+            return entry
+        # SQLite calls block, so they run on the default thread pool
+        return await asyncio.to_thread(self._lookup_shared, key)
+
+    def _lookup_shared(self, key: str) -> Optional[Tuple[float, Any]]:
+        try:
+            entry = self.backend.get(key, max_age=self.stale_ttl)
+        except Exception as e:
+            print(f"Shared result cache read failed: {e}")
+            return None
+        if entry is not None:
+            self._count("shared_hits")
+            self._store_local(key, entry[1], stored_at=entry[0])
+        return entry
+
+    def _store_local(self, key: str, value: Any, stored_at: float):
+        with self._lock:
+            self._entries[key] = (stored_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def set(self, key: str, value: Any):
+        """Store a value under key, evicting the least recently used entries."""
+        stored_at = time.time()
+        self._store_local(key, value, stored_at)
+        if self.backend is not None:
+            self._store_shared(key, value, stored_at)
+
+    async def aset(self, key: str, value: Any):
+        """Async version of set (the shared backend is called off the event loop)."""
+        stored_at = time.time()
+        self._store_local(key, value, stored_at)
+        if self.backend is not None:
+            await asyncio.to_thread(self._store_shared, key, value, stored_at)
+
+    def _store_shared(self, key: str, value: Any, stored_at: float):
+        try:
+            self.backend.set(key, value, stored_at=stored_at)
+        except Exception as e:
+            print(f"Shared result cache write failed: {e}")
+
+    def peek(self, key: str) -> Optional[Any]:
+        """Return the cached value for key (fresh or stale), without computing or counting it."""
+        entry = self._lookup(key)
+        if entry is None or time.time() - entry[0] > self.stale_ttl:
+            return None
+        return entry[1]
+
+    def invalidate(self, key: str):
+        """Remove a key from the cache."""
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.backend is not None:
+            self._delete_shared(key)
+
+    async def ainvalidate(self, key: str):
+        """Async version of invalidate (the shared backend is called off the event loop)."""
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.backend is not None:
+            await asyncio.to_thread(self._delete_shared, key)
+
+    def _delete_shared(self, key: str):
+        try:
+            self.backend.delete(key)
+        except Exception as e:
+            print(f"Shared result cache delete failed: {e}")
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        force_refresh: bool = False
+    ) -> Tuple[Any, str]:
+        """
+        Return the cached value for key, computing it if needed.
+
+        Args:
+            key: Cache key (see make_cache_key).
+            compute: Zero-argument callable producing the value. Exceptions are not
+                cached and propagate to every coalesced caller.
+            force_refresh: Ignore any cached entry and recompute.
+
+        Returns:
+            Tuple of (value, status) where status is "hit", "stale", "refreshed",
+            "miss" or "coalesced".
+        """
+        entry = None if force_refresh else self._lookup(key)
+        if entry is not None:
+            age = time.time() - entry[0]
+            if age < self.ttl:
+                self._count("hits")
+                return entry[1], "hit"
+            if age < self.stale_ttl:
+                if not self.background_refresh:
+                    return self._refresh_inline(key, entry, compute)
+                self._count("stale_hits")
+                self._refresh_in_background(key, compute)
+                return entry[1], "stale"
+
+        value, shared = self._flight.do(key, lambda: self._compute_and_store(key, compute))
+        if shared:
+            self._count("coalesced")
+            return value, "coalesced"
+        self._count("misses")
+        return value, "miss"
+
+    async def aget_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        force_refresh: bool = False
+    ) -> Tuple[Any, str]:
+        """
+        Async counterpart of get_or_compute for the ASGI app.
+
+        Args:
+            key: Cache key (see make_cache_key).
+            compute: Zero-argument coroutine function producing the value.
+            force_refresh: Ignore any cached entry and recompute.
+
+        Returns:
+            Tuple of (value, status) where status is "hit", "stale", "refreshed",
+            "miss" or "coalesced".
+        """
+        entry = None if force_refresh else await self._alookup(key)
+        if entry is not None:
+            age = time.time() - entry[0]
+            if age < self.ttl:
+                self._count("hits")
+                return entry[1], "hit"
+            if age < self.stale_ttl:
+                if not self.background_refresh:
+                    return await self._arefresh_inline(key, entry, compute)
+                self._count("stale_hits")
+                self._refresh_in_task(key, compute)
+                return entry[1], "stale"
+
+        value, shared = await self._async_flight.do(key, lambda: self._acompute_and_store(key, compute))
+        if shared:
+            self._count("coalesced")
+            return value, "coalesced"
+        self._count("misses")
+        return value, "miss"
+
+    def _inline_result(
+        self,
+        key: str,
+        entry: Tuple[float, Any],
+        value: Any,
+        error: Optional[Exception]
+    ) -> Tuple[Any, str]:
+        """Return the refreshed value, or the stale entry if the refresh failed or cannot be cached."""
+        if error is not None:
+            print(f"Inline refresh failed for cache key {key[:12]}, serving the stale result: {error}")
+            self._count("refresh_errors")
+        elif self.should_store is None or self.should_store(value):
+            self._count("refreshes")
+            self._count("misses")
+            return value, "refreshed"
+        self._count("stale_hits")
+        return entry[1], "stale"
+
+    def _refresh_inline(self, key: str, entry: Tuple[float, Any], compute: Callable[[], Any]) -> Tuple[Any, str]:
+        try:
+            value, _ = self._flight.do(key, lambda: self._compute_and_store(key, compute))
+        except Exception as e:
+            return self._inline_result(key, entry, None, e)
+        return self._inline_result(key, entry, value, None)
+
+    async def _arefresh_inline(
+        self,
+        key: str,
+        entry: Tuple[float, Any],
+        compute: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, str]:
+        try:
+            value, _ = await self._async_flight.do(key, lambda: self._acompute_and_store(key, compute))
+        except Exception as e:
+            return self._inline_result(key, entry, None, e)
+        return self._inline_result(key, entry, value, None)
+
+    def _claim_refresh(self, key: str) -> bool:
+        """Mark a background refresh of key as pending, unless a live one already is."""
+        now = time.time()
+        with self._lock:
+            started = self._refreshing.get(key)
+            if started is not None and now - started < self.REFRESH_TIMEOUT:
+                return False
+            self._refreshing[key] = now
+            return True
+
+    def _release_refresh(self, key: str):
+        with self._lock:
+            self._refreshing.pop(key, None)
+
+    def _storable(self, key: str, value: Any) -> bool:
+        """Return whether a freshly computed value may be cached (see should_store)."""
+        if self.should_store is not None and not self.should_store(value):
+            print(f"Not caching result for cache key {key[:12]}")
+            return False
+        return True
+
+    async def _acompute_and_store(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        value = await compute()
+        if self._storable(key, value):
+            await self.aset(key, value)
+        return value
+
+    def _refresh_in_task(self, key: str, compute: Callable[[], Awaitable[Any]]):
+        if not self._claim_refresh(key):
+            return
+
+        async def refresh():
+            try:
+                await self._async_flight.do(key, lambda: self._acompute_and_store(key, compute))
+                self._count("refreshes")
+            except Exception as e:
+                print(f"Background refresh failed for cache key {key[:12]}: {e}")
+                self._count("refresh_errors")
+
+        def done(task):
+            # Runs even when the task is cancelled before it starts
+            self._refresh_tasks.discard(task)
+            self._release_refresh(key)
+
+        try:
+            task = asyncio.ensure_future(refresh())
+        except BaseException:
+            self._release_refresh(key)
+            raise
+        self._refresh_tasks.add(task)
+        task.add_done_callback(done)
+
+    def _compute_and_store(self, key: str, compute: Callable[[], Any]) -> Any:
+        value = compute()
+        if self._storable(key, value):
+            self.set(key, value)
+        return value
+
+    def _refresh_in_background(self, key: str, compute: Callable[[], Any]):
+        if not self._claim_refresh(key):
+            return
+
+        def refresh():
+            try:
+                self._flight.do(key, lambda: self._compute_and_store(key, compute))
+                self._count("refreshes")
+            except Exception as e:
+                print(f"Background refresh failed for cache key {key[:12]}: {e}")
+                self._count("refresh_errors")
+            finally:
+                self._release_refresh(key)
+
+        try:
+            threading.Thread(target=refresh, name=f"cache-refresh-{key[:8]}", daemon=True).start()
+        except BaseException:
+            self._release_refresh(key)
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/coalesced counters and the current hit rate."""
+        with self._lock:
+            counters = dict(self._counters)
+            entries = len(self._entries)
+        lookups = counters["hits"] + counters["stale_hits"] + counters["misses"] + counters["coalesced"]
+        served_without_run = counters["hits"] + counters["stale_hits"] + counters["coalesced"]
+        return {
+            **counters,
+            "entries": entries,
+            "in_flight": self._flight.in_flight() + self._async_flight.in_flight(),
+            "hit_rate": round(served_without_run / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,209 @@
+"""
+Streaming export of scored attendees to JSONL, CSV or Parquet.
+
+Attendees are written one at a time as they are scored (Parquet buffers one row
+group), and run metadata is written to a separate "<file>.meta.json" file, so
+large batch runs are exported with bounded memory and the attendee file loads
+directly into CRM import jobs.
+"""
+import csv
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+# Column order for tabular formats; nested values are JSON-encoded
+EXPORT_COLUMNS = [
+    "name",
+    "role",
+    "company",
+    "icp_match_score",
+    "business_value_score",
+    "opportunity_type",
+    "match_reasoning",
+    "recommended_action",
+    "key_talking_points",
+    "contact_info",
+]
+
+SCORE_COLUMNS = ("icp_match_score", "business_value_score")
+
+FORMATS = ("jsonl", "csv", "parquet")
+
+
+def _flatten(attendee: Dict[str, Any]) -> Dict[str, Any]:
+    """Project an attendee onto EXPORT_COLUMNS with nested values JSON-encoded."""
+    row = {}
+    for column in EXPORT_COLUMNS:
+        value = attendee.get(column)
+        if isinstance(value, (list, dict)):
+            value = json.dumps(value, ensure_ascii=False)
+        row[column] = value
+    return row
+
+
+def _to_score(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ResultWriter:
+    """Base class for incremental attendee writers. Use as a context manager."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def write(self, attendee: Dict[str, Any]):
+        """Write one scored attendee."""
+        self._write(attendee)
+        self.count += 1
+
+    def write_many(self, attendees):
+        """Write every attendee from an iterable."""
+        for attendee in attendees:
+            self.write(attendee)
+
+    def _write(self, attendee: Dict[str, Any]):
+        raise NotImplementedError
+
+    def close(self):
+        """Flush and close the output file."""
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class JsonlResultWriter(ResultWriter):
+    """Writes one JSON object per line, keeping every attendee field."""
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._file = open(path, "w", encoding="utf-8")
+
+    def _write(self, attendee: Dict[str, Any]):
+        self._file.write(json.dumps(attendee, ensure_ascii=False))
+        self._file.write("\n")
+
+    def close(self):
+        self._file.close()
+
+
+class CsvResultWriter(ResultWriter):
+    """Writes EXPORT_COLUMNS as CSV rows."""
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=EXPORT_COLUMNS)
+        self._writer.writeheader()
+
+    def _write(self, attendee: Dict[str, Any]):
+        self._writer.writerow(_flatten(attendee))
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetResultWriter(ResultWriter):
+    """
+    Writes EXPORT_COLUMNS to a Parquet file, one row group per row_group_size
+    attendees. Requires pyarrow.
+    """
+
+    def __init__(self, path: str, row_group_size: int = 1000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet export requires pyarrow: pip install pyarrow")
+
+        super().__init__(path)
+        self._pa = pa
+        self._schema = pa.schema([
+            (column, pa.float64() if column in SCORE_COLUMNS else pa.string())
+            for column in EXPORT_COLUMNS
+        ])
+        self._writer = pq.ParquetWriter(path, self._schema)
+        self._row_group_size = row_group_size
+        self._buffer: List[Dict[str, Any]] = []
+
+    def _write(self, attendee: Dict[str, Any]):
+        row = _flatten(attendee)
+        for column in EXPORT_COLUMNS:
+            if column in SCORE_COLUMNS:
+                row[column] = _to_score(row[column])
+            elif row[column] is not None:
+                row[column] = str(row[column])
+        self._buffer.append(row)
+        if len(self._buffer) >= self._row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if self._buffer:
+            table = self._pa.Table.from_pylist(self._buffer, schema=self._schema)
+            self._writer.write_table(table)
+            self._buffer = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+def detect_format(path: str) -> Optional[str]:
+    """Return the export format implied by a file extension, or None for plain JSON."""
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension in ("jsonl", "ndjson"):
+        return "jsonl"
+    if extension in ("csv", "parquet"):
+        return extension
+    return None
+
+
+def open_result_writer(path: str, file_format: Optional[str] = None) -> ResultWriter:
+    """
+    Open a streaming writer for scored attendees.
+
+    Args:
+        path: Output file path.
+        file_format: "jsonl", "csv" or "parquet"; inferred from the extension if omitted.
+
+    Returns:
+        A ResultWriter (use as a context manager).
+    """
+    file_format = file_format or detect_format(path)
+    if file_format == "jsonl":
+        return JsonlResultWriter(path)
+    if file_format == "csv":
+        return CsvResultWriter(path)
+    if file_format == "parquet":
+        return ParquetResultWriter(path)
+    raise ValueError(f"Unsupported export format for {path}: choose one of {', '.join(FORMATS)}")
+
+
+def metadata_path(path: str) -> str:
+    """Return the metadata sidecar path for an export file ("x.csv" -> "x.csv.meta.json")."""
+    return f"{path}.meta.json"
+
+
+def write_metadata(path: str, metadata: Dict[str, Any]) -> str:
+    """
+    Write run metadata (ICP, research text, summary, sources) next to an export file.
+
+    Args:
+        path: The attendee export path.
+        metadata: Everything in the results except the attendee rows.
+
+    Returns:
+        The metadata file path.
+    """
+    meta_path = metadata_path(path)
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(metadata, f, ensure_ascii=False)
+    return meta_path
@@ -0,0 +1,146 @@
+"""
+Production server for the Event ICP Matcher web app.
+
+Runs app.py under gunicorn with several worker processes, each with its own
+thread pool and its own API clients. Set SHARED_CACHE_PATH to let the workers
+share analysis results and Linkup responses through a local SQLite file. On
+SIGTERM/SIGINT each worker stops accepting requests and drains in-flight
+analyses (up to the graceful timeout) before exiting.
+
+With --asgi the workers run asgi.py under uvicorn instead: /api/analyze is
+served on an event loop, so each worker handles many concurrent analyses
+without a thread per request.
+
+Usage:
+    python serve.py [--workers 4] [--threads 8] [--port 5001] [--asgi]
+
+Environment:
+    WEB_CONCURRENCY     Worker processes (default: 2 x CPUs + 1)
+    WEB_THREADS         Threads per worker (default: 8)
+    PORT                Listen port (default: 5001)
+    GRACEFUL_TIMEOUT    Seconds to drain in-flight analyses on shutdown (default: 330)
+    SHARED_CACHE_PATH   SQLite file shared by the workers (e.g. .cache/shared.sqlite3)
+    RESULT_CACHE_BACKGROUND_REFRESH
+                        Refresh stale results after serving them (default: on here)
+"""
+import argparse
+import multiprocessing
+import os
+
+from env_config import load_env
+
+# Longest an analysis may run (matches the 300s Vercel cap plus headroom)
+REQUEST_TIMEOUT = 330
+
+
+def post_fork(server, worker):
+    """Give each worker its own API clients and HTTP connection pools."""
+    import app as web_app
+    web_app.reset_clients()
+
+
+def worker_exit(server, worker):
+    """Wait for in-flight analyses (including background cache refreshes) to finish."""
+    import app as web_app
+    timeout = float(os.getenv("GRACEFUL_TIMEOUT", REQUEST_TIMEOUT))
+    if not web_app.inflight_analyses.drain(timeout):
+        print(f"Worker {worker.pid}: {web_app.inflight_analyses.count} analyses still running at shutdown")
+
+
+def build_options(workers: int, threads: int, port: int, use_asgi: bool = False) -> dict:
+    """Return the gunicorn settings for the production server."""
+    graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", REQUEST_TIMEOUT))
+    return {
+        "bind": f"0.0.0.0:{port}",
+        "workers": workers,
+        "worker_class": "uvicorn.workers.UvicornWorker" if use_asgi else "gthread",
+        "threads": threads,
+        "timeout": REQUEST_TIMEOUT,
+        "graceful_timeout": graceful_timeout,
+        "keepalive": 5,
+        # Import the app once in the master so workers fork with modules already loaded
+        "preload_app": True,
+        "post_fork": post_fork,
+        "worker_exit": worker_exit,
+        "accesslog": "-",
+    }
+
+
+def main():
+    """CLI entry point."""
+    load_env()
+    parser = argparse.ArgumentParser(description="Run the Event ICP Matcher web app in production mode.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1)),
+        help="Number of worker processes (default: WEB_CONCURRENCY or 2 x CPUs + 1)"
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=int(os.getenv("WEB_THREADS", 8)),
+        help="Threads per worker (default: WEB_THREADS or 8)"
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=int(os.getenv("PORT", 5001)),
+        help="Port to listen on (default: PORT or 5001)"
+    )
+    parser.add_argument(
+        "--asgi",
+        action="store_true",
+        help="Serve asgi.py with uvicorn workers (async /api/analyze)"
+    )
+    args = parser.parse_args()
+
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        print("✗ Production mode requires gunicorn: pip install -r requirements-server.txt")
+        return 1
+    if args.asgi:
+        try:
+            import uvicorn  # noqa: F401
+            import httpx  # noqa: F401
+        except ImportError:
+            print("✗ ASGI mode requires uvicorn, httpx and asgiref: pip install -r requirements-server.txt")
+            return 1
+
+    class ProductionServer(BaseApplication):
+        """Embedded gunicorn application serving app.app."""
+
+        def __init__(self, options: dict):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            if args.asgi:
+                from asgi import application
+                return application
+            from app import app as flask_app
+            return flask_app
+
+    print("\n" + "="*70)
+    print("Event ICP Matcher - Production Server")
+    print("="*70)
+    if args.asgi:
+        print(f"\n🚀 http://0.0.0.0:{args.port} ({args.workers} async workers)")
+    else:
+        print(f"\n🚀 http://0.0.0.0:{args.port} ({args.workers} workers x {args.threads} threads)")
+    # Workers outlive their responses, so stale results are refreshed in the background
+    os.environ.setdefault("RESULT_CACHE_BACKGROUND_REFRESH", "1")
+    shared_cache = os.getenv("SHARED_CACHE_PATH")
+    print(f"🗄  Shared cache: {shared_cache or 'disabled (set SHARED_CACHE_PATH)'}\n")
+
+    ProductionServer(build_options(args.workers, args.threads, args.port, use_asgi=args.asgi)).run()
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,142 @@
+"""
+Local cache shared between worker processes, backed by SQLite.
+
+Every worker opens the same database file, so analysis results and Linkup
+responses computed by one process are reused by the others. Values are stored
+as JSON with the time they were written; expiry is decided by the caller.
+A cache opened with max_age also deletes its expired rows when it opens and
+every SHARED_CACHE_PRUNE_EVERY writes, so the file does not grow without bound.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional, Tuple
+
+# Writes between prunes of expired rows (per process and cache)
+PRUNE_EVERY = int(os.getenv("SHARED_CACHE_PRUNE_EVERY", 500))
+
+
+class SQLiteCache:
+    """Process- and thread-safe key/value store in a single SQLite file."""
+
+    def __init__(self, path: str, namespace: str = "default", max_age: Optional[float] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            path: Database file path (created if missing).
+            namespace: Logical table prefix so several caches can share one file.
+            max_age: Age in seconds after which no caller reads an entry; expired
+                entries are pruned periodically. None keeps entries forever.
+        """
+        self.path = path
+        self.namespace = namespace
+        self.max_age = max_age
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " namespace TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " stored_at REAL NOT NULL,"
+                " value TEXT NOT NULL,"
+                " PRIMARY KEY (namespace, key))"
+            )
+        self._prune_expired()
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread (and per process: a forked child opens its own)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[Tuple[float, Any]]:
+        """
+        Look up a key.
+
+        Args:
+            key: Cache key.
+            max_age: Ignore entries older than this many seconds.
+
+        Returns:
+            Tuple of (stored_at timestamp, value), or None if missing or too old.
+        """
+        row = self._connection().execute(
+            "SELECT stored_at, value FROM cache WHERE namespace = ? AND key = ?",
+            (self.namespace, key)
+        ).fetchone()
+        if row is None:
+            return None
+        stored_at, value = row
+        if max_age is not None and time.time() - stored_at > max_age:
+            return None
+        return stored_at, json.loads(value)
+
+    def set(self, key: str, value: Any, stored_at: Optional[float] = None):
+        """Store a JSON-serializable value under key."""
+        self._connection().execute(
+            "INSERT OR REPLACE INTO cache (namespace, key, stored_at, value) VALUES (?, ?, ?, ?)",
+            (self.namespace, key, stored_at or time.time(), json.dumps(value))
+        )
+        if self.max_age is None:
+            return
+        with self._writes_lock:
+            self._writes += 1
+            due = self._writes >= PRUNE_EVERY
+            if due:
+                self._writes = 0
+        if due:
+            self._prune_expired()
+
+    def delete(self, key: str):
+        """Remove a key."""
+        self._connection().execute(
+            "DELETE FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key)
+        )
+
+    def prune(self, max_age: float) -> int:
+        """Delete entries older than max_age seconds. Returns the number removed."""
+        cursor = self._connection().execute(
+            "DELETE FROM cache WHERE namespace = ? AND stored_at < ?",
+            (self.namespace, time.time() - max_age)
+        )
+        return cursor.rowcount
+
+    def _prune_expired(self):
+        """Prune entries older than max_age; a failed prune is retried on a later write."""
+        if self.max_age is None:
+            return
+        try:
+            removed = self.prune(self.max_age)
+        except sqlite3.Error as e:
+            print(f"Shared cache prune failed for '{self.namespace}': {e}")
+            return
+        if removed:
+            print(f"Pruned {removed} expired '{self.namespace}' entries from the shared cache")
+
+
+def open_shared_cache(namespace: str, max_age: Optional[float] = None) -> Optional[SQLiteCache]:
+    """
+    Open the shared cache configured by SHARED_CACHE_PATH.
+
+    Args:
+        namespace: Namespace for this cache's keys.
+        max_age: Longest age any caller reads entries at; older ones are pruned.
+
+    Returns:
+        A SQLiteCache, or None if SHARED_CACHE_PATH is not set.
+    """
+    path = os.getenv("SHARED_CACHE_PATH")
+    if not path:
+        return None
+    return SQLiteCache(path, namespace=namespace, max_age=max_age)
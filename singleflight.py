@@ -0,0 +1,124 @@
+"""
+Single-flight request coalescing.
+
+Concurrent callers asking for the same key share one in-flight computation: the
+first caller runs it, everyone else waits on the same future and receives the
+same result (or exception). AsyncSingleFlight does the same for coroutines
+running on one event loop.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from deadline import DeadlineExceeded
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls that share a key."""
+
+    def __init__(self):
+        """Initialize an empty in-flight table."""
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """
+        Run fn once for all concurrent callers with the same key.
+
+        Args:
+            key: Identity of the call (e.g. a normalized request payload).
+            fn: Zero-argument callable that computes the result.
+            timeout: Longest this caller waits for a call started by another
+                thread (the leader's own call is bounded by fn).
+
+        Returns:
+            Tuple of (result, shared) where shared is True if this caller joined a
+            call started by another thread.
+
+        Raises:
+            DeadlineExceeded: If the call this caller joined outlasts its timeout.
+            Whatever fn raised, re-raised in every waiting caller.
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+
+        if not leader:
+            try:
+                return future.result(timeout), True
+            except FutureTimeoutError:
+                raise DeadlineExceeded(f"Identical in-flight call did not finish within {timeout:.1f}s") from None
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+        return future.result(), False
+
+    def in_flight(self) -> int:
+        """Return the number of calls currently running."""
+        with self._lock:
+            return len(self._inflight)
+
+
+class AsyncSingleFlight:
+    """Deduplicates concurrent coroutine calls that share a key (one event loop)."""
+
+    def __init__(self):
+        """Initialize an empty in-flight table."""
+        self._inflight: Dict[Hashable, "asyncio.Future"] = {}
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[Any]],
+        timeout: Optional[float] = None
+    ) -> Tuple[Any, bool]:
+        """
+        Await fn once for all concurrent callers with the same key.
+
+        The call runs as its own task, so a caller that is cancelled (e.g. a client
+        disconnect) does not cancel it for the callers still waiting.
+
+        Args:
+            key: Identity of the call (e.g. a normalized request payload).
+            fn: Zero-argument coroutine function that computes the result.
+            timeout: Longest this caller waits for a call started by another
+                coroutine (the leader's own call is bounded by fn).
+
+        Returns:
+            Tuple of (result, shared) where shared is True if this caller joined a
+            call started by another coroutine.
+
+        Raises:
+            DeadlineExceeded: If the call this caller joined outlasts its timeout.
+            Whatever fn raised, re-raised in every waiting caller.
+        """
+        task = self._inflight.get(key)
+        shared = task is not None
+        if not shared:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._discard(key, done))
+            return await asyncio.shield(task), False
+        try:
+            # Only this caller's wait is cancelled on timeout; the shared call keeps running
+            return await asyncio.wait_for(asyncio.shield(task), timeout), True
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(f"Identical in-flight call did not finish within {timeout:.1f}s") from None
+
+    def _discard(self, key: Hashable, task: "asyncio.Future"):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def in_flight(self) -> int:
+        """Return the number of calls currently running."""
+        return len(self._inflight)
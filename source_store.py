@@ -0,0 +1,214 @@
+"""
+Content-addressed store for search sources and citations.
+
+The same LinkedIn, Crunchbase and company pages are cited by analysis after
+analysis. Each distinct (URL, snippet) record is stored once under an id derived
+from its content; results carry the ids, and are expanded back into full
+records only when a response needs them inline.
+"""
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Where analysis results keep their source arrays
+RESULT_SOURCE_FIELDS: Tuple[Tuple[str, ...], ...] = (
+    ("step1_attendees", "sources"),
+    ("step2_enriched", "sources"),
+    ("step3_icp", "sources"),
+    ("sources",),
+)
+
+_TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "trk", "ref")
+
+
+def canonical_url(url: str) -> str:
+    """Normalize a URL for deduplication (lowercase host, no tracking params, fragment or trailing slash)."""
+    parts = urlsplit((url or "").strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode([
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(_TRACKING_PARAMS)
+    ])
+    return urlunsplit((parts.scheme.lower() or "https", host, parts.path.rstrip("/"), query, ""))
+
+
+def _record(source: Any) -> Dict[str, Any]:
+    """Turn a source (dict or bare URL) into a stored record."""
+    if isinstance(source, dict):
+        return dict(source)
+    return {"url": str(source)}
+
+
+def source_id(source: Any) -> str:
+    """
+    Return the content id of a source.
+
+    Sources with the same canonical URL and the same snippet share an id; the
+    same page cited with a different snippet gets its own.
+    """
+    record = _record(source)
+    snippet = " ".join(str(record.get("snippet") or record.get("content") or "").split())
+    key = canonical_url(record["url"]) if record.get("url") else json.dumps(record, sort_keys=True)
+    return "src_" + hashlib.sha256(f"{key}\n{snippet}".encode("utf-8")).hexdigest()[:16]
+
+
+def is_source_id(value: Any) -> bool:
+    return isinstance(value, str) and value.startswith("src_")
+
+
+class SourceStore:
+    """
+    LRU store of source records by content id.
+
+    An optional shared backend (e.g. shared_cache.SQLiteCache) keeps records
+    across worker processes and restarts, so ids in cached results stay
+    resolvable everywhere. When the backend expires entries after max_age, a
+    record is written again once half of max_age has passed since this store
+    last wrote it, so it outlives every result younger than max_age / 2 that
+    references it.
+    """
+
+    def __init__(self, max_entries: int = 50000, backend=None):
+        """
+        Initialize the store.
+
+        Args:
+            max_entries: Maximum number of records held in memory.
+            backend: Optional cache shared between processes, with get(key) and
+                set(key, value) methods.
+        """
+        self.max_entries = max_entries
+        self.backend = backend
+        self._records: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"stored": 0, "deduplicated": 0}
+        # When each record in memory was last written to the backend (time.time())
+        self._shared_at: Dict[str, float] = {}
+
+    def put(self, source: Any) -> str:
+        """Store a source (if new) and return its id."""
+        sid = source_id(source)
+        with self._lock:
+            if sid in self._records:
+                self._records.move_to_end(sid)
+                self._counters["deduplicated"] += 1
+                if not self._rewrite_due(sid):
+                    return sid
+                record = self._records[sid]
+            else:
+                record = self._records[sid] = _record(source)
+                self._counters["stored"] += 1
+                while len(self._records) > self.max_entries:
+                    evicted, _ = self._records.popitem(last=False)
+                    self._shared_at.pop(evicted, None)
+        if self.backend is not None:
+            try:
+                self.backend.set(sid, record)
+                with self._lock:
+                    if sid in self._records:
+                        self._shared_at[sid] = time.time()
+            except Exception as e:
+                print(f"Shared source store write failed: {e}")
+        return sid
+
+    def _rewrite_due(self, sid: str) -> bool:
+        """Return whether a record in memory should be written to an expiring backend again."""
+        max_age = getattr(self.backend, "max_age", None)
+        if max_age is None:
+            return False
+        return time.time() - self._shared_at.get(sid, 0) > max_age / 2
+
+    def put_all(self, sources: Iterable[Any]) -> List[str]:
+        """Store sources and return their ids, without duplicates, in order."""
+        ids = []
+        for source in sources or []:
+            sid = source if is_source_id(source) else self.put(source)
+            if sid not in ids:
+                ids.append(sid)
+        return ids
+
+    def get(self, sid: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the record for an id, or None if unknown."""
+        with self._lock:
+            record = self._records.get(sid)
+            if record is not None:
+                self._records.move_to_end(sid)
+                return dict(record)
+        if self.backend is None:
+            return None
+        try:
+            entry = self.backend.get(sid)
+        except Exception as e:
+            print(f"Shared source store read failed: {e}")
+            return None
+        if entry is None:
+            return None
+        with self._lock:
+            self._records[sid] = entry[1]
+            self._shared_at[sid] = entry[0]
+        return dict(entry[1])
+
+    def get_many(self, ids: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Return the records for several ids (None for unknown ids)."""
+        return {sid: self.get(sid) for sid in ids}
+
+    def compact(self, results: Dict[str, Any], fields=RESULT_SOURCE_FIELDS) -> Dict[str, Any]:
+        """
+        Return a copy of results with every source array replaced by source ids.
+
+        Args:
+            results: Analysis results.
+            fields: Key paths of the source arrays.
+        """
+        results = copy.copy(results)
+        for path in fields:
+            self._replace(results, path, self.put_all)
+        return results
+
+    def expand(self, results: Dict[str, Any], fields=RESULT_SOURCE_FIELDS) -> Dict[str, Any]:
+        """Return a copy of results with source ids replaced by their records."""
+        def records(ids):
+            return [
+                (self.get(sid) or {"id": sid}) if is_source_id(sid) else sid
+                for sid in ids or []
+            ]
+
+        results = copy.copy(results)
+        for path in fields:
+            self._replace(results, path, records)
+        return results
+
+    def index(self, results: Dict[str, Any], fields=RESULT_SOURCE_FIELDS) -> Dict[str, Dict[str, Any]]:
+        """Return {id: record} for every source id referenced by compacted results."""
+        ids = []
+        for path in fields:
+            container = results
+            for key in path:
+                container = container.get(key) if isinstance(container, dict) else None
+            ids.extend(sid for sid in container or [] if is_source_id(sid) and sid not in ids)
+        return {sid: self.get(sid) for sid in ids}
+
+    @staticmethod
+    def _replace(results: Dict[str, Any], path: Tuple[str, ...], transform):
+        """Replace the list at path (copying the dicts along the way) with transform(list)."""
+        container = results
+        for key in path[:-1]:
+            child = container.get(key)
+            if not isinstance(child, dict):
+                return
+            container[key] = child = dict(child)
+            container = child
+        if isinstance(container.get(path[-1]), list):
+            container[path[-1]] = transform(container[path[-1]])
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the number of stored and deduplicated sources."""
+        with self._lock:
+            return {**self._counters, "entries": len(self._records)}
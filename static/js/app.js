@@ -37,16 +37,17 @@ document.getElementById('analysis-form').addEventListener('submit', async functi
         formInfo.style.fontWeight = '600';
         formInfo.style.color = 'var(--color-primary)';
 
-        // Make API request with extended timeout (10 minutes for large events)
+        // The server returns (possibly partial) results within ANALYSIS_BUDGET (270s by default)
         const controller = new AbortController();
-        const timeoutId = setTimeout(() => controller.abort(), 600000);
+        const timeoutId = setTimeout(() => controller.abort(), 300000);
 
         const response = await fetch('/api/analyze', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
             },
-            body: JSON.stringify(formData),
+            // The first page of attendees comes with the summary, the rest from /api/results/<result_id>/attendees
+            body: JSON.stringify({ ...formData, view: 'summary' }),
             signal: controller.signal
         });
 
@@ -59,7 +60,7 @@ document.getElementById('analysis-form').addEventListener('submit', async functi
         }
 
         // Display results
-        displayResults(data);
+        displayResults(data, formData);
 
         // Scroll to results
         resultsSection.scrollIntoView({
@@ -73,7 +74,7 @@ document.getElementById('analysis-form').addEventListener('submit', async functi
         // Show user-friendly error message
         let errorMessage = 'Analysis failed. Please try again.';
         if (error.name === 'AbortError') {
-            errorMessage = 'Request timed out after 10 minutes. The event may be too large or the servers may be busy. Please try again.';
+            errorMessage = 'Request timed out after 5 minutes. The event may be too large or the servers may be busy. Please try again.';
         } else if (error.message) {
             errorMessage = error.message;
         }
@@ -93,7 +94,7 @@ document.getElementById('analysis-form').addEventListener('submit', async functi
 });
 
 // Display results in the UI
-function displayResults(data) {
+function displayResults(data, request) {
     const resultsContainer = document.querySelector('.results-container');
     const resultsSection = document.getElementById('results-section');
 
@@ -177,24 +178,168 @@ function displayResults(data) {
 
         <div class="attendees-list">
             <h3>Attendee Analysis</h3>
-            ${renderAttendees(attendees)}
+            ${metadata.result_id ? `
+                <div class="attendee-controls">
+                    <select id="attendee-sort" title="Sort attendees">
+                        <option value="score">Best overall</option>
+                        <option value="icp_match_score">ICP match</option>
+                        <option value="business_value_score">Business potential</option>
+                        <option value="name">Name</option>
+                        <option value="company">Company</option>
+                    </select>
+                    <select id="attendee-type" title="Filter by opportunity type">
+                        <option value="">All opportunity types</option>
+                    </select>
+                    <span id="attendee-count" class="attendee-count"></span>
+                </div>
+                <div id="attendee-cards"></div>
+                <button id="load-more-attendees" type="button" class="btn btn-secondary" style="display: none;">Load more</button>
+            ` : renderAttendees(sortByAverageScore(attendees || []))}
         </div>
     `;
 
     resultsContainer.innerHTML = resultsHTML;
     resultsSection.style.display = 'block';
+
+    if (metadata.result_id) {
+        attendeePager.resultId = metadata.result_id;
+        attendeePager.request = request;
+        attendeePager.local = null;
+        document.getElementById('attendee-sort').addEventListener('change', () => loadAttendees(true));
+        document.getElementById('attendee-type').addEventListener('change', () => loadAttendees(true));
+        document.getElementById('load-more-attendees').addEventListener('click', () => loadAttendees(false));
+        if (step4_matches.attendees_page) {
+            showAttendeePage(step4_matches.attendees_page, true);
+        } else {
+            loadAttendees(true);
+        }
+    }
 }
 
-// Render attendees list
-function renderAttendees(attendees) {
-    // Sort by average of both scores (highest first)
-    const sortedAttendees = [...attendees].sort((a, b) => {
-        const avgA = ((a.icp_match_score || 0) + (a.business_value_score || 0)) / 2;
-        const avgB = ((b.icp_match_score || 0) + (b.business_value_score || 0)) / 2;
-        return avgB - avgA;
+// Attendees are fetched a page at a time, sorted and filtered by the server.
+// The first page comes with the analysis; if the server no longer holds the
+// result (e.g. the request reached another instance), every attendee is fetched
+// once with the slim view and paged in the browser instead.
+const ATTENDEE_PAGE_SIZE = 25;
+const attendeePager = { resultId: null, request: null, local: null, offset: 0, seq: 0 };
+
+async function loadAttendees(reset) {
+    const cards = document.getElementById('attendee-cards');
+    const loadMore = document.getElementById('load-more-attendees');
+    const sort = document.getElementById('attendee-sort').value;
+
+    const query = {
+        offset: reset ? 0 : attendeePager.offset,
+        limit: ATTENDEE_PAGE_SIZE,
+        sort: sort,
+        order: sort === 'name' || sort === 'company' ? 'asc' : 'desc',
+        opportunity_type: document.getElementById('attendee-type').value
+    };
+    // Only the latest request is shown, so a slow page for an old sort or filter is dropped
+    const seq = ++attendeePager.seq;
+
+    loadMore.disabled = true;
+    try {
+        const page = attendeePager.local ? localAttendeePage(query) : await fetchAttendeePage(query);
+        if (seq !== attendeePager.seq) return;
+        showAttendeePage(page, reset);
+    } catch (error) {
+        if (seq !== attendeePager.seq) return;
+        console.error('Error:', error);
+        cards.insertAdjacentHTML('beforeend', `<p class="attendee-count">${error.message}</p>`);
+    } finally {
+        if (seq === attendeePager.seq) loadMore.disabled = false;
+    }
+}
+
+async function fetchAttendeePage(query) {
+    const response = await fetch(`/api/results/${attendeePager.resultId}/attendees?${new URLSearchParams(query)}`);
+    const page = await response.json();
+    if (response.status === 404 && attendeePager.request) {
+        attendeePager.local = await fetchAllAttendees();
+        return localAttendeePage(query);
+    }
+    if (!response.ok) {
+        throw new Error(page.error || 'Could not load attendees');
+    }
+    return page;
+}
+
+async function fetchAllAttendees() {
+    const response = await fetch('/api/analyze', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({ ...attendeePager.request, view: 'slim', fields: 'step4_matches.attendees' })
+    });
+    const data = await response.json();
+    if (!response.ok) {
+        throw new Error(data.error || 'Could not load attendees');
+    }
+    return data.step4_matches?.attendees || [];
+}
+
+// Same paging, sorting and filtering as the server, over attendeePager.local
+function localAttendeePage({ offset, limit, sort, order, opportunity_type }) {
+    const typeOf = attendee => (attendee.opportunity_type || 'Unknown').trim();
+    const facets = {};
+    attendeePager.local.forEach(attendee => {
+        facets[typeOf(attendee)] = (facets[typeOf(attendee)] || 0) + 1;
+    });
+
+    const types = opportunity_type ? opportunity_type.split(',').map(type => type.trim().toLowerCase()) : [];
+    const matching = attendeePager.local.filter(attendee => !types.length || types.includes(typeOf(attendee).toLowerCase()));
+    const value = attendee => {
+        if (sort === 'score') return averageScore(attendee);
+        if (sort === 'name' || sort === 'company') return String(attendee[sort] || '').toLowerCase();
+        return Number(attendee[sort]) || 0;
+    };
+    const ranked = matching.map((attendee, position) => [attendee, position]).sort(([a, i], [b, j]) => {
+        const compared = value(a) < value(b) ? -1 : value(a) > value(b) ? 1 : 0;
+        return (order === 'desc' ? -compared : compared) || i - j;
     });
+    return {
+        attendees: ranked.slice(offset, offset + limit).map(([attendee]) => attendee),
+        total: matching.length,
+        offset: offset,
+        limit: limit,
+        facets: facets
+    };
+}
+
+function showAttendeePage(page, reset) {
+    const cards = document.getElementById('attendee-cards');
+    const loadMore = document.getElementById('load-more-attendees');
+    const typeSelect = document.getElementById('attendee-type');
+
+    if (reset) cards.innerHTML = '';
+    cards.insertAdjacentHTML('beforeend', renderAttendees(page.attendees));
+    attendeePager.offset = page.offset + page.attendees.length;
 
-    return sortedAttendees.map(attendee => {
+    // Fill the opportunity type filter once, from the unfiltered counts
+    if (typeSelect.options.length === 1) {
+        Object.entries(page.facets).forEach(([type, count]) => {
+            typeSelect.add(new Option(`${type} (${count})`, type));
+        });
+    }
+    document.getElementById('attendee-count').textContent =
+        `Showing ${attendeePager.offset} of ${page.total}`;
+    loadMore.style.display = attendeePager.offset < page.total ? 'inline-flex' : 'none';
+}
+
+function averageScore(attendee) {
+    return ((attendee.icp_match_score || 0) + (attendee.business_value_score || 0)) / 2;
+}
+
+// Sort by average of both scores (highest first)
+function sortByAverageScore(attendees) {
+    return [...attendees].sort((a, b) => averageScore(b) - averageScore(a));
+}
+
+// Render attendees list
+function renderAttendees(attendees) {
+    return attendees.map(attendee => {
         const icpScore = attendee.icp_match_score || 0;
         const businessScore = attendee.business_value_score || 0;
         const avgScore = (icpScore + businessScore) / 2;
@@ -0,0 +1,297 @@
+"""
+Span tracing of pipeline steps and outbound API calls.
+
+Set TRACING to turn it on:
+
+    otel   Spans go through the OpenTelemetry API (pip install opentelemetry-api
+           opentelemetry-sdk opentelemetry-exporter-otlp), to whatever tracer
+           provider is configured (e.g. by opentelemetry-instrument). If none is,
+           an OTLP exporter is set up from the standard OTEL_EXPORTER_OTLP_*
+           variables. Without the packages, spans fall back to the file exporter.
+    file   Spans are appended to TRACE_FILE (default traces.jsonl), one JSON
+           object per line, with OpenTelemetry field names (trace_id, span_id,
+           parent_span_id, start/end_time_unix_nano, attributes, status).
+
+Unset (the default), span() is a no-op. Spans follow contextvars, so they nest
+across asyncio tasks; work handed to thread pools keeps its parent span when the
+callable is wrapped with propagate().
+"""
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from profiling import profiled_thread
+
+SERVICE_NAME = "event-icp-matcher"
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+class _NoopSpan:
+    """Stands in for a span when tracing is off."""
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        pass
+
+    def record_exception(self, exception: BaseException):
+        pass
+
+    def is_recording(self) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def _attribute_value(value: Any):
+    """Coerce a value to an OpenTelemetry attribute type (None if it should be dropped)."""
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [item if isinstance(item, (str, bool, int, float)) else str(item) for item in value]
+    return str(value)
+
+
+class _FileSpan:
+    """A span written to the trace file when it ends."""
+
+    def __init__(self, name: str, parent: Optional["_FileSpan"]):
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent.span_id if parent is not None else None
+        self.start = time.time_ns()
+        self.attributes: Dict[str, Any] = {}
+        self.status = {"code": "OK"}
+        self.events = []
+
+    def set_attribute(self, key: str, value: Any):
+        value = _attribute_value(value)
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def record_exception(self, exception: BaseException):
+        self.status = {"code": "ERROR", "message": str(exception)}
+        self.events.append({
+            "name": "exception",
+            "time_unix_nano": time.time_ns(),
+            "attributes": {"exception.type": type(exception).__name__, "exception.message": str(exception)},
+        })
+
+    def is_recording(self) -> bool:
+        return True
+
+    def to_dict(self, end: int) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "start_time_unix_nano": self.start,
+            "end_time_unix_nano": end,
+            "duration_ms": round((end - self.start) / 1e6, 3),
+            "thread": threading.current_thread().name,
+            "attributes": self.attributes,
+            "status": self.status,
+            "events": self.events,
+            "resource": {"service.name": SERVICE_NAME},
+        }
+
+
+class FileTracer:
+    """Appends finished spans to a JSON-lines file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._current: contextvars.ContextVar = contextvars.ContextVar("file_span", default=None)
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(self, name: str, attributes: Dict[str, Any]):
+        span = _FileSpan(name, self._current.get())
+        span.set_attributes(attributes)
+        token = self._current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            self._current.reset(token)
+            self._export(span.to_dict(time.time_ns()))
+
+    def current_span(self):
+        return self._current.get() or _NOOP_SPAN
+
+    def _export(self, record: Dict[str, Any]):
+        line = json.dumps(record, default=str) + "\n"
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+        except OSError as e:
+            print(f"Trace export to {self.path} failed: {e}")
+
+
+class OtelTracer:
+    """Spans through the OpenTelemetry API."""
+
+    def __init__(self):
+        from opentelemetry import trace
+        self._trace = trace
+        if type(trace.get_tracer_provider()).__name__ == "ProxyTracerProvider":
+            self._configure_provider()
+        self._tracer = trace.get_tracer(SERVICE_NAME)
+
+    def _configure_provider(self):
+        """Install an SDK provider exporting over OTLP (nothing was configured by the host)."""
+        try:
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError:
+            raise ImportError(
+                "TRACING=otel without a configured tracer provider requires "
+                "pip install opentelemetry-sdk opentelemetry-exporter-otlp"
+            )
+        provider = TracerProvider(resource=Resource.create({"service.name": SERVICE_NAME}))
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+        self._trace.set_tracer_provider(provider)
+
+    @contextlib.contextmanager
+    def span(self, name: str, attributes: Dict[str, Any]):
+        attributes = {key: _attribute_value(value) for key, value in attributes.items()}
+        with self._tracer.start_as_current_span(
+            name, attributes={key: value for key, value in attributes.items() if value is not None}
+        ) as span:
+            yield span
+
+    def current_span(self):
+        return self._trace.get_current_span()
+
+
+def _load_tracer():
+    """Return the configured tracer (None when tracing is off)."""
+    mode = os.getenv("TRACING", "").strip().lower()
+    if mode in ("", "0", "off", "false", "none"):
+        return None
+    if mode == "otel":
+        try:
+            return OtelTracer()
+        except ImportError as e:
+            print(f"OpenTelemetry tracing unavailable ({e}); writing spans to the trace file instead")
+    elif mode != "file":
+        print(f"Unknown TRACING mode '{mode}' (expected otel or file); writing spans to the trace file")
+    return FileTracer(os.getenv("TRACE_FILE", "traces.jsonl"))
+
+
+def get_tracer():
+    """Return the process tracer, loading it from the environment on first use."""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = _load_tracer() or False
+    return _tracer or None
+
+
+def reset_tracer():
+    """Forget the loaded tracer, so the next span re-reads TRACING (e.g. after load_env)."""
+    global _tracer
+    with _tracer_lock:
+        _tracer = None
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes):
+    """
+    Trace a block as a span, nested under the current span.
+
+    Args:
+        name: Span name (e.g. "linkup.search").
+        **attributes: Initial span attributes (None values are dropped).
+
+    Yields:
+        The span, with set_attribute()/set_attributes() for results known later.
+    """
+    tracer = get_tracer()
+    if tracer is None:
+        yield _NOOP_SPAN
+        return
+    with tracer.span(name, attributes) as current:
+        yield current
+
+
+def current_span():
+    """Return the innermost active span (a no-op span when there is none)."""
+    tracer = get_tracer()
+    return tracer.current_span() if tracer is not None else _NOOP_SPAN
+
+
+def traced(name: str, **attributes):
+    """Decorator tracing every call of a function as a span."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name, **attributes):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def propagate(function: Callable) -> Callable:
+    """
+    Wrap a callable so it runs under the caller's current span in another thread.
+
+    Use for work submitted to a ThreadPoolExecutor, which does not copy contextvars.
+    The thread also joins the caller's sample profile while it runs the call.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        with profiled_thread():
+            return function(*args, **kwargs)
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        # A context can only be entered by one thread at a time, so each call gets a copy
+        return context.copy().run(run, *args, **kwargs)
+    return wrapper
+
+
+def model_span(system: str, model: str, operation: str, attempt: Optional[int] = None):
+    """Span for one model call ("openai.chat" or "anthropic.messages"), with gen_ai attributes."""
+    name = "openai.chat" if system == "openai" else f"{system}.messages"
+    return span(name, **{
+        "gen_ai.system": system,
+        "gen_ai.request.model": model,
+        "icp.operation": operation,
+        "retry.attempt": attempt,
+    })
+
+
+def record_usage(current, response: Any):
+    """Set token counts from an OpenAI or Anthropic response on a span."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    input_tokens = getattr(usage, "prompt_tokens", None) or getattr(usage, "input_tokens", None)
+    output_tokens = getattr(usage, "completion_tokens", None) or getattr(usage, "output_tokens", None)
+    current.set_attributes({
+        "gen_ai.usage.input_tokens": input_tokens,
+        "gen_ai.usage.output_tokens": output_tokens,
+    })
@@ -0,0 +1,78 @@
+"""
+Completion of truncated analyze_icp_match results, shared by the Claude
+(icp_matcher) and OpenAI (icp_matcher_openai) matchers.
+
+json_recovery salvages the complete attendee objects from a truncated response;
+this mixin re-requests the missing attendees and recomputes the summary.
+"""
+from typing import Any, Dict, List
+
+
+class TruncationRecoveryMixin:
+    """
+    Completes truncated analyze_icp_match results and recomputes their summaries.
+
+    Subclasses provide analyze_icp_match(company_info, attendee_info, company_name,
+    already_analyzed) returning a dict with an "attendees" list.
+    """
+
+    def _complete_partial_analysis(
+        self,
+        result: Dict[str, Any],
+        company_info: str,
+        attendee_info: str,
+        company_name: str
+    ) -> Dict[str, Any]:
+        """
+        Re-request only the attendees missing from a truncated analysis and merge them.
+
+        Args:
+            result: Partial result holding the recovered attendee objects.
+            company_info: Information about your company and its ICP.
+            attendee_info: Information about event attendees.
+            company_name: Name of your company.
+
+        Returns:
+            The merged result with a recomputed summary.
+        """
+        attendees = list(result.get("attendees", []))
+        names = [a.get("name", "") for a in attendees]
+        print(f"Recovered {len(attendees)} attendees from a truncated response, requesting the rest...")
+
+        follow_up = self.analyze_icp_match(
+            company_info=company_info,
+            attendee_info=attendee_info,
+            company_name=company_name,
+            already_analyzed=names
+        )
+        if "error" not in follow_up:
+            seen = {" ".join(name.lower().split()) for name in names}
+            for attendee in follow_up.get("attendees", []):
+                key = " ".join(str(attendee.get("name", "")).lower().split())
+                if key not in seen:
+                    seen.add(key)
+                    attendees.append(attendee)
+            for key in ("overall_event_assessment", "recommendations"):
+                if key in follow_up and key not in result:
+                    result[key] = follow_up[key]
+            result["partial"] = bool(follow_up.get("partial"))
+
+        result["attendees"] = attendees
+        result["summary"] = self.summarize_priorities(attendees)
+        return result
+
+    @staticmethod
+    def summarize_priorities(attendees: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Recompute the priority summary from a list of analyzed attendees."""
+        counts = {"High Priority": 0, "Medium Priority": 0, "Low Priority": 0, "Not a Fit": 0}
+        for attendee in attendees:
+            opportunity = attendee.get("opportunity_type")
+            if opportunity in counts:
+                counts[opportunity] += 1
+        return {
+            "total_attendees_analyzed": len(attendees),
+            "high_priority_matches": counts["High Priority"],
+            "medium_priority_matches": counts["Medium Priority"],
+            "low_priority_matches": counts["Low Priority"],
+            "not_a_fit": counts["Not a Fit"]
+        }